@@ -1,5 +1,8 @@
-import os, re, json, base64, binascii, argparse, hashlib
-from typing import Any
+import os, re, json, base64, binascii, argparse
+from typing import Any, Tuple
+
+from cas import ObjectStore, STORE_DEFAULT
+from qc_common import sha16
 
 # ---------- Einstellungen ----------
 DEFAULT_OUT = "01_ngp_analysis/extracted"
@@ -33,50 +36,45 @@ def try_utf8(b: bytes):
 
 # ---------- Walker ----------
 class Extractor:
-    def __init__(self, out_dir: str):
+    def __init__(self, out_dir: str, store: ObjectStore = None):
         self.out = out_dir
         os.makedirs(self.out, exist_ok=True)
-        self.counter = 0
+        self.store = store or ObjectStore()
         self.manifest = []
 
-    def save_bytes(self, data: bytes, hint: str) -> str:
-        self.counter += 1
-        ext = sniff_ext(data)
-        path = os.path.join(self.out, f"{self.counter:04d}_{safe(hint)}{ext}")
-        with open(path, "wb") as f:
-            f.write(data)
-        return path
+    def _place(self, data: bytes, hint: str, ext: str) -> Tuple[str, str]:
+        # Inhalt liegt einmal im Objekt-Store; im Ausgabeordner nur ein Hardlink mit stabilem Namen
+        # → (sha256 des Objekts, Pfad für das Manifest)
+        return self.store.place(data, os.path.join(self.out, f"{safe(hint)}_{sha16(data)}{ext}"))
+
+    def save_bytes(self, data: bytes, hint: str) -> Tuple[str, str]:
+        return self._place(data, hint, sniff_ext(data))
 
-    def save_text(self, text: str, hint: str) -> str:
-        self.counter += 1
+    def save_text(self, text: str, hint: str) -> Tuple[str, str]:
         # JSON hübsch machen, falls möglich
         try:
             obj = json.loads(text)
-            path = os.path.join(self.out, f"{self.counter:04d}_{safe(hint)}.json")
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(obj, f, ensure_ascii=False, indent=2)
-            return path
+            return self._place(json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8"), hint, ".json")
         except Exception:
-            path = os.path.join(self.out, f"{self.counter:04d}_{safe(hint)}.txt")
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(text)
-            return path
+            return self._place(text.encode("utf-8"), hint, ".txt")
 
     def handle_string(self, s: str, path_hint: str):
         if not is_base64(s):
             return
         raw = base64.b64decode(s)
-        sha = hashlib.sha256(raw).hexdigest()[:16]
+        sha = sha16(raw)
         text = try_utf8(raw)
         if text is not None and text.strip():
-            out = self.save_text(text, path_hint)
+            obj_sha, out = self.save_text(text, path_hint)
             kind = "text"
             size = len(raw)
         else:
-            out = self.save_bytes(raw, path_hint)
+            obj_sha, out = self.save_bytes(raw, path_hint)
             kind = "binary"
             size = len(raw)
-        self.manifest.append({"path": path_hint, "kind": kind, "size": size, "sha256_16": sha, "file": out})
+        # sha256_16 = dekodierter Base64-Inhalt; object_sha256 = Objekt im Store (bei Text ggf. hübsch formatiert)
+        self.manifest.append({"path": path_hint, "kind": kind, "size": size, "sha256_16": sha,
+                              "object_sha256": obj_sha, "file": out})
         print(f"[{kind.upper():5}] {path_hint} → {out} ({size} bytes, sha256:{sha})")
 
     def walk(self, node: Any, path="root"):
@@ -99,15 +97,18 @@ def main():
     ap = argparse.ArgumentParser(description="QC Backup JSON analysieren und Base64-Blöcke extrahieren.")
     ap.add_argument("input", help="Pfad zur backup.json")
     ap.add_argument("-o", "--out", default=DEFAULT_OUT, help="Ausgabeordner (default: 01_ngp_analysis/extracted)")
+    ap.add_argument("--store", default=STORE_DEFAULT, help="Objekt-Store (Default: 01_ngp_analysis/objects)")
+    ap.add_argument("--no-links", action="store_true", help="Keine Hardlinks im Ausgabeordner, nur Verweise auf den Store")
     args = ap.parse_args()
 
     with open(args.input, "r", encoding="utf-8") as f:
         data = json.load(f)
 
     print(f"🔍 Datei geladen: {args.input}")
-    ex = Extractor(args.out)
+    ex = Extractor(args.out, ObjectStore(args.store, link=not args.no_links))
     ex.walk(data)
     ex.write_manifest()
+    print(f"🗃️  Store: {ex.store.summary()}")
     print("\n✅ Fertig.")
 
 if __name__ == "__main__":
@@ -1,37 +1,52 @@
-import os, json, argparse, math
-from collections import Counter
+import os, json, argparse
+import numpy as np
+
+from payload_io import open_payload
+from block_manifest import BlockSource, label
 
 HERE = os.path.dirname(__file__)
 ANALYSIS_DIR = os.path.dirname(HERE)
 RAW_DIR = os.path.join(ANALYSIS_DIR, "members_zlib_raw")
 MANIFEST = os.path.join(RAW_DIR, "_manifest_zlib_raw.json")
+REPORT = os.path.join(ANALYSIS_DIR, "block_entropy_report.json")
+
+def byte_histogram(data) -> np.ndarray:
+    return np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
 
 def entropy(data: bytes) -> float:
-    if not data: return 0.0
-    counts = Counter(data)
-    length = len(data)
-    return -sum((c/length) * math.log2(c/length) for c in counts.values())
-
-def analyze_block(path: str, max_bytes: int = 50000):
-    with open(path, "rb") as f:
-        blob = f.read(max_bytes)  # nur ersten Teil, reicht für Statistik
-    ent = entropy(blob)
-    counts = Counter(blob)
-    top = counts.most_common(10)
+    if not len(data): return 0.0
+    counts = byte_histogram(data)
+    p = counts[counts > 0] / len(data)
+    return float(-(p * np.log2(p)).sum())
+
+def block_stats(name: str, blob, max_bytes: int = None):
+    # ganzer Block (max_bytes=None); für Stichproben kann weiterhin ein Präfix gewählt werden
+    sample = blob[:max_bytes]
+    ent = entropy(sample)
+    counts = byte_histogram(sample)
+    sample.release()
+    top = np.argsort(-counts, kind="stable")[:10]
     return {
-        "file": os.path.basename(path),
-        "size": os.path.getsize(path),
+        "file": name,
+        "size": len(blob),
         "entropy": round(ent, 3),
-        "top10": [(f"0x{b:02x}", n) for b, n in top],
+        "top10": [(f"0x{b:02x}", int(counts[b])) for b in top],
     }
 
-def main():
+def analyze_block(path: str, max_bytes: int = None):
+    with open_payload(path) as block:
+        return block_stats(os.path.basename(path), block.view, max_bytes)
+
+def main(argv=None):
     ap = argparse.ArgumentParser(description="Statistische Analyse von ZLIB-Rohblöcken (Entropie, Byte-Histogramm).")
     ap.add_argument("--indices", type=str, help="Block-Indizes (z.B. 45,36,188)")
-    args = ap.parse_args()
+    ap.add_argument("--manifest", default=MANIFEST, help="Block-Manifest (_manifest_zlib_raw.json)")
+    ap.add_argument("--payload", help="payload.raw für Index-Manifeste (Default: Pfad aus dem Manifest)")
+    ap.add_argument("-o", "--out", default=REPORT, help="Report-Datei (Default: 01_ngp_analysis/block_entropy_report.json)")
+    args = ap.parse_args(argv)
 
-    with open(MANIFEST, "r", encoding="utf-8") as f:
-        manifest = json.load(f)
+    src = BlockSource(args.manifest, args.payload)
+    manifest = src.blocks
 
     if args.indices:
         indices = [int(x.strip()) for x in args.indices.split(",")]
@@ -42,15 +57,18 @@ def main():
 
     results = []
     for rec in targets:
-        res = analyze_block(rec["file"])
+        with src.open(rec) as blob:
+            res = block_stats(label(rec), blob)
         results.append(res)
         print(f"📦 {res['file']} | size={res['size']} | entropy={res['entropy']}")
         print("   Top10 Bytes:", res["top10"])
 
-    out = os.path.join(ANALYSIS_DIR, "block_entropy_report.json")
-    with open(out, "w", encoding="utf-8") as f:
+    src.close()
+
+    with open(args.out, "w", encoding="utf-8") as f:
         json.dump(results, f, indent=2)
-    print(f"\n✅ Report gespeichert: {out}")
+    print(f"\n✅ Report gespeichert: {args.out}")
+    return results
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,84 @@
+import sqlite3
+from typing import Dict, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (
+    block      TEXT    NOT NULL,   -- sha256_16 des Blocks (aus dem Manifest)
+    offset     INTEGER NOT NULL,
+    wbits      INTEGER NOT NULL,
+    min_bytes  INTEGER NOT NULL,
+    ok         INTEGER NOT NULL,   -- 1 = Treffer, 0 = kein Treffer
+    consumed   INTEGER,            -- verbrauchte Eingabebytes (falls bekannt)
+    length     INTEGER,            -- Ausgabegröße bei Treffer
+    out_sha16  TEXT,
+    kind       TEXT,
+    file       TEXT,               -- Ergebnisdatei (relativ zum Block-Ordner)
+    limit_hit  TEXT,               -- "max_output"/"ratio", wenn der Versuch abgebrochen wurde
+    limits     TEXT,               -- Limits.key() des Laufs, der den abgebrochenen Treffer erzeugt hat
+    PRIMARY KEY (block, offset, wbits, min_bytes)
+) WITHOUT ROWID
+"""
+
+# Spalten, die ältere Cache-Dateien noch nicht haben (werden beim Öffnen ergänzt)
+ADDED_COLUMNS = (("limit_hit", "TEXT"), ("limits", "TEXT"))
+COLUMNS = ("block, offset, wbits, min_bytes, ok, consumed, length, out_sha16, kind, file, limit_hit, limits")
+
+FLUSH_EVERY = 2000  # Versuche pro Commit → bei Abbruch geht höchstens ein Batch verloren
+
+class AttemptCache:
+    """
+    Persistenter Speicher aller Dekompressionsversuche (SQLite).
+    Schlüssel: (Block-sha256_16, offset, wbits, min_bytes) → spätere Läufe testen nur neue Grid-Punkte.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(SCHEMA)
+        have = {row[1] for row in self.db.execute("PRAGMA table_info(attempts)")}
+        for name, typ in ADDED_COLUMNS:
+            if name not in have:
+                self.db.execute(f"ALTER TABLE attempts ADD COLUMN {name} {typ}")
+        self._pending = []
+
+    def lookup(self, block: str, min_bytes: int, limits: Optional[str] = None) -> Dict[Tuple[int, int], dict]:
+        """
+        Alle bekannten Versuche eines Blocks: {(offset, wbits): {...}}.
+        Mit limits (Limits.key()): abgebrochene Treffer unter anderen Limits gelten als veraltet und fehlen.
+        """
+        cur = self.db.execute(
+            "SELECT offset, wbits, ok, consumed, length, out_sha16, kind, file, limit_hit, limits "
+            "FROM attempts WHERE block = ? AND min_bytes = ?", (block, min_bytes))
+        return {(o, wb): {"ok": bool(ok), "consumed": consumed, "length": length,
+                          "sha16": sha, "kind": kind, "file": fn, "limit": lim}
+                for o, wb, ok, consumed, length, sha, kind, fn, lim, key in cur
+                if not (lim and limits is not None and key != limits)}
+
+    def record(self, block: str, offset: int, wbits: int, min_bytes: int, ok: bool,
+               consumed: Optional[int] = None, length: Optional[int] = None,
+               sha16: Optional[str] = None, kind: Optional[str] = None, file: Optional[str] = None,
+               limit: Optional[str] = None, limits: Optional[str] = None):
+        self._pending.append((block, offset, wbits, min_bytes, int(ok), consumed, length, sha16, kind, file,
+                              limit, limits if limit else None))
+        if len(self._pending) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            with self.db:
+                self.db.executemany(f"INSERT OR REPLACE INTO attempts ({COLUMNS}) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", self._pending)
+            self._pending = []
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+class NullCache:
+    """Platzhalter für --no-cache."""
+
+    def lookup(self, block, min_bytes, limits=None): return {}
+    def record(self, *args, **kwargs): pass
+    def flush(self): pass
+    def close(self): pass
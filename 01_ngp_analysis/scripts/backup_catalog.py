@@ -0,0 +1,64 @@
+import sqlite3
+from typing import Dict, Iterable, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS backups (
+    path        TEXT    PRIMARY KEY,   -- absoluter Pfad der Backup-Datei
+    size        INTEGER NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    meta_sig    TEXT,                  -- "pfad|size|mtime_ns" der _meta.json (oder NULL)
+    created     TEXT,
+    author      TEXT,
+    name        TEXT,
+    meta_id     TEXT
+) WITHOUT ROWID
+"""
+
+COLUMNS = ("size", "mtime_ns", "meta_sig", "created", "author", "name", "meta_id")
+
+class BackupCatalog:
+    """
+    Persistenter Metadaten-Katalog der Backups (SQLite).
+    Ein Eintrag gilt, solange Pfad, Größe und mtime (auch der _meta.json) unverändert sind.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(SCHEMA)
+        self._pending = []
+
+    def load(self) -> Dict[str, dict]:
+        """Alle Einträge auf einmal: {path: {...}} (eine Abfrage statt einer pro Datei)."""
+        cur = self.db.execute(f"SELECT path, {', '.join(COLUMNS)} FROM backups")
+        return {row[0]: dict(zip(COLUMNS, row[1:])) for row in cur}
+
+    def put(self, path: str, size: int, mtime_ns: int, meta_sig: Optional[str],
+            meta: Tuple[str, str, str, Optional[str]]):
+        self._pending.append((path, size, mtime_ns, meta_sig, *meta))
+
+    def prune(self, paths: Iterable[str]):
+        """Einträge verschwundener Dateien entfernen."""
+        with self.db:
+            self.db.executemany("DELETE FROM backups WHERE path = ?", ((p,) for p in paths))
+
+    def flush(self):
+        if self._pending:
+            with self.db:
+                self.db.executemany("INSERT OR REPLACE INTO backups VALUES (?,?,?,?,?,?,?,?)", self._pending)
+            self._pending = []
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+class NullCatalog:
+    """Platzhalter für --no-catalog."""
+
+    def load(self): return {}
+    def put(self, *args, **kwargs): pass
+    def prune(self, paths): pass
+    def flush(self): pass
+    def close(self): pass
@@ -1,4 +1,9 @@
-import os, json, argparse, hashlib
+import os, json, base64, binascii, argparse, hashlib
+from bisect import bisect_left
+from collections import defaultdict
+
+from json_stream import read_fields
+from cdc import chunks
 
 HERE = os.path.dirname(__file__)
 ANALYSIS_DIR = os.path.dirname(HERE)
@@ -8,18 +13,19 @@ def sha256_short(b: bytes, n=12):
     return hashlib.sha256(b).hexdigest()[:n]
 
 def load_backup(path):
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return data
+    # nur 'payload' lesen – Rest des Backups wird streamend überlesen
+    return read_fields(path, ("payload",))
 
 def extract_payload(data):
-    # payload im JSON → base64? oder raw-binary-string?
+    # payload im JSON ist Base64 (QC-Backups); Fallback: Zeichenkette als Bytes vergleichen
     payload = data.get("payload")
     if not payload:
         return None
-    # Payload kann ein String mit Binärdaten sein
     if isinstance(payload, str):
-        # als Zeichenkette (hex oder raw) → in Bytes umwandeln
+        try:
+            return base64.b64decode(payload, validate=True)
+        except binascii.Error:
+            print("⚠️ payload ist kein gültiges Base64 – vergleiche die Zeichenkette als Bytes")
         try:
             return payload.encode("latin-1")
         except Exception:
@@ -28,22 +34,132 @@ def extract_payload(data):
         return payload
     return None
 
-def split_blocks(blob, blocksize=65536):
-    """ Teilt Payload in feste Blöcke (z. B. 64 KB) zum Vergleich """
-    return [blob[i:i+blocksize] for i in range(0, len(blob), blocksize)]
+def patience_anchors(a, b):
+    """
+    Gemeinsame Chunks, die in A und B jeweils genau einmal vorkommen, in gleicher Reihenfolge
+    (längste aufsteigende Teilfolge, O(k log k)) → [(i, j)].
+    """
+    count_a, count_b, pos_b = defaultdict(int), defaultdict(int), {}
+    for h in a:
+        count_a[h] += 1
+    for j, h in enumerate(b):
+        count_b[h] += 1
+        pos_b[h] = j
+    pairs = [(i, pos_b[h]) for i, h in enumerate(a) if count_a[h] == 1 and count_b.get(h) == 1]
+
+    # LIS über j (Patience Sorting mit Rückverweisen)
+    tails, tails_idx, prev = [], [], [-1] * len(pairs)
+    for k, (_, j) in enumerate(pairs):
+        t = bisect_left(tails, j)
+        if t == len(tails):
+            tails.append(j)
+            tails_idx.append(k)
+        else:
+            tails[t] = j
+            tails_idx[t] = k
+        prev[k] = tails_idx[t - 1] if t else -1
+    out, k = [], tails_idx[-1] if tails_idx else -1
+    while k != -1:
+        out.append(pairs[k])
+        k = prev[k]
+    return out[::-1]
+
+def align(a, b):
+    """Zuordnung gleicher Chunks: Anker + Ausdehnung vorwärts/rückwärts → {i: j}."""
+    match = {}
+    used_b = set()
+    anchors = patience_anchors(a, b)
+    bounds = [(-1, -1)] + anchors + [(len(a), len(b))]
+    for (pi, pj), (ni, nj) in zip(bounds, bounds[1:]):
+        if 0 <= pi:
+            match[pi] = pj
+            used_b.add(pj)
+        i, j = pi + 1, pj + 1           # vorwärts vom vorigen Anker
+        while i < ni and j < nj and a[i] == b[j]:
+            match[i] = j
+            used_b.add(j)
+            i, j = i + 1, j + 1
+        ei, ej = ni - 1, nj - 1         # rückwärts vom nächsten Anker
+        while ei >= i and ej >= j and a[ei] == b[ej]:
+            match[ei] = ej
+            used_b.add(ej)
+            ei, ej = ei - 1, ej - 1
+    return match, used_b
+
+def _merge(idx, ch):
+    """Zusammenhängende Chunk-Indizes → Byte-Bereiche [(start, end)]."""
+    out = []
+    for k in idx:
+        start, length, _ = ch[k]
+        if out and out[-1][1] == start:
+            out[-1][1] = start + length
+        else:
+            out.append([start, start + length])
+    return [tuple(r) for r in out]
+
+def diff_chunks(ca, cb):
+    """
+    Änderungen zwischen zwei Chunk-Listen als Regionen:
+    inserted (nur B), deleted (nur A), changed (Lücke mit beidem), moved (gleicher Chunk, andere Stelle).
+    """
+    a = [h for _, _, h in ca]
+    b = [h for _, _, h in cb]
+    match, used_b = align(a, b)
+
+    # verschobene Chunks: in A ohne Partner an Ort und Stelle, aber irgendwo in B frei
+    free_b = defaultdict(list)
+    for j in range(len(b) - 1, -1, -1):
+        if j not in used_b:
+            free_b[b[j]].append(j)
+    moved = []
+    for i in range(len(a)):
+        if i not in match and free_b.get(a[i]):
+            j = free_b[a[i]].pop()
+            used_b.add(j)
+            if moved and moved[-1][1] == i - 1 and moved[-1][3] == j - 1:
+                moved[-1][1], moved[-1][3] = i, j
+            else:
+                moved.append([i, i, j, j])
+    moved_a = {i for m in moved for i in range(m[0], m[1] + 1)}
+
+    regions = []
+    # Lücken zwischen zugeordneten Chunks
+    pairs = sorted(match.items()) + [(len(a), len(b))]
+    pi, pj = -1, -1
+    for i, j in pairs:
+        gap_a = [k for k in range(pi + 1, i) if k not in moved_a]
+        gap_b = [k for k in range(pj + 1, j) if k not in used_b]
+        ra, rb = _merge(gap_a, ca), _merge(gap_b, cb)
+        if len(ra) == 1 and len(rb) == 1:
+            regions.append({"type": "changed", "a": ra[0], "b": rb[0]})
+        else:
+            regions += [{"type": "deleted", "a": r} for r in ra]
+            regions += [{"type": "inserted", "b": r} for r in rb]
+        pi, pj = i, j
+
+    for i0, i1, j0, j1 in moved:
+        regions.append({"type": "moved", "a": (ca[i0][0], ca[i1][0] + ca[i1][1]),
+                        "b": (cb[j0][0], cb[j1][0] + cb[j1][1])})
+    same = sum(ca[i][1] for i in match)
+    return regions, same
+
+ICONS = {"inserted": "➕ eingefügt ", "deleted": "➖ gelöscht  ", "changed": "✏️  geändert  ", "moved": "🔀 verschoben"}
+
+def fmt_range(side, r):
+    return f"{side.upper()}[{r[0]}:{r[1]}] ({r[1] - r[0]} B)"
 
 def main():
-    ap = argparse.ArgumentParser(description="Vergleicht zwei QC-Backups blockweise")
+    ap = argparse.ArgumentParser(description="Vergleicht zwei QC-Backups (Content-Defined Chunking, verschiebungstolerant)")
     ap.add_argument("file1", help="Backup A (JSON)")
     ap.add_argument("file2", help="Backup B (JSON)")
-    ap.add_argument("--blocksize", type=int, default=65536, help="Blockgröße (default 64 KB)")
+    ap.add_argument("--avg", type=int, default=8192, help="mittlere Chunk-Größe (default 8 KB)")
+    ap.add_argument("--min", type=int, default=0, help="minimale Chunk-Größe (default avg/4)")
+    ap.add_argument("--max", type=int, default=0, help="maximale Chunk-Größe (default avg*8)")
+    ap.add_argument("--json", help="Regionen zusätzlich als JSON speichern")
     args = ap.parse_args()
 
-    data1 = load_backup(args.file1)
-    data2 = load_backup(args.file2)
-
-    payload1 = extract_payload(data1)
-    payload2 = extract_payload(data2)
+    payload1 = extract_payload(load_backup(args.file1))
+    payload2 = extract_payload(load_backup(args.file2))
 
     if payload1 is None or payload2 is None:
         print("❌ Konnte Payload in den Backups nicht finden.")
@@ -52,24 +168,25 @@ def main():
     if len(payload1) != len(payload2):
         print(f"⚠️ Unterschiedliche Payload-Länge: {len(payload1)} vs {len(payload2)}")
 
-    blocks1 = split_blocks(payload1, args.blocksize)
-    blocks2 = split_blocks(payload2, args.blocksize)
+    ca = chunks(payload1, args.avg, args.min, args.max)
+    cb = chunks(payload2, args.avg, args.min, args.max)
+    regions, same = diff_chunks(ca, cb)
 
-    total = min(len(blocks1), len(blocks2))
-    diffs = 0
     print(f"📊 Vergleich: {args.file1} vs {args.file2}")
-    print(f"   Payload-Größe: {len(payload1)} Bytes, in {len(blocks1)} Blöcken à {args.blocksize}")
-
-    for i in range(total):
-        h1 = sha256_short(blocks1[i])
-        h2 = sha256_short(blocks2[i])
-        if h1 != h2:
-            print(f"❌ Block {i:03d} unterscheidet sich | {h1} vs {h2}")
-            diffs += 1
-        else:
-            print(f"✅ Block {i:03d} identisch ({h1})")
+    print(f"   Payload A: {len(payload1)} Bytes in {len(ca)} Chunks | B: {len(payload2)} Bytes in {len(cb)} Chunks (⌀ {args.avg})")
+    for r in regions:
+        parts = [fmt_range(side, r[side]) for side in ("a", "b") if side in r]
+        print(f"{ICONS[r['type']]}  {' → '.join(parts)}")
+
+    share = same / len(payload1) if payload1 else 1.0
+    print(f"\nErgebnis: {len(regions)} Regionen | {same} von {len(payload1)} Bytes aus A unverändert ({share:.1%})")
 
-    print(f"\nErgebnis: {diffs} unterschiedliche Blöcke von {total}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"a": {"file": args.file1, "size": len(payload1), "sha256": sha256_short(payload1, 64)},
+                       "b": {"file": args.file2, "size": len(payload2), "sha256": sha256_short(payload2, 64)},
+                       "avg_chunk": args.avg, "unchanged_bytes": same, "regions": regions}, f, indent=2)
+        print(f"✅ Regionen gespeichert: {args.json}")
 
 if __name__ == "__main__":
     main()
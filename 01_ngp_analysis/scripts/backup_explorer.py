@@ -1,8 +1,15 @@
 import os, json, argparse
 
+from json_stream import read_fields
+from backup_catalog import BackupCatalog, NullCatalog
+
 HERE = os.path.dirname(__file__)
 SCAN_DIR = os.path.join(os.path.dirname(HERE), "scan")
 META_DIR = os.path.join(SCAN_DIR, "Metadata")
+CATALOG_NAME = "_backup_catalog.sqlite"
+
+# Nur diese Top-Level-Felder werden aus dem Backup gelesen; payload/payload_hash werden überlesen
+BACKUP_FIELDS = ("created", "date", "author", "author_id", "name")
 
 def load_json(path):
     try:
@@ -11,9 +18,15 @@ def load_json(path):
     except Exception:
         return {}
 
+def load_fields(path, fields=BACKUP_FIELDS):
+    try:
+        return read_fields(path, fields)
+    except Exception:
+        return {}
+
 def extract_meta(backup_path, meta_path=None):
-    # 1) aus Hauptdatei lesen
-    data = load_json(backup_path)
+    # 1) aus Hauptdatei lesen (streamend, ohne den Payload zu dekodieren)
+    data = load_fields(backup_path)
     created = data.get("created") or data.get("date") or "?"
     author = data.get("author") or data.get("author_id") or "?"
     name = data.get("name") or os.path.basename(backup_path)
@@ -30,35 +43,73 @@ def extract_meta(backup_path, meta_path=None):
 
     return created, author, name, meta_id
 
+def list_json(directory):
+    """{name: stat} aller .json-Dateien eines Ordners (ein scandir statt stat pro Datei)."""
+    try:
+        with os.scandir(directory) as it:
+            return {e.name: e.stat() for e in it if e.name.endswith(".json") and e.is_file()}
+    except FileNotFoundError:
+        return {}
+
+def meta_signature(path, st):
+    return f"{path}|{st.st_size}|{st.st_mtime_ns}" if path else None
+
+def find_meta(base, meta_files):
+    """(Pfad, Signatur) der passenden <base>_meta.json – erst scan/Metadata, dann der Backup-Ordner."""
+    for d, listing in meta_files:
+        if base + "_meta.json" in listing:
+            meta_path = os.path.join(d, base + "_meta.json")
+            return meta_path, meta_signature(meta_path, listing[base + "_meta.json"])
+    return None, None
+
 def main():
     ap = argparse.ArgumentParser(description="QC Backup Explorer – Übersicht aller Backups + Metadaten")
     ap.add_argument("--dir", default=SCAN_DIR, help="Backup-Verzeichnis (default: scan/)")
+    ap.add_argument("--catalog", help=f"Metadaten-Katalog (Default: <dir>/{CATALOG_NAME})")
+    ap.add_argument("--no-catalog", action="store_true", help="Katalog weder lesen noch schreiben")
+    ap.add_argument("--rebuild", action="store_true", help="Alle Backups neu lesen (Katalog wird überschrieben)")
     args = ap.parse_args()
 
-    backups = [f for f in os.listdir(args.dir) if f.endswith(".json") and not f.endswith("_meta.json")]
+    files = list_json(args.dir)
+    backups = [f for f in files if not f.endswith("_meta.json")]
     if not backups:
         print("Keine Backups gefunden.")
         return
 
+    meta_files = [(META_DIR, list_json(META_DIR)), (args.dir, files)]
+    catalog = NullCatalog() if args.no_catalog else BackupCatalog(args.catalog or os.path.join(args.dir, CATALOG_NAME))
+    known = {} if args.rebuild else catalog.load()
+    reread = 0
+
     print(f"📂 Gefundene Backups in {args.dir}:")
     for b in sorted(backups):
-        backup_path = os.path.join(args.dir, b)
+        backup_path = os.path.abspath(os.path.join(args.dir, b))
+        st = files[b]
 
         # passendes _meta.json suchen
-        base = b.replace(".json", "")
-        candidates = [
-            os.path.join(META_DIR, base + "_meta.json"),
-            os.path.join(args.dir, base + "_meta.json"),
-        ]
-        meta_path = next((p for p in candidates if os.path.exists(p)), None)
+        meta_path, meta_sig = find_meta(b.replace(".json", ""), meta_files)
 
-        created, author, name, meta_id = extract_meta(backup_path, meta_path)
-        size = os.path.getsize(backup_path)
+        rec = known.get(backup_path)
+        if rec and rec["size"] == st.st_size and rec["mtime_ns"] == st.st_mtime_ns and rec["meta_sig"] == meta_sig:
+            created, author, name, meta_id = rec["created"], rec["author"], rec["name"], rec["meta_id"]
+        else:
+            created, author, name, meta_id = extract_meta(backup_path, meta_path)
+            catalog.put(backup_path, st.st_size, st.st_mtime_ns, meta_sig, (created, author, name, meta_id))
+            reread += 1
+        size = st.st_size
 
         line = f"- {b} | {size/1024:.1f} KB | created={created} | author={author} | name={name}"
         if meta_id:
             line += f" | id={meta_id[:8]}…"  # nur die ersten 8 Zeichen anzeigen
         print(line)
 
+    # verschwundene Backups dieses Ordners aus dem Katalog entfernen
+    here = os.path.abspath(args.dir)
+    listed = {os.path.join(here, b) for b in backups}
+    catalog.prune(p for p in known if os.path.dirname(p) == here and p not in listed)
+    catalog.close()
+    if not args.no_catalog:
+        print(f"\n♻️  Katalog: {len(backups) - reread} unverändert, {reread} neu gelesen")
+
 if __name__ == "__main__":
     main()
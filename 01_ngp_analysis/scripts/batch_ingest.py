@@ -0,0 +1,123 @@
+import os, sys, json, time, hashlib, argparse, contextlib
+from multiprocessing import Pool
+
+from json_stream import TopLevelReader, read_fields
+from extract_payload import extract
+from scan_payload import scan
+from analyze_block_stats import block_stats
+from payload_io import open_payload
+from qc_common import collect
+
+HERE = os.path.dirname(__file__)
+ANALYSIS_DIR = os.path.dirname(HERE)
+OUT_DEFAULT = os.path.join(ANALYSIS_DIR, "batch")
+
+def payload_key(path: str) -> str:
+    """
+    Schlüssel zum Deduplizieren: 'payload_hash' aus dem Backup (streamend gelesen);
+    fehlt er, sha256 über den Base64-Text des Payloads.
+    """
+    try:
+        found = read_fields(path, ("payload_hash",))
+        if found.get("payload_hash"):
+            return f"payload_hash:{found['payload_hash']}"
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            reader = TopLevelReader(f)
+            for key in reader.keys():
+                if key == "payload":
+                    for piece in reader.iter_string():
+                        sha.update(piece)
+                    return f"b64:{sha.hexdigest()}"
+    except (ValueError, OSError):
+        pass                   # kaputtes/abgeschnittenes JSON → wie ohne Payload behandeln
+    return f"file:{path}"      # kein Payload → nicht deduplizieren, Fehler meldet extract()
+
+def process(job):
+    """Worker: extract → scan → stats für einen (eindeutigen) Payload. Ausgaben landen in _log.txt."""
+    key, path, out_dir, minlen, maxhits = job
+    os.makedirs(out_dir, exist_ok=True)
+    res = {"key": key, "dir": out_dir, "source": path, "status": "ok"}
+    t0 = time.perf_counter()
+    with open(os.path.join(out_dir, "_log.txt"), "w", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+        try:
+            ext = extract(path, out_dir)
+            res.update(size=ext["size"], sha256=ext["sha256"], kind=ext["kind"])
+
+            manifest = scan(ext["raw"], os.path.join(out_dir, "scan"), minlen, maxhits)
+            res["hits"] = {name: len(hits) for name, hits in manifest["hits"].items()}
+
+            with open_payload(ext["raw"]) as payload:
+                stats = block_stats("payload.raw", payload.view)
+            res.update(entropy=stats["entropy"], top10=stats["top10"])
+        except Exception as e:
+            res.update(status="error", error=f"{type(e).__name__}: {e}")
+            print(f"❌ {res['error']}")
+    res["seconds"] = round(time.perf_counter() - t0, 3)
+    return res
+
+def print_result(res, done, total):
+    if res["status"] == "ok":
+        hits = ", ".join(f"{k}={v}" for k, v in res["hits"].items() if v)
+        print(f"  [{done}/{total}] ✅ {os.path.basename(res['source'])} | {res['kind']} | {res['size']} B | "
+              f"H={res['entropy']} | {hits or 'keine Signaturen'} | {res['seconds']} s")
+    else:
+        print(f"  [{done}/{total}] ❌ {os.path.basename(res['source'])} | {res['error']}")
+
+def main():
+    ap = argparse.ArgumentParser(description="Batch: ganze Backup-Ordner extrahieren, scannen und auswerten (parallel).")
+    ap.add_argument("inputs", nargs="+", help="Ordner und/oder Glob-Muster (z.B. 'backups/Local backup *.json')")
+    ap.add_argument("-o", "--out", default=OUT_DEFAULT, help="Ausgabeordner (Default: 01_ngp_analysis/batch)")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Anzahl Worker-Prozesse (1 = seriell)")
+    ap.add_argument("--minlen", type=int, default=6, help="min. Stringlänge (Scan)")
+    ap.add_argument("--maxhits", type=int, default=1000, help="max. Treffer pro Kategorie (Scan)")
+    args = ap.parse_args()
+
+    files = collect(args.inputs)
+    if not files:
+        print("Keine Backups gefunden.")
+        sys.exit(1)
+    os.makedirs(args.out, exist_ok=True)
+    t0 = time.perf_counter()
+
+    pool = Pool(args.jobs) if args.jobs > 1 else None
+    try:
+        # 1) Deduplizieren (liest nur payload_hash bzw. hasht den Base64-Text)
+        keys = pool.imap(payload_key, files, chunksize=8) if pool else map(payload_key, files)
+        groups = {}
+        for path, key in zip(files, keys):
+            groups.setdefault(key, []).append(path)
+        print(f"📦 {len(files)} Backups → {len(groups)} eindeutige Payloads | Worker: {args.jobs}")
+
+        jobs = [(key, paths[0], os.path.join(args.out, hashlib.sha256(key.encode()).hexdigest()[:16]),
+                 args.minlen, args.maxhits) for key, paths in groups.items()]
+
+        # 2) extract → scan → stats je Payload, verteilt auf den Pool
+        results = []
+        for res in (pool.imap_unordered(process, jobs) if pool else map(process, jobs)):
+            results.append(res)
+            print_result(res, len(results), len(jobs))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    for res in results:
+        res["files"] = groups[res["key"]]
+    results.sort(key=lambda r: r["files"][0])
+
+    summary = {
+        "inputs": len(files),
+        "unique_payloads": len(groups),
+        "jobs": args.jobs,
+        "seconds": round(time.perf_counter() - t0, 3),
+        "errors": sum(r["status"] != "ok" for r in results),
+        "payloads": results,
+    }
+    out = os.path.join(args.out, "_batch_summary.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ {len(results)} Payloads in {summary['seconds']} s ({summary['errors']} Fehler) → {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import os, sys, io, json, time, gzip, zlib, zipfile, argparse, platform, subprocess
+import numpy as np
+
+import sigscan
+from payload_io import open_payload
+from scan_payload import ascii_strings, utf16le_strings, find_all
+from qc_common import hexdump
+from brute_decompress_zlib_blocks import try_decompress
+from brute_decompress_zlib_blocks_deep import stream_try_decompress
+from analyze_block_stats import entropy
+from entropy_map import window_entropy
+from cdc import chunks
+from sinks import Limits
+from metrics import peak_rss_mb
+
+HERE = os.path.dirname(__file__)
+ANALYSIS_DIR = os.path.dirname(HERE)
+BENCH_DIR = os.path.join(ANALYSIS_DIR, "bench")
+CORPUS_DIR = os.path.join(BENCH_DIR, "corpus")
+RESULTS = os.path.join(BENCH_DIR, "results.jsonl")
+
+WRITE_CHUNK = 64 * 1024 * 1024
+MEMBER_KINDS = ("gzip", "zlib", "zip", "json", "ascii", "utf16")
+PROBES = 2000            # Zufalls-Offsets für try_decompress / stream_try_decompress / hexdump
+
+# ---------- Korpus ----------
+def parse_size(s: str) -> int:
+    s = s.strip().upper().rstrip("B")
+    mult = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}.get(s[-1:], 1)
+    return int(float(s.rstrip("KMG")) * mult)
+
+def fmt_size(n: int) -> str:
+    for unit, mult in (("G", 1 << 30), ("M", 1 << 20), ("K", 1 << 10)):
+        if n >= mult and n % mult == 0:
+            return f"{n // mult}{unit}"
+    return str(n)
+
+def make_member(kind: str, i: int, rng: np.random.Generator) -> bytes:
+    """Deterministische eingebettete Daten (komprimierbarer JSON-Text wie in echten Presets)."""
+    doc = {"preset": i, "name": f"Bench Preset {i:05d}",
+           "blocks": [{"type": "amp", "gain": int(g), "level": int(l)} for g, l in rng.integers(0, 100, (24, 2))]}
+    text = json.dumps(doc).encode("utf-8")
+    if kind == "gzip":
+        return gzip.compress(text, mtime=0)
+    if kind == "zlib":
+        return zlib.compress(text, 9)
+    if kind == "zip":
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(zipfile.ZipInfo(f"preset_{i}.json", date_time=(2024, 1, 1, 0, 0, 0)), text)
+        return buf.getvalue()
+    if kind == "json":
+        return text
+    if kind == "ascii":
+        return f"Neural DSP Quad Cortex preset string #{i:05d}".encode("ascii")
+    return f"UTF16 preset name #{i:05d}".encode("utf-16-le")
+
+def make_corpus(size: int, members: int, seed: int, out_dir: str = CORPUS_DIR) -> str:
+    """
+    Zufallsdaten (wie Ciphertext) + `members` eingebettete Objekte an festen Positionen.
+    Gleiche (size, members, seed) → identische Datei; Wahrheit liegt in <name>.json daneben.
+    """
+    name = f"corpus_{fmt_size(size)}_m{members}_s{seed}"
+    path = os.path.join(out_dir, name + ".raw")
+    truth_path = os.path.join(out_dir, name + ".json")
+    if os.path.exists(path) and os.path.exists(truth_path) and os.path.getsize(path) == size:
+        return path
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    with open(path, "wb") as f:
+        for start in range(0, size, WRITE_CHUNK):
+            f.write(rng.integers(0, 256, min(WRITE_CHUNK, size - start), dtype=np.uint8).tobytes())
+
+    # je Member ein Slot → keine Überlappungen
+    truth = []
+    slot = size // max(members, 1)
+    with open(path, "r+b") as f:
+        for i in range(members):
+            kind = MEMBER_KINDS[i % len(MEMBER_KINDS)]
+            data = make_member(kind, i, rng)
+            if len(data) >= slot:
+                break
+            off = i * slot + int(rng.integers(0, slot - len(data)))
+            f.seek(off)
+            f.write(data)
+            truth.append({"kind": kind, "offset": off, "size": len(data)})
+    with open(truth_path, "w", encoding="utf-8") as f:
+        json.dump({"size": size, "members": truth, "seed": seed}, f, indent=1)
+    return path
+
+# ---------- Fälle: (data, truth, rng) → (verarbeitete Bytes, Operationen) ----------
+def case_ascii_strings(data, truth, rng):
+    ascii_strings(data, min_len=6)
+    return len(data), 1
+
+def case_utf16le_strings(data, truth, rng):
+    utf16le_strings(data, min_len=6)
+    return len(data), 1
+
+def case_find_all(data, truth, rng):
+    # find_all arbeitet auf bytes/mmap (memoryview hat kein find)
+    find_all(data.obj, b"\x1f\x8b")
+    return len(data), 1
+
+def case_sigscan(data, truth, rng):
+    sigscan.scan(data)
+    return len(data), 1
+
+def _probe_offsets(data, truth, rng, kinds=("zlib",)):
+    offs = [m["offset"] for m in truth if m["kind"] in kinds]
+    offs += rng.integers(0, max(len(data) - 1, 1), PROBES).tolist()
+    return offs
+
+def case_try_decompress(data, truth, rng):
+    offs = _probe_offsets(data, truth, rng)
+    total = 0
+    for off in offs:
+        for wb in (15, -15):
+            sink, _ = try_decompress(data, off, wb, Limits())
+            if sink:
+                total += sink.size
+                sink.discard()
+    return total, len(offs) * 2
+
+def case_stream_try_decompress(data, truth, rng):
+    offs = _probe_offsets(data, truth, rng)
+    consumed = 0
+    for off in offs:
+        for wb in (15, -15):
+            sink, used, _ = stream_try_decompress(data, off, wb, 16, Limits())
+            consumed += used
+            if sink:
+                sink.discard()
+    return consumed, len(offs) * 2
+
+def case_entropy(data, truth, rng):
+    entropy(data)
+    return len(data), 1
+
+def case_window_entropy(data, truth, rng):
+    window_entropy(data)
+    return len(data), 1
+
+def case_cdc_chunks(data, truth, rng):
+    # ersetzt backup_diff.split_blocks (seit dem CDC-Diff gibt es keine festen Blöcke mehr)
+    chunks(data)
+    return len(data), 1
+
+def case_hexdump(data, truth, rng):
+    offs = rng.integers(0, max(len(data) - 256, 1), PROBES).tolist()
+    for off in offs:
+        hexdump(data, off, 256)
+    return len(offs) * 256, len(offs)
+
+CASES = {
+    "ascii_strings": case_ascii_strings,
+    "utf16le_strings": case_utf16le_strings,
+    "find_all": case_find_all,
+    "sigscan": case_sigscan,
+    "try_decompress": case_try_decompress,
+    "stream_try_decompress": case_stream_try_decompress,
+    "entropy": case_entropy,
+    "window_entropy": case_window_entropy,
+    "cdc_chunks": case_cdc_chunks,
+    "hexdump": case_hexdump,
+}
+
+# ---------- Messung ----------
+def run_case(case: str, corpus: str, repeat: int) -> dict:
+    """Läuft im eigenen Prozess → Peak-RSS gehört nur zu diesem Fall."""
+    with open(os.path.splitext(corpus)[0] + ".json", encoding="utf-8") as f:
+        truth = json.load(f)["members"]
+    payload = open_payload(corpus)
+    fn = CASES[case]
+    best, nbytes, ops = None, 0, 0
+    rss_before = peak_rss_mb()
+    for _ in range(repeat):
+        rng = np.random.default_rng(1)
+        t0 = time.perf_counter()
+        nbytes, ops = fn(payload.view, truth, rng)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    size = len(payload)
+    payload.close()
+    return {"case": case, "size": size, "seconds": round(best, 4),
+            "mb_s": round(nbytes / (1 << 20) / best, 2) if best else None,
+            "ops_s": round(ops / best, 1) if best else None,
+            "rss_before_mb": rss_before, "peak_rss_mb": peak_rss_mb()}
+
+def git_rev() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or "?"
+    except Exception:
+        return "?"
+
+def load_results(path: str):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def previous(results, case: str, size: int, run_id: str):
+    for r in reversed(results):
+        if r["case"] == case and r["size"] == size and r["run"] != run_id:
+            return r
+    return None
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark der Analyse-Funktionen auf synthetischen Payloads (MB/s, Peak-RSS).")
+    ap.add_argument("--sizes", default="1M,16M", help="Korpusgrößen, Komma-separiert (z.B. 1M,64M,1G)")
+    ap.add_argument("--cases", default="all", help=f"Fälle (Komma) oder 'all': {','.join(CASES)}")
+    ap.add_argument("--members", type=int, default=64, help="Anzahl eingebetteter Objekte pro Korpus")
+    ap.add_argument("--seed", type=int, default=0x51C, help="Seed für den Korpus")
+    ap.add_argument("--repeat", type=int, default=3, help="Wiederholungen pro Fall (bester Lauf zählt)")
+    ap.add_argument("--corpus-dir", default=CORPUS_DIR, help="Ablage der generierten Korpora")
+    ap.add_argument("--results", default=RESULTS, help="Ergebnisdatei (JSON Lines, wird ergänzt)")
+    ap.add_argument("--run-case", help=argparse.SUPPRESS)   # intern: ein Fall im Kindprozess
+    ap.add_argument("--corpus", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case, args.corpus, args.repeat)))
+        return
+
+    cases = list(CASES) if args.cases == "all" else [c.strip() for c in args.cases.split(",")]
+    unknown = [c for c in cases if c not in CASES]
+    if unknown:
+        raise SystemExit(f"❌ Unbekannte Fälle: {', '.join(unknown)}")
+
+    history = load_results(args.results)
+    run_id = time.strftime("%Y%m%d-%H%M%S")
+    meta = {"run": run_id, "rev": git_rev(), "python": platform.python_version(), "machine": platform.machine()}
+    os.makedirs(os.path.dirname(args.results) or ".", exist_ok=True)
+
+    print(f"⏱️  Benchmark {run_id} @ {meta['rev']} | Python {meta['python']} | repeat={args.repeat}")
+    for size in (parse_size(s) for s in args.sizes.split(",")):
+        corpus = make_corpus(size, args.members, args.seed, args.corpus_dir)
+        print(f"\n📦 Korpus {fmt_size(size)} → {corpus}")
+        print(f"   {'Fall':<22} {'Sek.':>9} {'MB/s':>10} {'Ops/s':>10} {'Peak-RSS':>9}  Δ zur Vorversion")
+        for case in cases:
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--run-case", case,
+                                   "--corpus", corpus, "--repeat", str(args.repeat)],
+                                  capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"   {case:<22} ❌ {proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'Fehler'}")
+                continue
+            res = {**meta, **json.loads(proc.stdout.strip().splitlines()[-1])}
+            prev = previous(history, case, size, run_id)
+            delta = ""
+            if prev and prev.get("seconds") and res["seconds"]:
+                change = prev["seconds"] / res["seconds"] - 1
+                delta = f"{change:+.0%} vs {prev['rev']}" + ("  ⚠️ langsamer" if change < -0.1 else "")
+            rss = f"{res['peak_rss_mb']} MB" if res["peak_rss_mb"] is not None else "?"
+            print(f"   {case:<22} {res['seconds']:>9.4f} {res['mb_s'] or 0:>10.1f} {res['ops_s'] or 0:>10.1f} {rss:>9}  {delta}")
+            with open(args.results, "a", encoding="utf-8") as f:
+                f.write(json.dumps(res) + "\n")
+            history.append(res)
+    print(f"\n✅ Ergebnisse angehängt: {args.results}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import os, json
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+from payload_io import open_payload
+
+MANIFEST_VERSION = 2
+
+def rel(path: str, base_dir: str) -> str:
+    """Pfad relativ zum Manifest-Ordner (mit '/' → portabel zwischen Windows und Linux)."""
+    try:
+        return os.path.relpath(path, base_dir).replace(os.sep, "/")
+    except ValueError:
+        # anderes Laufwerk (Windows) → absolut lassen
+        return path
+
+def write_manifest(path: str, source: dict, blocks: List[dict], **extra):
+    doc = {"version": MANIFEST_VERSION, "source": source, **extra, "blocks": blocks}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, indent=2)
+
+def load_manifest(path: str) -> Tuple[dict, List[dict]]:
+    """
+    Liefert (source, blocks). Alte Manifeste (reine Liste mit absoluten .bin-Pfaden)
+    werden weiterhin gelesen; source ist dann leer.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    if isinstance(doc, list):
+        return {}, doc
+    return doc.get("source", {}), doc.get("blocks", [])
+
+def label(rec: dict) -> str:
+    if rec.get("file"):
+        return os.path.basename(rec["file"].replace("\\", "/"))
+    return f"payload[{rec['offset']}:{rec['end']}]"
+
+class BlockSource:
+    """
+    Öffnet Manifest-Blöcke als memoryview. Mit Quell-Payload: mmap-Slice payload[offset:end]
+    (keine .bin-Dateien nötig); sonst Fallback auf die einzelnen Block-Dateien.
+    """
+
+    def __init__(self, manifest_path: str, payload_path: Optional[str] = None, verify: bool = True):
+        self.manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+        self.source, self.blocks = load_manifest(manifest_path)
+        self.payload = None
+
+        path = payload_path
+        if path is None and self.source.get("path"):
+            path = os.path.join(self.manifest_dir, self.source["path"])
+        if path and os.path.exists(path):
+            self.payload = open_payload(path)
+            self._verify(verify)
+        elif not any(r.get("file") for r in self.blocks):
+            raise FileNotFoundError(f"Quell-Payload für Index-Manifest nicht gefunden: {path}")
+
+    def _verify(self, full: bool):
+        size = self.source.get("size")
+        if size is not None and size != len(self.payload):
+            raise ValueError(f"Payload passt nicht zum Manifest (Größe {len(self.payload)} ≠ {size})")
+        sha = self.source.get("sha256")
+        if full and sha and self.payload.sha256() != sha:
+            raise ValueError("Payload passt nicht zum Manifest (sha256 abweichend)")
+
+    def _file_path(self, rec: dict) -> str:
+        p = rec["file"]
+        if os.path.isabs(p) and os.path.exists(p):
+            return p
+        cand = os.path.join(self.manifest_dir, p)
+        if os.path.exists(cand):
+            return cand
+        # alte Manifeste: absolute Windows-Pfade → Datei neben dem Manifest suchen
+        return os.path.join(self.manifest_dir, os.path.basename(p.replace("\\", "/")))
+
+    @contextmanager
+    def open(self, rec: dict):
+        """with src.open(rec) as blob: … → memoryview des Blocks (Zero-Copy)."""
+        if self.payload is not None:
+            view = self.payload.slice(rec["offset"], rec["end"])
+            try:
+                yield view
+            finally:
+                view.release()
+        else:
+            with open_payload(self._file_path(rec)) as blk:
+                yield blk.view
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.payload is not None:
+            self.payload.close()
+            self.payload = None
@@ -1,4 +1,12 @@
-import os, json, argparse, hashlib, zlib, io, zipfile
+import os, json, argparse
+
+from block_manifest import BlockSource, rel
+from deflate_check import Prefilter
+from attempt_cache import AttemptCache, NullCache
+from cas import ObjectStore, STORE_DEFAULT
+from qc_common import ensure_dir
+from sinks import Sink, SPILL_BYTES, Limits, inflate, save_result, add_limit_args, limits_from_args
+from metrics import Metrics, add_profile_arg, profiled
 
 # Pfade (relativ zur Skript-Position)
 HERE = os.path.dirname(__file__)
@@ -6,76 +14,25 @@ ANALYSIS_DIR = os.path.dirname(HERE)
 RAW_DIR = os.path.join(ANALYSIS_DIR, "members_zlib_raw")
 OUT_DIR = os.path.join(ANALYSIS_DIR, "members_attempts")
 MANIFEST = os.path.join(RAW_DIR, "_manifest_zlib_raw.json")
-
-MAX_OUTPUT_BYTES = 50_000_000  # 50 MB Schutzlimit
-
-def sha16(b: bytes) -> str:
-    return hashlib.sha256(b).hexdigest()[:16]
-
-def detect_kind(b: bytes) -> str:
-    if b.startswith(b"PK\x03\x04"): return "zip"
-    if b.startswith(b"\x1f\x8b\x08"): return "gzip"
-    h = b.lstrip()[:1]
-    if h in (b"{", b"["):
-        try:
-            json.loads(b.decode("utf-8"))
-            return "json"
-        except Exception:
-            return "text_like"
-    return "bin"
-
-def ensure_dir(p): os.makedirs(p, exist_ok=True)
-
-def save_result(base, data: bytes, note: str):
-    kind = detect_kind(data)
-    if kind == "zip":
-        path = base + ".zip"
-        with open(path, "wb") as f: f.write(data)
-        # optional: entpacken
-        zdir = base + "_zip"
-        ensure_dir(zdir)
-        try:
-            with zipfile.ZipFile(io.BytesIO(data)) as zf:
-                zf.extractall(zdir)
-        except Exception as e:
-            with open(base + "_zip_error.txt", "w", encoding="utf-8") as f:
-                f.write(str(e))
-        return path, kind
-
-    if kind in ("json", "text_like"):
-        # JSON hübsch, sonst Text
-        try:
-            obj = json.loads(data.decode("utf-8"))
-            path = base + ".json"
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(obj, f, ensure_ascii=False, indent=2)
-            return path, "json"
-        except Exception:
-            path = base + ".txt"
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(data.decode("utf-8", "replace"))
-            return path, "text"
-
-    # default BIN
-    path = base + ".bin"
-    with open(path, "wb") as f: f.write(data)
-    return path, "bin"
-
-def try_decompress(data: bytes, offset: int, wbits: int):
-    # Nutze decompressobj, damit wir bei korrupten Enden nicht crashen
+CACHE_NAME = "_attempts.sqlite"
+CACHE_MIN_BYTES = 1  # Treffer = jede nicht-leere Ausgabe (Cache-Schlüssel wie im Deep-Skript)
+
+def try_decompress(data, offset: int, wbits: int, limits: Limits, spill_dir: str = None,
+                   spill_bytes: int = SPILL_BYTES):
+    """
+    Ein Versuch in eine Senke → (Sink | None, status). None bei Fehler oder leerer Ausgabe;
+    bricht ein Limit den Stream ab, bleibt die Teilausgabe ein Treffer (status max_output/ratio).
+    """
+    sink = Sink(spill_dir, spill_bytes)
     try:
-        decomp = zlib.decompressobj(wbits)
-        out = decomp.decompress(data[offset:], MAX_OUTPUT_BYTES)
-        out += decomp.flush()
-        if len(out) == 0:
-            return None
-        return out
-    except Exception:
-        return None
-
-def load_manifest():
-    with open(MANIFEST, "r", encoding="utf-8") as f:
-        return json.load(f)
+        _, status = inflate(data, offset, wbits, sink, limits)
+    except ValueError:      # ungültige wbits
+        sink.discard()
+        return None, "error"
+    if status == "error" or not sink.size:
+        sink.discard()
+        return None, status
+    return sink, status
 
 def pick_blocks(manifest, top=None, indices=None):
     if indices:
@@ -85,17 +42,43 @@ def pick_blocks(manifest, top=None, indices=None):
     sorted_ = sorted(manifest, key=lambda r: r["size"], reverse=True)
     return sorted_[:top] if top else sorted_
 
-def main():
+def write_hits(base_dir: str, hits, metrics: dict):
+    """_hits.json eines Blocks: Treffer + Messwerte dieses Blocks (wird bei jedem Lauf geschrieben)."""
+    with open(os.path.join(base_dir, "_hits.json"), "w", encoding="utf-8") as f:
+        json.dump({"hits": hits, "metrics": metrics}, f, ensure_ascii=False, indent=2)
+
+def write_run_hits(out_dir: str, blocks, metrics: dict):
+    """<out>/_hits.json: Überblick aller Blöcke des Laufs + Gesamt-Messwerte."""
+    with open(os.path.join(out_dir, "_hits.json"), "w", encoding="utf-8") as f:
+        json.dump({"blocks": blocks, "metrics": metrics}, f, ensure_ascii=False, indent=2)
+
+def main(argv=None):
     ap = argparse.ArgumentParser(description="Brute-force ZLIB Dekompression auf raw Blocks")
     ap.add_argument("--top", type=int, default=3, help="Größte N Blöcke testen (Default: 3)")
     ap.add_argument("--indices", type=str, help="Konkrete Block-Indizes, Komma-separiert (z.B. 45,36)")
     ap.add_argument("--max-offset", type=int, default=128, help="Offset-Scan (Bytes) ab 0..max-offset")
     ap.add_argument("--wbits", type=str, default="15,-15,31,47",
                     help="wbits-Kombinationen (Komma): 15(zlib),-15(raw),31(gzip),47(auto)")
-    args = ap.parse_args()
-
-    ensure_dir(OUT_DIR)
-    manifest = load_manifest()
+    ap.add_argument("--no-prefilter", action="store_true", help="DEFLATE-Header-Vorprüfung abschalten")
+    ap.add_argument("--cache", type=str, help=f"Versuchs-Cache (SQLite, Default: <out>/{CACHE_NAME})")
+    ap.add_argument("--no-cache", action="store_true", help="Keinen Versuchs-Cache verwenden")
+    ap.add_argument("-o", "--out", default=OUT_DIR, help="Ausgabeordner (Default: 01_ngp_analysis/members_attempts)")
+    ap.add_argument("--manifest", default=MANIFEST, help="Block-Manifest (_manifest_zlib_raw.json)")
+    ap.add_argument("--payload", help="payload.raw für Index-Manifeste (Default: Pfad aus dem Manifest)")
+    ap.add_argument("--store", default=STORE_DEFAULT, help="Objekt-Store für Treffer (Default: 01_ngp_analysis/objects)")
+    ap.add_argument("--no-links", action="store_true", help="Keine Hardlinks im Block-Ordner, nur Verweise auf den Store")
+    add_limit_args(ap)
+    add_profile_arg(ap)
+    args = ap.parse_args(argv)
+
+    with profiled(args.profile, os.path.join(args.out, "_profile.prof")):
+        run(args)
+
+def run(args):
+    ensure_dir(args.out)
+    metrics = Metrics()
+    src = BlockSource(args.manifest, args.payload)
+    manifest = src.blocks
     indices = None
     if args.indices:
         indices = [int(x.strip()) for x in args.indices.split(",") if x.strip().isdigit()]
@@ -104,38 +87,84 @@ def main():
     print(f"📦 Zu testen: {len(targets)} Blöcke | wbits={args.wbits} | max_offset={args.max_offset}")
 
     wbits_list = [int(x.strip()) for x in args.wbits.split(",")]
+    prefilter = Prefilter(enabled=not args.no_prefilter)
+    cache = NullCache() if args.no_cache else AttemptCache(args.cache or os.path.join(args.out, CACHE_NAME))
+    store = ObjectStore(args.store, link=not args.no_links)
+    limits, spill_bytes = limits_from_args(args)
 
+    blocks = []
     for rec in targets:
+        bm = Metrics()
         idx = rec["index"]
-        fpath = rec["file"]
         size = rec["size"]
-        base_dir = os.path.join(OUT_DIR, f"idx_{idx}_off_{rec['offset']}_size_{size}")
+        base_dir = os.path.join(args.out, f"idx_{idx}_off_{rec['offset']}_size_{size}")
         ensure_dir(base_dir)
         print(f"\n—— Block idx={idx}  off={rec['offset']}  size={size}  sha={rec['sha256_16']} ——")
 
-        with open(fpath, "rb") as f:
-            blob = f.read()
-
+        known = cache.lookup(rec["sha256_16"], CACHE_MIN_BYTES, limits.key())
         hits = []
-        for off in range(0, min(args.max_offset, len(blob))):
-            for wb in wbits_list:
-                out = try_decompress(blob, off, wb)
-                if out:
-                    tag = f"ok_off_{off}_w{wb}_{sha16(out)}"
-                    base = os.path.join(base_dir, tag)
-                    path, kind = save_result(base, out, note=f"offset={off},wbits={wb}")
-                    hits.append((off, wb, kind, len(out), os.path.basename(path)))
-                    print(f"  ✅ Treffer: off={off:3d}  wbits={wb:3d}  kind={kind:<5}  len={len(out):8d}  → {os.path.basename(path)}")
+        with src.open(rec) as blob:  # mmap-Slice der Payload bzw. Block-Datei, Zero-Copy
+            for off in range(0, min(args.max_offset, len(blob))):
+                for wb in wbits_list:
+                    r = known.get((off, wb))
+                    if r and (not r["ok"] or os.path.exists(os.path.join(base_dir, r["file"] or ""))):
+                        bm.count("cached")
+                        if r["ok"]:
+                            hits.append((off, wb, r["kind"], r["length"], r["file"], r["limit"]))
+                            if r["limit"]:
+                                bm.count("limited")
+                            note = f"  ⚠️ abgebrochen ({r['limit']})" if r["limit"] else ""
+                            print(f"  ♻️  Treffer: off={off:3d}  wbits={wb:3d}  kind={r['kind']:<5}  len={r['length']:8d}  → {r['file']} (Cache){note}")
+                        continue
+                    if not prefilter.check(blob, off, wb):
+                        bm.count("prefiltered")
+                        continue
+                    sink, status = try_decompress(blob, off, wb, limits, store.tmp_dir(), spill_bytes)
+                    bm.count("attempts")
+                    if sink:
+                        bm.count("bytes_out", sink.size)
+                        if sink.spilled:
+                            bm.count("spilled")
+                        out_sha = sink.sha256[:16]
+                        base = os.path.join(base_dir, f"ok_off_{off}_w{wb}_{out_sha}")
+                        length = sink.size
+                        path, kind = save_result(store, base, sink)
+                        ref = rel(path, base_dir)
+                        limit = status if status in ("max_output", "ratio") else None
+                        if limit:
+                            bm.count("limited")
+                        hits.append((off, wb, kind, length, ref, limit))
+                        note = f"  ⚠️ abgebrochen ({limit})" if limit else ""
+                        print(f"  ✅ Treffer: off={off:3d}  wbits={wb:3d}  kind={kind:<5}  len={length:8d}  → {ref}{note}")
+                        cache.record(rec["sha256_16"], off, wb, CACHE_MIN_BYTES, True, None, length,
+                                     out_sha, kind, ref, limit, limits.key())
+                    else:
+                        # durch ein Limit abgebrochen: nur unter denselben Limits endgültig
+                        limit = status if status in ("max_output", "ratio") else None
+                        cache.record(rec["sha256_16"], off, wb, CACHE_MIN_BYTES, False,
+                                     limit=limit, limits=limits.key())
+        cache.flush()
 
         if not hits:
             print("  ❌ keine gültige Dekompression in diesem Scanbereich gefunden.")
-        else:
-            # kleine Zusammenfassung speichern
-            with open(os.path.join(base_dir, "_hits.json"), "w", encoding="utf-8") as f:
-                json.dump([
-                    {"offset": off, "wbits": wb, "kind": kind, "length": ln, "file": fn}
-                    for (off, wb, kind, ln, fn) in hits
-                ], f, ensure_ascii=False, indent=2)
+        bm.count("bytes_in", size)
+        bm.count("hits", len(hits))
+        for k, v in bm.counters.items():
+            metrics.count(k, v)
+        # kleine Zusammenfassung + Messwerte speichern
+        write_hits(base_dir, [
+            {"offset": off, "wbits": wb, "kind": kind, "length": ln, "file": fn, **({"limit": lim} if lim else {})}
+            for (off, wb, kind, ln, fn, lim) in hits
+        ], bm.as_dict())
+        blocks.append({"index": idx, "dir": os.path.basename(base_dir), "hits": len(hits)})
+
+    cache.close()
+    src.close()
+    write_run_hits(args.out, blocks, metrics.as_dict())
+    print(f"\n⏱️  {metrics.summary()}")
+    print(f"\n🗃️  Store: {store.summary()}")
+    if prefilter.enabled:
+        print(f"\n🧹 Prefilter: {prefilter.summary()}")
 
 if __name__ == "__main__":
     main()
@@ -1,96 +1,41 @@
-import os, json, argparse, hashlib, zlib, io, zipfile
+import os, argparse
+from multiprocessing import Pool, shared_memory
+
+from block_manifest import BlockSource, label, rel
+from deflate_check import Prefilter
+from attempt_cache import AttemptCache, NullCache
+from cas import ObjectStore, STORE_DEFAULT
+from qc_common import ensure_dir
+from sinks import Sink, SPILL_BYTES, Limits, inflate, save_result, add_limit_args, limits_from_args
+from metrics import Metrics, add_profile_arg, profiled
+from brute_decompress_zlib_blocks import write_hits, write_run_hits
 
 HERE = os.path.dirname(__file__)
 ANALYSIS_DIR = os.path.dirname(HERE)
 RAW_DIR = os.path.join(ANALYSIS_DIR, "members_zlib_raw")
 OUT_DIR = os.path.join(ANALYSIS_DIR, "members_attempts_deep")
+CACHE_NAME = "_attempts.sqlite"
 MANIFEST = os.path.join(RAW_DIR, "_manifest_zlib_raw.json")
 
-MAX_OUTPUT_BYTES = 50_000_000  # 50 MB Schutzlimit
-
-def sha16(b: bytes) -> str:
-    return hashlib.sha256(b).hexdigest()[:16]
-
-def detect_kind(b: bytes) -> str:
-    if b.startswith(b"PK\x03\x04"): return "zip"
-    if b.startswith(b"\x1f\x8b\x08"): return "gzip"
-    h = b.lstrip()[:1]
-    if h in (b"{", b"["):
-        try:
-            json.loads(b.decode("utf-8"))
-            return "json"
-        except Exception:
-            return "text_like"
-    return "bin"
-
-def ensure_dir(p): os.makedirs(p, exist_ok=True)
-
-def save_result(base, data: bytes):
-    kind = detect_kind(data)
-    if kind == "zip":
-        path = base + ".zip"
-        with open(path, "wb") as f: f.write(data)
-        # optional: auspacken
-        zdir = base + "_zip"
-        ensure_dir(zdir)
-        try:
-            with zipfile.ZipFile(io.BytesIO(data)) as zf:
-                zf.extractall(zdir)
-        except Exception as e:
-            with open(base + "_zip_error.txt", "w", encoding="utf-8") as f:
-                f.write(str(e))
-        return path, kind
-
-    if kind in ("json", "text_like"):
-        try:
-            obj = json.loads(data.decode("utf-8"))
-            path = base + ".json"
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(obj, f, ensure_ascii=False, indent=2)
-            return path, "json"
-        except Exception:
-            path = base + ".txt"
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(data.decode("utf-8", "replace"))
-            return path, "text"
-
-    path = base + ".bin"
-    with open(path, "wb") as f: f.write(data)
-    return path, "bin"
-
-def stream_try_decompress(data: bytes, offset: int, wbits: int, min_bytes:int, chunk:int=4096):
+TASK_OFFSETS = 8               # Offsets pro Pool-Task (× alle wbits)
+STREAM_CHUNK = 4096
+
+def stream_try_decompress(data, offset: int, wbits: int, min_bytes: int, limits: Limits,
+                          spill_dir: str = None, spill_bytes: int = SPILL_BYTES):
     """
-    Versucht streaming-basiert zu dekomprimieren (robuster als one-shot).
-    Gibt (out_bytes | None, consumed_bytes) zurück.
+    Streaming-Versuch (robuster als one-shot): in STREAM_CHUNK-Stücken füttern, bei einem Fehler die
+    Teilausgabe behalten. → (Sink | None, consumed, status); None, wenn weniger als min_bytes herauskommen.
     """
+    sink = Sink(spill_dir, spill_bytes)
     try:
-        d = zlib.decompressobj(wbits)
-        out = bytearray()
-        pos = offset
-        # in Stücken füttern, bis Fehler kommt oder Ende erreicht
-        while pos < len(data) and len(out) < MAX_OUTPUT_BYTES:
-            nxt = min(pos + chunk, len(data))
-            piece = data[pos:nxt]
-            if not piece:
-                break
-            try:
-                out.extend(d.decompress(piece, MAX_OUTPUT_BYTES - len(out)))
-                pos = nxt
-                # wenn der Stream sauber endet:
-                if d.unused_data:
-                    break
-            except zlib.error:
-                # Stream ist kaputt/endet hier → abbrechen, Partial-Out behalten
-                break
-        if len(out) >= min_bytes:
-            return bytes(out), (pos - offset)
-        return None, 0
-    except Exception:
-        return None, 0
-
-def load_manifest():
-    with open(MANIFEST, "r", encoding="utf-8") as f:
-        return json.load(f)
+        consumed, status = inflate(data, offset, wbits, sink, limits, chunk=STREAM_CHUNK, keep_partial=True)
+    except ValueError:      # ungültige wbits
+        sink.discard()
+        return None, 0, "error"
+    if sink.size >= min_bytes and sink.size:
+        return sink, consumed, status
+    sink.discard()
+    return None, consumed, status
 
 def pick_blocks(manifest, top=None, indices=None):
     if indices:
@@ -99,7 +44,75 @@ def pick_blocks(manifest, top=None, indices=None):
     sorted_ = sorted(manifest, key=lambda r: r["size"], reverse=True)
     return sorted_[:top] if top else sorted_
 
-def main():
+def scan_points(blob, points, min_bytes, prefilter, sink_args):
+    """
+    Testet die (offset, wbits)-Punkte eines Blocks und liefert (offset, wbits, Sink|None, consumed, status)
+    für jeden Punkt, den zlib tatsächlich versucht hat (vom Prefilter verworfene fehlen).
+    sink_args = (Limits, spill_dir, spill_bytes).
+    """
+    for o, wb in points:
+        if not prefilter.check(blob, o, wb):
+            continue
+        yield (o, wb, *stream_try_decompress(blob, o, wb, min_bytes, *sink_args))
+
+def grid_points(size, max_offset, step, wbits_list):
+    return [(o, wb) for o in range(0, min(max_offset, size), step) for wb in wbits_list]
+
+def iter_results_serial(src, plans, min_bytes, prefilter, sink_args):
+    for bi, (rec, points) in enumerate(plans):
+        if not points:
+            continue
+        with src.open(rec) as blob:  # mmap-Slice → data[offset:] ist ein Zero-Copy-Slice
+            for res in scan_points(blob, points, min_bytes, prefilter, sink_args):
+                yield bi, res
+
+# ---- Parallel-Modus: alle Blöcke einmal in Shared Memory, ein Pool arbeitet das Grid ab
+_SHARED = None
+
+def _attach_shared(name):
+    global _SHARED
+    _SHARED = shared_memory.SharedMemory(name=name)
+
+def _grid_task(task):
+    start, length, points, min_bytes, use_prefilter, sink_args = task
+    blob = _SHARED.buf[start:start + length]
+    prefilter = Prefilter(enabled=use_prefilter)
+    try:
+        # große Ausgaben liegen schon als Temp-Datei im Store → zurück kommen nur kleine Senken
+        results = list(scan_points(blob, points, min_bytes, prefilter, sink_args))
+        return results, (prefilter.checked, prefilter.rejected, dict(prefilter.reasons))
+    finally:
+        blob.release()
+
+def iter_results_parallel(src, plans, min_bytes, prefilter, sink_args, jobs, task_points):
+    """
+    Kleine Tasks (task_points Grid-Punkte) aus einer gemeinsamen Queue:
+    freie Worker holen sich den nächsten Task (dynamische Lastverteilung).
+    imap liefert die Ergebnisse in Task-Reihenfolge → deterministische Ausgabe.
+    """
+    plans = [(bi, rec, points) for bi, (rec, points) in enumerate(plans) if points]
+    sizes = [rec["end"] - rec["offset"] for _, rec, _ in plans]
+    shm = shared_memory.SharedMemory(create=True, size=max(sum(sizes), 1))
+    try:
+        tasks, start = [], 0
+        for (bi, rec, points), size in zip(plans, sizes):
+            with src.open(rec) as blob:
+                shm.buf[start:start + size] = blob
+            for k in range(0, len(points), task_points):
+                tasks.append((bi, (start, size, points[k:k + task_points], min_bytes, prefilter.enabled, sink_args)))
+            start += size
+
+        with Pool(jobs, initializer=_attach_shared, initargs=(shm.name,)) as pool:
+            results = pool.imap(_grid_task, [t for _, t in tasks], chunksize=1)
+            for (bi, _), (block_results, stats) in zip(tasks, results):
+                prefilter.merge(*stats)
+                for res in block_results:
+                    yield bi, res
+    finally:
+        shm.close()
+        shm.unlink()
+
+def main(argv=None):
     ap = argparse.ArgumentParser(description="Deep brute-force zlib-like streams in raw blocks (offset + wbits + streaming).")
     ap.add_argument("--top", type=int, default=3, help="Größte N Blöcke testen (Default: 3)")
     ap.add_argument("--indices", type=str, help="Konkrete Block-Indizes, Komma-separiert (z.B. 45,36,188)")
@@ -108,10 +121,27 @@ def main():
     ap.add_argument("--min-bytes", type=int, default=512, help="Minimale Ausgabegröße, um als Treffer zu zählen")
     ap.add_argument("--wbits", type=str, default="-15,-14,-13,-12,-11,-10,-9,-8,8,9,10,11,12,13,14,15,31,47",
                     help="wbits-Kandidaten (Komma, inkl. raw/auto/gzip)")
-    args = ap.parse_args()
+    ap.add_argument("--jobs", type=int, default=1, help="Worker-Prozesse (1 = seriell, 0 = alle Kerne)")
+    ap.add_argument("--no-prefilter", action="store_true", help="DEFLATE-Header-Vorprüfung abschalten")
+    ap.add_argument("--cache", type=str, help=f"Versuchs-Cache (SQLite, Default: <out>/{CACHE_NAME})")
+    ap.add_argument("--no-cache", action="store_true", help="Keinen Versuchs-Cache verwenden")
+    ap.add_argument("-o", "--out", default=OUT_DIR, help="Ausgabeordner (Default: 01_ngp_analysis/members_attempts_deep)")
+    ap.add_argument("--manifest", default=MANIFEST, help="Block-Manifest (_manifest_zlib_raw.json)")
+    ap.add_argument("--payload", help="payload.raw für Index-Manifeste (Default: Pfad aus dem Manifest)")
+    ap.add_argument("--store", default=STORE_DEFAULT, help="Objekt-Store für Treffer (Default: 01_ngp_analysis/objects)")
+    ap.add_argument("--no-links", action="store_true", help="Keine Hardlinks im Block-Ordner, nur Verweise auf den Store")
+    add_limit_args(ap)
+    add_profile_arg(ap)
+    args = ap.parse_args(argv)
 
-    ensure_dir(OUT_DIR)
-    manifest = load_manifest()
+    with profiled(args.profile, os.path.join(args.out, "_profile.prof")):
+        run(args)
+
+def run(args):
+    ensure_dir(args.out)
+    metrics = Metrics()
+    src = BlockSource(args.manifest, args.payload)
+    manifest = src.blocks
     indices = None
     if args.indices:
         indices = [int(x.strip()) for x in args.indices.split(",") if x.strip().isdigit()]
@@ -120,34 +150,111 @@ def main():
     print(f"🎯 Targets: {len(targets)} | wbits={args.wbits} | max_offset={args.max_offset} | step={args.step} | min_bytes={args.min_bytes}")
 
     wbits_list = [int(x.strip()) for x in args.wbits.split(",")]
+    wb_rank = {wb: i for i, wb in enumerate(wbits_list)}
+    cache = NullCache() if args.no_cache else AttemptCache(args.cache or os.path.join(args.out, CACHE_NAME))
+    store = ObjectStore(args.store, link=not args.no_links)
 
+    # Pro Block: bekannte Versuche aus dem Cache + noch offene Grid-Punkte
+    plans, known = [], []
+    limits, spill_bytes = limits_from_args(args)
     for rec in targets:
-        idx, size, off = rec["index"], rec["size"], rec["offset"]
-        base_dir = os.path.join(OUT_DIR, f"idx_{idx}_off_{off}_size_{size}")
-        ensure_dir(base_dir)
-        print(f"\n—— Block idx={idx} | file={os.path.basename(rec['file'])} | size={size} ——")
-
-        with open(rec["file"], "rb") as f:
-            blob = f.read()
-
-        hits = []
-        for o in range(0, min(args.max_offset, len(blob)), args.step):
-            for wb in wbits_list:
-                out, consumed = stream_try_decompress(blob, o, wb, min_bytes=args.min_bytes)
-                if out:
-                    tag = f"ok_off_{o}_w{wb}_{sha16(out)}"
-                    base = os.path.join(base_dir, tag)
-                    path, kind = save_result(base, out)
-                    hits.append({"offset": o, "wbits": wb, "kind": kind,
-                                 "length": len(out), "consumed": consumed,
-                                 "file": os.path.basename(path)})
-                    print(f"  ✅ off={o:4d} wbits={wb:3d} kind={kind:<5} len={len(out):8d} → {os.path.basename(path)}")
-
-        if not hits:
-            print("  ❌ keine Treffer in diesem Bereich.")
-        else:
-            with open(os.path.join(base_dir, "_hits.json"), "w", encoding="utf-8") as f:
-                json.dump(hits, f, ensure_ascii=False, indent=2)
+        base_dir = os.path.join(args.out, f"idx_{rec['index']}_off_{rec['offset']}_size_{rec['size']}")
+        # abgebrochene Treffer unter anderen Limits fehlen hier → werden neu versucht
+        cached = cache.lookup(rec["sha256_16"], args.min_bytes, limits.key())
+        # Treffer nur übernehmen, wenn die Ergebnisdatei noch da ist
+        cached = {pt: r for pt, r in cached.items()
+                  if not r["ok"] or os.path.exists(os.path.join(base_dir, r["file"] or ""))}
+        grid = grid_points(rec["size"], args.max_offset, args.step, wbits_list)
+        plans.append((rec, [pt for pt in grid if pt not in cached]))
+        known.append({pt: cached[pt] for pt in grid if pt in cached})
+    todo = sum(len(p) for _, p in plans)
+    print(f"♻️  Cache: {sum(len(k) for k in known)} bekannte Versuche, {todo} Grid-Punkte offen (vor Prefilter)")
+
+    prefilter = Prefilter(enabled=not args.no_prefilter)
+    sink_args = (limits, store.tmp_dir(), spill_bytes)
+    jobs = args.jobs or os.cpu_count() or 1
+    if jobs > 1:
+        print(f"⚙️  Parallel: {jobs} Worker")
+        results = iter_results_parallel(src, plans, args.min_bytes, prefilter, sink_args, jobs,
+                                        TASK_OFFSETS * len(wbits_list))
+    else:
+        results = iter_results_serial(src, plans, args.min_bytes, prefilter, sink_args)
+
+    blocks = []
+    try:
+        pending = next(results, None)
+        for bi, (rec, _) in enumerate(plans):
+            bm = Metrics()
+            idx, size, off, block_sha = rec["index"], rec["size"], rec["offset"], rec["sha256_16"]
+            base_dir = os.path.join(args.out, f"idx_{idx}_off_{off}_size_{size}")
+            ensure_dir(base_dir)
+            print(f"\n—— Block idx={idx} | file={label(rec)} | size={size} ——")
+
+            hits = []
+            bm.count("cached", len(known[bi]))
+            for (o, wb), r in sorted(known[bi].items()):
+                if r["ok"]:
+                    hit = {"offset": o, "wbits": wb, "kind": r["kind"],
+                           "length": r["length"], "consumed": r["consumed"], "file": r["file"]}
+                    note = ""
+                    if r["limit"]:
+                        hit["limit"] = r["limit"]
+                        bm.count("limited")
+                        note = f"  ⚠️ abgebrochen ({r['limit']})"
+                    hits.append(hit)
+                    print(f"  ♻️  off={o:4d} wbits={wb:3d} kind={r['kind']:<5} len={r['length']:8d} → {r['file']} (Cache){note}")
+
+            while pending is not None and pending[0] == bi:
+                o, wb, sink, consumed, status = pending[1]
+                bm.count("attempts")
+                bm.count("bytes_consumed", consumed)
+                if sink:
+                    bm.count("bytes_out", sink.size)
+                    if sink.spilled:
+                        bm.count("spilled")
+                    out_sha = sink.sha256[:16]
+                    length = sink.size
+                    base = os.path.join(base_dir, f"ok_off_{o}_w{wb}_{out_sha}")
+                    path, kind = save_result(store, base, sink)
+                    ref = rel(path, base_dir)
+                    hit = {"offset": o, "wbits": wb, "kind": kind, "length": length, "consumed": consumed, "file": ref}
+                    note = ""
+                    if status in ("max_output", "ratio"):
+                        hit["limit"] = status
+                        bm.count("limited")
+                        note = f"  ⚠️ abgebrochen ({status})"
+                    hits.append(hit)
+                    print(f"  ✅ off={o:4d} wbits={wb:3d} kind={kind:<5} len={length:8d} → {ref}{note}")
+                    cache.record(block_sha, o, wb, args.min_bytes, True, consumed, length,
+                                 out_sha, kind, ref, hit.get("limit"), limits.key())
+                else:
+                    # Abbruch vor --min-bytes: nur unter denselben Limits endgültig
+                    limit = status if status in ("max_output", "ratio") else None
+                    cache.record(block_sha, o, wb, args.min_bytes, False, consumed,
+                                 limit=limit, limits=limits.key())
+                pending = next(results, None)
+            cache.flush()
+
+            if not hits:
+                print("  ❌ keine Treffer in diesem Bereich.")
+            hits.sort(key=lambda h: (h["offset"], wb_rank[h["wbits"]]))
+            bm.count("bytes_in", size)
+            bm.count("hits", len(hits))
+            for k, v in bm.counters.items():
+                metrics.count(k, v)
+            write_hits(base_dir, hits, bm.as_dict())
+            blocks.append({"index": idx, "dir": os.path.basename(base_dir), "hits": len(hits)})
+    finally:
+        cache.close()
+        src.close()
+
+    metrics.count("prefiltered", prefilter.rejected)
+    write_run_hits(args.out, blocks, {**metrics.as_dict(), "jobs": jobs})
+    print(f"\n⏱️  {metrics.summary()}")
+
+    print(f"\n🗃️  Store: {store.summary()}")
+    if prefilter.enabled:
+        print(f"\n🧹 Prefilter: {prefilter.summary()}")
 
 if __name__ == "__main__":
     main()
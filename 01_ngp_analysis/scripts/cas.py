@@ -0,0 +1,108 @@
+import os, shutil, hashlib
+from typing import Tuple
+
+HERE = os.path.dirname(__file__)
+ANALYSIS_DIR = os.path.dirname(HERE)
+STORE_DEFAULT = os.path.join(ANALYSIS_DIR, "objects")
+
+def link_or_copy(src: str, dest: str) -> str:
+    """dest als Hardlink auf src anlegen (Fallback: Kopie). Existiert er schon, passiert nichts."""
+    if os.path.exists(dest) and os.path.samefile(src, dest):
+        return "exists"
+    os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+    tmp = f"{dest}.tmp{os.getpid()}"
+    try:
+        os.link(src, tmp)
+        how = "hardlink"
+    except OSError:
+        # anderes Dateisystem / keine Hardlinks (z.B. FAT, manche Netzlaufwerke)
+        shutil.copyfile(src, tmp)
+        how = "copy"
+    os.replace(tmp, dest)
+    return how
+
+class ObjectStore:
+    """
+    Content-addressed Ablage: jeder Inhalt liegt genau einmal unter <root>/<sha[:2]>/<sha256>.
+    Ergebnisdateien sind Hardlinks auf das Objekt (link=True) oder nur Verweise im Manifest (link=False).
+    """
+
+    def __init__(self, root: str = STORE_DEFAULT, link: bool = True):
+        self.root = root
+        self.link = link
+        self.written = 0
+        self.reused = 0
+
+    def path(self, sha: str) -> str:
+        return os.path.join(self.root, sha[:2], sha)
+
+    def put(self, data) -> str:
+        """Inhalt ablegen (falls noch nicht vorhanden) → sha256."""
+        sha = hashlib.sha256(data).hexdigest()
+        p = self.path(sha)
+        if os.path.exists(p):
+            self.reused += 1
+            return sha
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        tmp = f"{p}.tmp{os.getpid()}"      # parallele Prozesse: erst komplett schreiben, dann umbenennen
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, p)
+        self.written += 1
+        return sha
+
+    def put_file(self, src: str, sha: str) -> str:
+        """Fertige Datei mit bekanntem sha256 übernehmen (umbenennen, z.B. Temp-Datei einer Senke im Store-Ordner)."""
+        p = self.path(sha)
+        if os.path.exists(p):
+            os.remove(src)
+            self.reused += 1
+            return sha
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        try:
+            os.replace(src, p)
+        except OSError:
+            # anderes Dateisystem → kopieren
+            shutil.copyfile(src, f"{p}.tmp{os.getpid()}")
+            os.replace(f"{p}.tmp{os.getpid()}", p)
+            os.remove(src)
+        self.written += 1
+        return sha
+
+    def tmp_dir(self) -> str:
+        """Ordner für Temp-Dateien auf demselben Dateisystem wie die Objekte."""
+        return os.path.join(self.root, "tmp")
+
+    def link_to(self, sha: str, dest: str) -> str:
+        """Objekt unter dest verfügbar machen → Pfad für das Manifest (dest bzw. das Objekt ohne Links)."""
+        if not self.link:
+            return self.path(sha)
+        link_or_copy(self.path(sha), dest)
+        return dest
+
+    def place(self, data, dest: str) -> Tuple[str, str]:
+        """
+        Inhalt ablegen und unter dest verfügbar machen.
+        Rückgabe: (sha256, Pfad für das Manifest) – dest bzw. direkt das Objekt ohne Links.
+        """
+        sha = self.put(data)
+        return sha, self.link_to(sha, dest)
+
+    def unpack_zip(self, sha: str) -> str:
+        """ZIP-Objekt einmalig nach <objekt>_zip entpacken; Fehler landen in <objekt>_zip_error.txt."""
+        import zipfile
+        zdir = self.path(sha) + "_zip"
+        err = zdir + "_error.txt"
+        if not os.path.isdir(zdir) and not os.path.exists(err):
+            try:
+                with zipfile.ZipFile(self.path(sha)) as zf:
+                    zf.extractall(zdir + ".tmp")
+                os.replace(zdir + ".tmp", zdir)
+            except Exception as e:
+                shutil.rmtree(zdir + ".tmp", ignore_errors=True)
+                with open(err, "w", encoding="utf-8") as f:
+                    f.write(str(e))
+        return zdir
+
+    def summary(self) -> str:
+        return f"{self.written} neue Objekte, {self.reused} bereits vorhanden → {self.root}"
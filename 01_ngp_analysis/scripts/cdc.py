@@ -0,0 +1,77 @@
+import hashlib
+from typing import List, Tuple
+
+import numpy as np
+
+SEGMENT_BYTES = 4 * 1024 * 1024  # so viel Payload pro NumPy-Durchlauf (begrenzt den Speicher)
+WINDOW = 32                      # Gear-Hash (32 Bit) hängt nur von den letzten 32 Bytes ab
+
+# feste Zufallstabelle → gleiche Schnittpunkte über alle Läufe/Rechner
+GEAR = np.random.default_rng(0x51C0DE).integers(0, 2**32, size=256, dtype=np.uint32)
+
+def gear_hashes(data) -> np.ndarray:
+    """
+    Gear-Rolling-Hash h[i] = Σ_{k<32} GEAR[b[i-k]] << k (mod 2^32) für jede Position.
+    Per Verdopplung: S_2m[i] = S_m[i] + (S_m[i-m] << m) → 5 NumPy-Durchläufe statt 32.
+    """
+    arr = np.frombuffer(data, dtype=np.uint8)
+    h = GEAR[arr]
+    m = 1
+    while m < WINDOW:
+        shifted = np.zeros_like(h)
+        shifted[m:] = h[:-m] << np.uint32(m)
+        h += shifted
+        m *= 2
+    return h
+
+def _top_mask(bits: int) -> np.uint32:
+    # obere Bits nutzen: Bit k hängt von den letzten k+1 Bytes ab → oben am besten durchmischt
+    return np.uint32(((1 << bits) - 1) << (32 - bits))
+
+def candidates(data, mask: np.uint32) -> np.ndarray:
+    """Alle möglichen Schnittpunkte (Position hinter dem Byte mit h & mask == 0), segmentweise."""
+    n = len(data)
+    out = []
+    for seg in range(0, n, SEGMENT_BYTES):
+        lo = max(seg - (WINDOW - 1), 0)      # Vorlauf, damit der Hash am Segmentanfang stimmt
+        h = gear_hashes(data[lo:seg + SEGMENT_BYTES])
+        hits = np.flatnonzero((h[seg - lo:] & mask) == 0)
+        out.append(hits + seg + 1)
+    return np.concatenate(out) if out else np.zeros(0, dtype=np.int64)
+
+def chunk_boundaries(data, avg: int = 8192, min_size: int = 0, max_size: int = 0) -> List[int]:
+    """
+    Content-Defined Chunking nach FastCDC (normalisiert): zwischen min und avg strengere Maske,
+    danach lockerere; spätestens bei max wird geschnitten. Rückgabe: Chunk-Enden (letztes = len).
+    """
+    n = len(data)
+    bits = max(int(round(np.log2(avg))), 4)
+    min_size = min_size or avg // 4
+    max_size = max_size or avg * 8
+    strict = candidates(data, _top_mask(bits + 2))
+    loose = candidates(data, _top_mask(bits - 2))
+
+    cuts, start = [], 0
+    while start < n:
+        lo, mid, hi = start + min_size, start + avg, min(start + max_size, n)
+        cut = hi
+        if lo < hi:
+            k = np.searchsorted(strict, lo)
+            if k < len(strict) and strict[k] < min(mid, hi):
+                cut = int(strict[k])
+            else:
+                k = np.searchsorted(loose, max(mid, lo))
+                if k < len(loose) and loose[k] < hi:
+                    cut = int(loose[k])
+        cuts.append(cut)
+        start = cut
+    return cuts
+
+def chunks(data, avg: int = 8192, min_size: int = 0, max_size: int = 0) -> List[Tuple[int, int, str]]:
+    """[(offset, length, sha256_16)] aller Chunks."""
+    view = memoryview(data)
+    out, start = [], 0
+    for end in chunk_boundaries(data, avg, min_size, max_size):
+        out.append((start, end - start, hashlib.sha256(view[start:end]).hexdigest()[:16]))
+        start = end
+    return out
@@ -0,0 +1,267 @@
+import os, sys, glob, json, time, hashlib, argparse
+from typing import Dict, List
+
+import numpy as np
+
+from extract_payload import read_payload
+from payload_io import open_payload
+from qc_common import collect
+
+# Index über alle ausgerichteten 8-/16-Byte-Chiffratblöcke eines ganzen Backup-Korpus.
+# Jeder Block wird zu einem uint64-Schlüssel (8 B: der Block selbst, 16/32 B: gemischte Wörter),
+# alle Schlüssel landen in einem Array; Wiederholungen finden np.sort/argsort statt dicts:
+#   - im selben Payload       → ECB (gleicher Klartextblock = gleicher Chiffratblock)
+#   - über Payloads hinweg    → gemeinsamer Schlüssel ohne IV/Nonce
+#   - an gleicher Position    → statischer IV / unverschlüsselter Header
+#   - gemeinsame Präfixe      → gleicher Anfang bis zur ersten Änderung (CBC/CTR mit festem IV)
+
+HERE = os.path.dirname(__file__)
+ANALYSIS_DIR = os.path.dirname(HERE)
+REPORT = os.path.join(ANALYSIS_DIR, "cipher_block_index.json")
+
+PREFIX_BYTES = 4096
+EXAMPLES = 5
+# ungerade 64-Bit-Konstanten: w0*M0 ^ w1*M1 ^ … ist pro Wort bijektiv
+MIX = np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93], dtype=np.uint64)
+
+def block_keys(data, size: int, offset: int = 0) -> np.ndarray:
+    """Ausgerichtete size-Byte-Blöcke ab offset → uint64-Schlüssel (eigene Kopie, data darf danach zu)."""
+    n = max(len(data) - offset, 0) // size
+    words = np.frombuffer(data, dtype="<u8", count=n * size // 8, offset=min(offset, len(data))).reshape(n, size // 8)
+    if size == 8:
+        return words[:, 0].copy()
+    keys = np.zeros(n, dtype=np.uint64)
+    for j in range(size // 8):
+        keys ^= words[:, j] * MIX[j]
+    return keys
+
+def common_prefix(a: bytes, b: bytes) -> int:
+    n = min(len(a), len(b))
+    diff = np.flatnonzero(np.frombuffer(a, np.uint8, n) != np.frombuffer(b, np.uint8, n))
+    return int(diff[0]) if len(diff) else n
+
+class Corpus:
+    """Eindeutige Payloads (sha256) mit ihren Blockschlüsseln je Blockgröße und Präfix."""
+
+    def __init__(self, sizes, offset: int = 0):
+        self.sizes = sizes
+        self.offset = offset
+        self.payloads: List[dict] = []
+        self.prefixes: List[bytes] = []
+        self.keys: Dict[int, List[np.ndarray]] = {s: [] for s in sizes}
+        self.duplicates: Dict[str, List[str]] = {}
+        self._seen: Dict[str, int] = {}
+        self.nbytes = 0
+
+    def add(self, name: str, data, sha: str):
+        if sha in self._seen:
+            self.duplicates.setdefault(self.payloads[self._seen[sha]]["name"], []).append(name)
+            return
+        self._seen[sha] = len(self.payloads)
+        self.payloads.append({"name": name, "size": len(data), "sha256": sha})
+        self.prefixes.append(bytes(data[:PREFIX_BYTES]))
+        for s in self.sizes:
+            self.keys[s].append(block_keys(data, s, self.offset))
+        self.nbytes += len(data)
+
+    def arrays(self, size: int):
+        """(keys, starts) – alle Blockschlüssel in Ladereihenfolge + Startindex je Payload."""
+        parts = self.keys[size]
+        counts = np.array([len(k) for k in parts], dtype=np.int64)
+        keys = np.concatenate(parts) if parts else np.zeros(0, np.uint64)
+        return keys, np.cumsum(counts) - counts
+
+def load(corpus: Corpus, backups, raws):
+    for path in backups:
+        data = read_payload(path)
+        if data is None:
+            print(f"⚠️ kein 'payload' in {path} – übersprungen")
+            continue
+        corpus.add(path, data, hashlib.sha256(data).hexdigest())
+    for path in raws:
+        with open_payload(path) as p:
+            corpus.add(path, p.view, p.sha256())
+
+def group_starts(*cols) -> np.ndarray:
+    """Maske: Element beginnt eine neue Gruppe gleicher Werte in allen (sortierten) Spalten."""
+    n = len(cols[0])
+    new = np.zeros(n, dtype=bool)
+    if n:
+        new[0] = True
+        for c in cols:
+            new[1:] |= c[1:] != c[:-1]
+    return new
+
+def repeated(keys: np.ndarray):
+    """
+    Indizes aller Blöcke, deren Schlüssel mehr als einmal vorkommt (+ Anzahl verschiedener Schlüssel).
+    Chiffrat ist fast überall eindeutig: ein np.sort findet die wenigen Duplikate, nur diese
+    werden danach gruppiert (stabiles argsort über alle Blöcke wäre ~15× langsamer).
+    """
+    srt = np.sort(keys)
+    eq = srt[1:] == srt[:-1]
+    dup = np.unique(srt[1:][eq])
+    distinct = len(keys) - int(eq.sum())
+    del srt, eq
+    if not len(dup):
+        return np.zeros(0, np.int64), distinct
+    idx = np.minimum(np.searchsorted(dup, keys), len(dup) - 1)
+    return np.flatnonzero(dup[idx] == keys), distinct
+
+def analyze(corpus: Corpus, size: int, top: int) -> dict:
+    all_keys, starts = corpus.arrays(size)
+    cand, distinct = repeated(all_keys)
+    # nur Kandidaten weiter: Payload-Nummer und Blockposition aus dem globalen Index
+    pid = (np.searchsorted(starts, cand, side="right") - 1).astype(np.uint32)
+    pos = (cand - starts[pid]).astype(np.uint32)
+    keys = all_keys[cand]
+    total = len(all_keys)
+    del all_keys
+    names = [p["name"] for p in corpus.payloads]
+    P = len(names)
+    off = lambda q: corpus.offset + int(q) * size
+
+    def key_repr(k):
+        return int(k).to_bytes(8, "little").hex() if size == 8 else f"#{int(k):016x}"
+
+    # Kandidaten stehen in (pid, pos)-Reihenfolge → stabiles Sortieren nach Schlüssel ergibt (key, pid, pos)
+    order = np.argsort(keys, kind="stable")
+    k, p, q = keys[order], pid[order], pos[order]
+    new_key = group_starts(k)
+    new_pair = group_starts(k, p)
+    groups = np.flatnonzero(new_key)
+    occ = np.diff(np.append(groups, len(k)))
+    n_payloads = np.add.reduceat(new_pair.astype(np.int64), groups) if len(groups) else np.zeros(0, np.int64)
+
+    def examples(g):
+        s = groups[g]
+        return [[names[p[i]], off(q[i])] for i in range(s, s + min(int(occ[g]), EXAMPLES))]
+
+    # ECB: Schlüssel mehrfach im selben Payload
+    repeat = ~new_pair
+    ecb_per = np.bincount(p[repeat], minlength=P)
+    in_payload = occ - n_payloads        # Wiederholungen innerhalb der Payloads je Schlüssel
+    ecb_top = np.argsort(-in_payload, kind="stable")[:top]
+    ecb = {
+        "repeated_blocks": int(repeat.sum()),
+        "payloads_with_repeats": int((ecb_per > 0).sum()),
+        "per_payload": [{"name": names[i], "blocks": len(corpus.keys[size][i]), "repeated": int(ecb_per[i])}
+                        for i in np.argsort(-ecb_per, kind="stable") if ecb_per[i]][:top],
+        "top": [{"block": key_repr(k[groups[g]]), "count": int(occ[g]), "payloads": int(n_payloads[g]),
+                 "examples": examples(g)} for g in ecb_top if in_payload[g]],
+    }
+
+    # über Payloads hinweg: Schlüssel in ≥ 2 verschiedenen Payloads
+    shared_key = n_payloads >= 2
+    shared = np.repeat(shared_key, occ)
+    cross_per = np.bincount(p[shared], minlength=P)
+    cross_top = np.argsort(-n_payloads, kind="stable")[:top]
+    cross = {
+        "shared_blocks": int(shared_key.sum()),
+        "payloads_sharing": int((cross_per > 0).sum()),
+        "per_payload": [{"name": names[i], "shared": int(cross_per[i])}
+                        for i in np.argsort(-cross_per, kind="stable") if cross_per[i]][:top],
+        "top": [{"block": key_repr(k[groups[g]]), "payloads": int(n_payloads[g]), "count": int(occ[g]),
+                 "examples": examples(g)} for g in cross_top if shared_key[g]],
+    }
+
+    # gleiche Position: (pos, key) in ≥ 2 Payloads – Reihenfolge (pos, key) per zweitem stabilem Sort
+    o2 = order[np.argsort(pos[order], kind="stable")]
+    k2, q2 = keys[o2], pos[o2]
+    s2 = np.flatnonzero(group_starts(q2, k2))
+    n2 = np.diff(np.append(s2, len(k2)))
+    hit = n2 >= 2
+    hq, hn, hk = q2[s2[hit]], n2[hit], k2[s2[hit]]
+    same = {
+        "positions": int(len(np.unique(hq))),
+        "all_payloads": int((hn == P).sum()) if P >= 2 else 0,
+        "top": [{"offset": off(hq[i]), "payloads": int(hn[i]), "block": key_repr(hk[i])}
+                for i in np.lexsort((hq, -hn))[:top]],
+        "first": [{"offset": off(hq[i]), "payloads": int(hn[i]), "block": key_repr(hk[i])}
+                  for i in range(min(len(hq), top))],
+    }
+
+    return {"block": size, "blocks": int(total), "distinct": distinct,
+            "ecb": ecb, "cross": cross, "same_position": same}
+
+def prefixes(corpus: Corpus, top: int) -> dict:
+    """Längster gemeinsamer Anfang je Payload: das Maximum liegt immer bei einem Nachbarn in Sortierreihenfolge."""
+    names = [p["name"] for p in corpus.payloads]
+    order = sorted(range(len(names)), key=lambda i: corpus.prefixes[i])
+    lcp = [common_prefix(corpus.prefixes[a], corpus.prefixes[b]) for a, b in zip(order, order[1:])]
+    best = [0] * len(names)
+    for j, n in enumerate(lcp):
+        best[order[j]] = max(best[order[j]], n)
+        best[order[j + 1]] = max(best[order[j + 1]], n)
+    pairs = sorted(range(len(lcp)), key=lambda j: -lcp[j])[:top]
+    return {
+        "limit": PREFIX_BYTES,
+        "common_all": min(lcp) if lcp else 0,
+        "histogram": {str(n): best.count(n) for n in sorted(set(best))},
+        "top_pairs": [{"a": names[order[j]], "b": names[order[j + 1]], "bytes": lcp[j]} for j in pairs if lcp[j]],
+    }
+
+def print_report(rep: dict):
+    P = rep["payloads"]
+    for r in rep["sizes"]:
+        print(f"\n🧱 {r['block']}-Byte-Blöcke: {r['blocks']} gesamt, {r['distinct']} verschieden")
+        e, c, s = r["ecb"], r["cross"], r["same_position"]
+        flag = "🔁 ECB-Verdacht" if e["repeated_blocks"] else "✅ keine Wiederholung"
+        print(f"  {flag}: {e['repeated_blocks']} wiederholte Blöcke in {e['payloads_with_repeats']}/{P} Payloads")
+        for t in e["top"][:5]:
+            print(f"     {t['block']} ×{t['count']} (z.B. {os.path.basename(t['examples'][0][0])} @ {t['examples'][0][1]})")
+        print(f"  🔗 über Payloads: {c['shared_blocks']} Blöcke in ≥ 2 Payloads ({c['payloads_sharing']}/{P} Payloads betroffen)")
+        for t in c["top"][:5]:
+            print(f"     {t['block']} in {t['payloads']} Payloads")
+        print(f"  📍 gleiche Position: {s['positions']} Offsets mit gleichem Block in ≥ 2 Payloads, "
+              f"{s['all_payloads']} in allen {P}")
+        for t in s["first"][:5]:
+            print(f"     @{t['offset']}: {t['block']} in {t['payloads']} Payloads")
+    pr = rep["prefix"]
+    print(f"\n📏 Gemeinsames Präfix aller Payloads: {pr['common_all']} B (geprüft bis {pr['limit']} B)")
+    for t in pr["top_pairs"][:5]:
+        print(f"     {t['bytes']:>5} B  {os.path.basename(t['a'])} ~ {os.path.basename(t['b'])}")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Chiffrat-Blockindex über einen ganzen Backup-Korpus (ECB, statischer IV, gemeinsame Präfixe).")
+    ap.add_argument("inputs", nargs="*", help="Backup-Ordner und/oder Glob-Muster (backup.json)")
+    ap.add_argument("--raw", action="append", default=[], help="Rohe Payload-Dateien/Globs (z.B. batch/*/payload.raw)")
+    ap.add_argument("--block", type=int, nargs="+", default=[8, 16], choices=[8, 16, 32], help="Blockgrößen (Default: 8 16)")
+    ap.add_argument("--offset", type=int, default=0, help="Start des Chiffrats in der Payload (Default: 0)")
+    ap.add_argument("--top", type=int, default=20, help="Einträge je Liste im Report (Default: 20)")
+    ap.add_argument("-o", "--out", default=REPORT, help="Report (Default: 01_ngp_analysis/cipher_block_index.json)")
+    args = ap.parse_args(argv)
+
+    backups = collect(args.inputs)
+    raws = sorted({os.path.abspath(p) for pattern in args.raw for p in glob.glob(pattern)})
+    if not backups and not raws:
+        print("Keine Backups/Payloads gefunden.")
+        sys.exit(1)
+
+    t0 = time.perf_counter()
+    corpus = Corpus(sorted(set(args.block)), args.offset)
+    load(corpus, backups, raws)
+    t_load = time.perf_counter() - t0
+    dups = sum(len(v) for v in corpus.duplicates.values())
+    print(f"📦 {len(backups) + len(raws)} Eingaben → {len(corpus.payloads)} eindeutige Payloads "
+          f"({corpus.nbytes / (1 << 20):.1f} MB, {dups} Duplikate) in {t_load:.2f} s")
+
+    rep = {
+        "payloads": len(corpus.payloads),
+        "bytes": corpus.nbytes,
+        "offset": args.offset,
+        "duplicates": corpus.duplicates,
+        "sizes": [analyze(corpus, s, args.top) for s in corpus.sizes],
+        "prefix": prefixes(corpus, args.top),
+        "inputs": corpus.payloads,
+    }
+    rep["seconds"] = {"load": round(t_load, 3), "total": round(time.perf_counter() - t0, 3)}
+    print_report(rep)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(rep, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Index-Report ({rep['seconds']['total']} s) → {args.out}")
+    return rep
+
+if __name__ == "__main__":
+    main()
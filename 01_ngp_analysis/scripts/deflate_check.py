@@ -0,0 +1,205 @@
+from collections import Counter
+from typing import List, Optional
+
+# Reihenfolge der Code-Längen-Codes im dynamischen Huffman-Header (RFC 1951, 3.2.7)
+CL_ORDER = (16, 17, 18, 0, 8, 7, 9, 6, 10, 5, 11, 4, 12, 3, 13, 2, 14, 1, 15)
+
+class _Truncated(Exception):
+    pass
+
+class _BitReader:
+    """LSB-first Bitleser (DEFLATE-Bitreihenfolge)."""
+    __slots__ = ("data", "pos", "end", "buf", "cnt")
+
+    def __init__(self, data, pos: int):
+        self.data, self.pos, self.end = data, pos, len(data)
+        self.buf = self.cnt = 0
+
+    def bits(self, n: int) -> int:
+        while self.cnt < n:
+            if self.pos >= self.end:
+                raise _Truncated()
+            self.buf |= self.data[self.pos] << self.cnt
+            self.pos += 1
+            self.cnt += 8
+        v = self.buf & ((1 << n) - 1)
+        self.buf >>= n
+        self.cnt -= n
+        return v
+
+def _code_ok(lengths: List[int], codes: bool) -> bool:
+    """Gleiche Regeln wie zlib inflate_table(): nicht überbelegt, nicht unvollständig (außer Einzelcode)."""
+    count = [0] * 16
+    for ln in lengths:
+        count[ln] += 1
+    max_len = max((ln for ln in range(1, 16) if count[ln]), default=0)
+    if max_len == 0:
+        return not codes
+    left = 1
+    for ln in range(1, 16):
+        left = (left << 1) - count[ln]
+        if left < 0:
+            return False
+    return not (left > 0 and (codes or max_len != 1))
+
+def _decoder(lengths: List[int]):
+    """Kanonischer Huffman-Decoder: {(länge, code): symbol}."""
+    count = [0] * 16
+    for ln in lengths:
+        count[ln] += 1
+    count[0] = 0
+    code, nxt = 0, [0] * 16
+    for ln in range(1, 16):
+        code = (code + count[ln - 1]) << 1
+        nxt[ln] = code
+    table = {}
+    for sym, ln in enumerate(lengths):
+        if ln:
+            table[(ln, nxt[ln])] = sym
+            nxt[ln] += 1
+    return table
+
+def _decode(br: _BitReader, table) -> int:
+    code = 0
+    for ln in range(1, 16):
+        code = (code << 1) | br.bits(1)
+        sym = table.get((ln, code))
+        if sym is not None:
+            return sym
+    raise ValueError("invalid code")
+
+def check_deflate_block(data, offset: int) -> Optional[str]:
+    """
+    Prüft den ersten DEFLATE-Blockheader ab `offset`.
+    Gibt einen Ablehnungsgrund zurück oder None (= strukturell möglich / zu wenig Daten zum Prüfen).
+    """
+    if offset >= len(data):
+        return None
+    btype = (data[offset] >> 1) & 3     # Bit 0 = BFINAL, Bits 1-2 = BTYPE
+    if btype == 3:
+        return "btype_11"
+    if btype == 1:
+        return None                     # feste Huffman-Tabellen: Header immer gültig
+    if btype == 0:
+        # Stored: Rest des Bytes verwerfen, dann LEN/NLEN (je 16 Bit, little endian)
+        if offset + 5 > len(data):
+            return None
+        ln = data[offset + 1] | (data[offset + 2] << 8)
+        nln = data[offset + 3] | (data[offset + 4] << 8)
+        return None if ln == (nln ^ 0xFFFF) else "stored_len_nlen"
+
+    # dynamischer Huffman-Header
+    br = _BitReader(data, offset)
+    try:
+        br.bits(3)                      # BFINAL + BTYPE
+        nlen, ndist, ncode = br.bits(5) + 257, br.bits(5) + 1, br.bits(4) + 4
+        if nlen > 286 or ndist > 30:
+            return "dyn_too_many_symbols"
+        cl = [0] * 19
+        for i in range(ncode):
+            cl[CL_ORDER[i]] = br.bits(3)
+        if not _code_ok(cl, codes=True):
+            return "dyn_codelen_code"
+        table = _decoder(cl)
+        lens = []
+        total = nlen + ndist
+        while len(lens) < total:
+            sym = _decode(br, table)
+            if sym < 16:
+                lens.append(sym)
+                continue
+            if sym == 16:
+                if not lens:
+                    return "dyn_repeat_without_prev"
+                val, rep = lens[-1], 3 + br.bits(2)
+            elif sym == 17:
+                val, rep = 0, 3 + br.bits(3)
+            else:
+                val, rep = 0, 11 + br.bits(7)
+            if len(lens) + rep > total:
+                return "dyn_repeat_overflow"
+            lens.extend([val] * rep)
+        if lens[256] == 0:
+            return "dyn_no_end_of_block"
+        if not _code_ok(lens[:nlen], codes=False):
+            return "dyn_litlen_code"
+        if not _code_ok(lens[nlen:], codes=False):
+            return "dyn_dist_code"
+        return None
+    except _Truncated:
+        return None
+
+def _check_zlib_header(data, offset: int, wbits: int) -> Optional[str]:
+    if offset + 2 > len(data):
+        return None
+    cmf, flg = data[offset], data[offset + 1]
+    if cmf & 0x0F != 8:
+        return "zlib_cm"
+    if (cmf >> 4) + 8 > wbits:
+        return "zlib_window"
+    if ((cmf << 8) | flg) % 31:
+        return "zlib_fcheck"
+    if flg & 0x20:
+        return "zlib_fdict"
+    return check_deflate_block(data, offset + 2)
+
+def _check_gzip_header(data, offset: int) -> Optional[str]:
+    head = bytes(data[offset:offset + 4])
+    if len(head) < 4:
+        return None
+    if head[:2] != b"\x1f\x8b":
+        return "gzip_magic"
+    if head[2] != 8:
+        return "gzip_cm"
+    if head[3] & 0xE0:
+        return "gzip_flags"
+    return None
+
+def reject_reason(data, offset: int, wbits: int) -> Optional[str]:
+    """
+    Schneller Strukturtest, bevor zlib bemüht wird. Semantik von wbits wie zlib.decompressobj:
+    -8..-15 raw DEFLATE, 8..15 zlib, 24..31 gzip, 40..47 auto (zlib/gzip). Unbekannt → None.
+    """
+    if -15 <= wbits <= -8:
+        return check_deflate_block(data, offset)
+    if 8 <= wbits <= 15:
+        return _check_zlib_header(data, offset, wbits)
+    if 24 <= wbits <= 31:
+        return _check_gzip_header(data, offset)
+    if 40 <= wbits <= 47:
+        if bytes(data[offset:offset + 2]) == b"\x1f\x8b":
+            return _check_gzip_header(data, offset)
+        return _check_zlib_header(data, offset, wbits - 32)
+    return None
+
+class Prefilter:
+    """Zählt geprüfte/verworfene Kandidaten; check() == True heißt: zlib-Versuch lohnt sich."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.checked = 0
+        self.rejected = 0
+        self.reasons = Counter()
+
+    def check(self, data, offset: int, wbits: int) -> bool:
+        if not self.enabled:
+            return True
+        self.checked += 1
+        reason = reject_reason(data, offset, wbits)
+        if reason is None:
+            return True
+        self.rejected += 1
+        self.reasons[reason] += 1
+        return False
+
+    def merge(self, checked: int, rejected: int, reasons: dict):
+        self.checked += checked
+        self.rejected += rejected
+        self.reasons.update(reasons)
+
+    def rate(self) -> float:
+        return self.rejected / self.checked if self.checked else 0.0
+
+    def summary(self) -> str:
+        top = ", ".join(f"{k}={v}" for k, v in self.reasons.most_common(4))
+        return f"{self.rejected}/{self.checked} Kandidaten vorab verworfen ({self.rate():.1%}) [{top}]"
@@ -0,0 +1,197 @@
+import os, json, zlib, argparse
+from collections import Counter
+from multiprocessing import Pool
+
+import numpy as np
+
+from payload_io import open_payload
+from extract_zlib_raw_blocks import ZLIB_HEADER
+from metrics import Metrics, add_profile_arg, profiled
+from sinks import OUT_CHUNK, MAX_OUTPUT_BYTES
+
+# Suche nach headerlosen Raw-DEFLATE-Streams an JEDEM Byte-Offset der ganzen payload.raw.
+#   1) vektorisiert: BTYPE=11, Stored-LEN/NLEN und HLIT/HDIST > 29 fallen sofort raus (~53 %)
+#   2) Probe: zlib dekodiert höchstens PROBE_IN Eingabebytes bis zu min_out Ausgabebytes
+#   3) Kandidaten, die das Budget erreichen, werden bis zum Stream-Ende (oder Fehler) verlängert
+# Der Offset-Bereich wird in Tasks zerlegt und auf Worker-Prozesse verteilt.
+
+HERE = os.path.dirname(__file__)
+ANALYSIS_DIR = os.path.dirname(HERE)
+INPUT_DEFAULT = os.path.join(ANALYSIS_DIR, "extracted", "payload.raw")
+REPORT = os.path.join(ANALYSIS_DIR, "deflate_discovery.json")
+
+PROBE_IN = 256             # Eingabebytes pro Probe
+MIN_OUT = 64               # Ausgabe-Budget der Probe = Mindestausgabe eines Kandidaten
+MIN_BYTES = 512            # Mindestausgabe eines verlängerten Kandidaten, um als „Insel“ zu zählen
+TASK_OFFSETS = 1 << 16     # Offsets pro Pool-Task (~0,1 s) → gleichmäßige Verteilung auf die Worker
+
+def structural_mask(arr: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """Offsets [start, stop), deren erster Blockheader (Byte-ausgerichtet) nicht schon formal ungültig ist."""
+    b = arr[start:stop]
+    nxt = arr[start + 1:stop + 5].astype(np.int64)
+    nxt = np.concatenate([nxt, np.zeros(len(b) + 4 - len(nxt), np.int64)])
+    btype = (b >> 1) & 3
+    stored_ok = (nxt[:len(b)] | nxt[1:len(b) + 1] << 8) == ((nxt[2:len(b) + 2] | nxt[3:len(b) + 3] << 8) ^ 0xFFFF)
+    dyn_ok = ((b >> 3) <= 29) & ((nxt[:len(b)] & 0x1F) <= 29)      # HLIT ≤ 286 Codes, HDIST ≤ 30 Codes
+    return (btype == 1) | ((btype == 0) & stored_ok) | ((btype == 2) & dyn_ok)
+
+def probe(blob, off: int, min_out: int):
+    """None = Kandidat (≥ min_out Bytes ohne Fehler), sonst Ablehnungsgrund."""
+    d = zlib.decompressobj(-15)
+    try:
+        out = d.decompress(blob[off:off + PROBE_IN], min_out)
+    except zlib.error as e:
+        return str(e).rpartition(": ")[2]
+    if len(out) >= min_out:
+        return None
+    return "tiny_stream" if d.eof else "stalled"
+
+def extend(blob, off: int, max_out: int = MAX_OUTPUT_BYTES) -> dict:
+    """Kandidat bis Stream-Ende/Fehler dekodieren; wachsende Stücke → consumed auch bei Fehlern recht genau."""
+    d = zlib.decompressobj(-15)
+    hist = np.zeros(256, np.int64)
+    pos, produced, chunk, n = off, 0, 256, len(blob)
+    status = "truncated"
+    try:
+        while pos < n:
+            piece = blob[pos:pos + chunk]
+            pos += len(piece)
+            chunk = min(chunk * 2, 1 << 16)
+            while piece and not d.eof and produced < max_out:
+                out = d.decompress(piece, OUT_CHUNK)     # Ausgabe pro Aufruf begrenzt (Zip-Bomben)
+                piece = d.unconsumed_tail
+                if out:
+                    hist += np.bincount(np.frombuffer(out, np.uint8), minlength=256)
+                    produced += len(out)
+            if d.eof:
+                pos -= len(d.unused_data)
+                status = "eof"
+                break
+            if produced >= max_out:
+                pos -= len(piece)        # noch nicht verarbeiteter Rest
+                status = "limit"
+                break
+    except zlib.error as e:
+        status = str(e).rpartition(": ")[2]
+    p = hist[hist > 0] / produced if produced else np.zeros(0)
+    # davor ein gültiger ZLIB-Header → eigentlich ein ZLIB-Member (auch vom Carver gefunden)
+    zlib_header = off >= 2 and bool(ZLIB_HEADER[blob[off - 2] << 8 | blob[off - 1]])
+    return {"offset": off, "consumed": pos - off, "produced": produced,
+            "entropy": round(float(-(p * np.log2(p)).sum()), 3), "status": status, "zlib_header": zlib_header}
+
+def scan_range(blob, start: int, stop: int, min_out: int):
+    """Alle Offsets [start, stop) prüfen → (verlängerte Kandidaten, Zähler)."""
+    stats = Counter()
+    arr = np.frombuffer(blob, dtype=np.uint8)
+    offs = np.flatnonzero(structural_mask(arr, start, stop)) + start
+    stats["offsets"] = stop - start
+    stats["structural_reject"] = (stop - start) - len(offs)
+    found = []
+    for off in offs.tolist():
+        reason = probe(blob, off, min_out)
+        if reason is None:
+            found.append(extend(blob, off))
+        else:
+            stats[f"probe:{reason}"] += 1
+    stats["probe_pass"] = len(found)
+    return found, stats
+
+# ---- Worker: Payload einmal pro Prozess per mmap öffnen
+_PAYLOAD = None
+
+def _open(path):
+    global _PAYLOAD
+    _PAYLOAD = open_payload(path)
+
+def _task(task):
+    start, stop, min_out = task
+    return scan_range(_PAYLOAD.view, start, stop, min_out)
+
+def islands(found, min_bytes: int):
+    """
+    Inseln: verlängerte Kandidaten mit ≥ min_bytes Ausgabe. Rangfolge: sauberes Stream-Ende, dann echte
+    Kompression (produced > consumed – zufällige Stored-Blöcke mit passendem LEN/NLEN komprimieren nicht),
+    dann Größe des erklärten Bereichs (consumed). Kandidaten innerhalb einer komprimierenden, sauber
+    beendeten Insel (Start mitten im Stream) fallen weg.
+    """
+    keep, covered = [], 0
+    for c in sorted(found, key=lambda c: c["offset"]):
+        if c["offset"] < covered or c["produced"] < min_bytes:
+            continue
+        keep.append(c)
+        if c["status"] == "eof" and c["produced"] > c["consumed"]:
+            covered = c["offset"] + c["consumed"]
+    keep.sort(key=lambda c: (c["status"] != "eof", c["produced"] <= c["consumed"], -c["consumed"], c["offset"]))
+    return keep
+
+def discover(path: str, start: int = 0, end: int = None, min_out: int = MIN_OUT,
+             min_bytes: int = MIN_BYTES, jobs: int = 1) -> dict:
+    metrics = Metrics()
+    with open_payload(path) as payload:
+        size = len(payload)
+        end = size if end is None else min(end, size)
+        tasks = [(s, min(s + TASK_OFFSETS, end), min_out) for s in range(start, end, TASK_OFFSETS)]
+        found, stats = [], Counter()
+        with metrics.stage("scan", max(end - start, 0)):
+            if jobs > 1:
+                with Pool(jobs, initializer=_open, initargs=(path,)) as pool:
+                    results = list(pool.imap(_task, tasks, chunksize=1))
+            else:
+                results = [scan_range(payload.view, s, e, m) for s, e, m in tasks]
+        for f, st in results:
+            found += f
+            stats.update(st)
+        sha = payload.sha256()
+
+    metrics.count("bytes_scanned", max(end - start, 0))
+    metrics.count("probe_attempts", stats["offsets"] - stats["structural_reject"])
+    ranked = islands(found, min_bytes)
+    return {
+        "source": {"path": os.path.abspath(path), "size": size, "sha256": sha},
+        "range": [start, end],
+        "min_out": min_out,
+        "min_bytes": min_bytes,
+        "stats": dict(stats.most_common()),
+        "islands": ranked,
+        "metrics": {**metrics.as_dict(), "jobs": jobs},
+    }
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Raw-DEFLATE-Streams an jedem Byte-Offset der payload.raw suchen (parallel).")
+    ap.add_argument("-i", "--input", default=INPUT_DEFAULT, help="Pfad zu payload.raw")
+    ap.add_argument("-o", "--out", default=REPORT, help="Report (Default: 01_ngp_analysis/deflate_discovery.json)")
+    ap.add_argument("--start", type=int, default=0, help="Erster Offset (Default: 0)")
+    ap.add_argument("--end", type=int, help="Offset-Ende, exklusiv (Default: Dateiende)")
+    ap.add_argument("--min-out", type=int, default=MIN_OUT, help="Ausgabe-Budget der Probe (Default: 64)")
+    ap.add_argument("--min-bytes", type=int, default=MIN_BYTES, help="Mindestausgabe einer Insel (Default: 512)")
+    ap.add_argument("--jobs", type=int, default=1, help="Worker-Prozesse (1 = seriell, 0 = alle Kerne)")
+    ap.add_argument("--top", type=int, default=20, help="Angezeigte Inseln (Default: 20)")
+    add_profile_arg(ap)
+    args = ap.parse_args(argv)
+
+    jobs = args.jobs or os.cpu_count() or 1
+    with profiled(args.profile, os.path.splitext(args.out)[0] + "_profile.prof"):
+        rep = discover(args.input, args.start, args.end, args.min_out, args.min_bytes, jobs)
+
+    st, m = rep["stats"], rep["metrics"]
+    print(f"🔎 {args.input}: Offsets {rep['range'][0]}..{rep['range'][1]} | Worker: {jobs}")
+    print(f"   strukturell verworfen: {st.get('structural_reject', 0)} | Probe verworfen: "
+          f"{m['counters']['probe_attempts'] - st.get('probe_pass', 0)} | Kandidaten verlängert: {st.get('probe_pass', 0)}")
+    reasons = ", ".join(f"{k[6:]}={v}" for k, v in st.items() if k.startswith("probe:"))
+    print(f"   Probe-Gründe: {reasons or '–'}")
+    if rep["islands"]:
+        print(f"🏝️  {len(rep['islands'])} Inseln:")
+        for c in rep["islands"][:args.top]:
+            print(f"   off {c['offset']:>9} | consumed {c['consumed']:>9} | produced {c['produced']:>10} | "
+                  f"H={c['entropy']:.3f} | {c['status']}" + (" | ZLIB-Header davor" if c["zlib_header"] else ""))
+    else:
+        print("🌊 Keine komprimierten Inseln gefunden.")
+    print(f"⏱️  {m['wall_s']:.2f} s, {m['rates'].get('bytes_scanned_mb_s')} MB/s")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(rep, f, ensure_ascii=False, indent=2)
+    print(f"✅ Report gespeichert: {args.out}")
+    return rep
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import os, json, argparse
+import numpy as np
+
+from payload_io import open_payload
+from block_manifest import load_manifest
+
+HERE = os.path.dirname(__file__)
+ANALYSIS_DIR = os.path.dirname(HERE)
+INPUT_DEFAULT = os.path.join(ANALYSIS_DIR, "extracted", "payload.raw")
+OUT_DEFAULT = os.path.join(ANALYSIS_DIR, "entropy")
+MANIFEST = os.path.join(ANALYSIS_DIR, "members_zlib_raw", "_manifest_zlib_raw.json")
+
+SEGMENT_BYTES = 4 * 1024 * 1024  # so viel Payload pro NumPy-Durchlauf (begrenzt den Speicher)
+SEGMENT_ROWS = 4096              # höchstens so viele Fenster pro Durchlauf (Histogramme: Zeilen × 256)
+
+def chunk_histograms(arr: np.ndarray, stride: int) -> np.ndarray:
+    """Byte-Histogramm je `stride`-Chunk: (n_chunks, 256), nur vollständige Chunks."""
+    rows = len(arr) // stride
+    seg = arr[:rows * stride].reshape(rows, stride).astype(np.int32)
+    seg += (np.arange(rows, dtype=np.int32) * 256)[:, None]
+    return np.bincount(seg.ravel(), minlength=rows * 256).reshape(rows, 256)
+
+def window_entropy(data, window: int = 4096, stride: int = 1024) -> np.ndarray:
+    """
+    Shannon-Entropie (Bit/Byte) für alle Fenster [i*stride, i*stride+window).
+    Fenster-Histogramme entstehen aus Präfixsummen der Chunk-Histogramme;
+    H = log2(W) - Σ c·log2(c) / W über eine vorberechnete c·log2(c)-Tabelle.
+    """
+    if window % stride:
+        raise ValueError("window muss ein Vielfaches von stride sein")
+    arr = np.frombuffer(data, dtype=np.uint8)
+    k = window // stride
+    n_windows = len(arr) // stride - k + 1
+    if n_windows <= 0:
+        return np.zeros(0, dtype=np.float32)
+
+    c = np.arange(window + 1, dtype=np.float64)
+    clog = np.zeros(window + 1)
+    clog[1:] = c[1:] * np.log2(c[1:])
+
+    out = np.empty(n_windows, dtype=np.float32)
+    # kleiner stride → viele Zeilen pro Byte; deshalb zusätzlich nach Zeilen begrenzen
+    per_seg = max(min(SEGMENT_BYTES // stride, SEGMENT_ROWS), 1)
+    for w0 in range(0, n_windows, per_seg):
+        w1 = min(w0 + per_seg, n_windows)
+        # Chunks w0 .. w1+k-1 (inkl. Vorgriff für das letzte Fenster des Segments)
+        hist = chunk_histograms(arr[w0 * stride:(w1 + k - 1) * stride], stride)
+        cum = np.zeros((len(hist) + 1, 256), dtype=np.int32)
+        np.cumsum(hist, axis=0, out=cum[1:])
+        win = cum[k:] - cum[:-k]
+        out[w0:w1] = np.log2(window) - clog[win].sum(axis=1) / window
+    return out
+
+def low_regions(ent: np.ndarray, window: int, stride: int, threshold: float, base: int = 0, limit: int = 1000):
+    """Zusammenhängende Fenster mit Entropie < threshold → [(start, end, min_entropy)]."""
+    mask = ent < threshold
+    if not mask.any():
+        return []
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.view(np.int8), [0]))))
+    regions = []
+    for a, b in zip(edges[::2], edges[1::2]):
+        regions.append({"start": base + int(a) * stride,
+                        "end": base + int(b - 1) * stride + window,
+                        "min_entropy": round(float(ent[a:b].min()), 3)})
+        if len(regions) >= limit:
+            break
+    return regions
+
+def summarize(ent: np.ndarray, window: int, stride: int, threshold: float, base: int = 0) -> dict:
+    if not len(ent):
+        return {"windows": 0}
+    return {
+        "windows": int(len(ent)),
+        "min": round(float(ent.min()), 4),
+        "max": round(float(ent.max()), 4),
+        "mean": round(float(ent.mean()), 4),
+        "below_threshold": int((ent < threshold).sum()),
+        "low_regions": low_regions(ent, window, stride, threshold, base),
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="Entropie-Karte (Sliding Window) über payload.raw oder Manifest-Blöcke.")
+    ap.add_argument("-i", "--input", default=INPUT_DEFAULT, help="Pfad zu payload.raw")
+    ap.add_argument("-o", "--out", default=OUT_DEFAULT, help="Ausgabeordner (Default: 01_ngp_analysis/entropy)")
+    ap.add_argument("--indices", type=str, help="Nur diese Manifest-Blöcke (z.B. 45,36,188); sonst ganze Payload")
+    ap.add_argument("--manifest", default=MANIFEST, help="Block-Manifest (_manifest_zlib_raw.json)")
+    ap.add_argument("--window", type=int, default=4096, help="Fenstergröße in Bytes")
+    ap.add_argument("--stride", type=int, default=1024, help="Schrittweite in Bytes (Teiler von --window)")
+    ap.add_argument("--threshold", type=float, default=7.0, help="Schwelle für 'niedrige Entropie' (Bit/Byte)")
+    args = ap.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    payload = open_payload(args.input)
+
+    regions = [("payload", 0, len(payload))]
+    if args.indices:
+        source, manifest = load_manifest(args.manifest)
+        if source.get("size") not in (None, len(payload)):
+            raise SystemExit("❌ payload.raw passt nicht zum Manifest (Größe abweichend)")
+        wanted = {int(x) for x in args.indices.split(",") if x.strip()}
+        regions = [(f"block_{r['index']}", r["offset"], r["end"]) for r in manifest if r["index"] in wanted]
+
+    report = {"file": args.input, "size": len(payload), "window": args.window,
+              "stride": args.stride, "threshold": args.threshold, "regions": []}
+    for name, start, end in regions:
+        view = payload.slice(start, end)
+        ent = window_entropy(view, args.window, args.stride)
+        view.release()
+        npy_path = os.path.join(args.out, f"entropy_{name}_w{args.window}_s{args.stride}.npy")
+        np.save(npy_path, ent)
+        summary = summarize(ent, args.window, args.stride, args.threshold, base=start)
+        report["regions"].append({"name": name, "offset": start, "end": end, "array": npy_path, **summary})
+        if summary["windows"]:
+            print(f"📈 {name}: {summary['windows']} Fenster | min={summary['min']} mean={summary['mean']} "
+                  f"max={summary['max']} | <{args.threshold}: {summary['below_threshold']} "
+                  f"({len(summary['low_regions'])} Regionen)")
+        else:
+            print(f"📈 {name}: kleiner als ein Fenster – übersprungen")
+    payload.close()
+
+    out = os.path.join(args.out, "_entropy_map.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Report gespeichert: {out}")
+
+if __name__ == "__main__":
+    main()
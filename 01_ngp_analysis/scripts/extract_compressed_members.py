@@ -1,32 +1,13 @@
-import os, io, re, json, argparse, hashlib, gzip, zipfile, zlib
+import os, json, argparse, zlib
+
+import sigscan
+from payload_io import open_payload, ViewReader
+from qc_common import sha16, detect_kind, ensure_dir, write_bytes
 
 # ---- Einstellungen
 DEFAULT_INPUT = os.path.join(os.path.dirname(os.path.dirname(__file__)), "extracted", "payload.raw")
 DEFAULT_OUT   = os.path.join(os.path.dirname(os.path.dirname(__file__)), "members")
 
-def ensure_dir(p):
-    os.makedirs(p, exist_ok=True)
-
-def sha16(b: bytes) -> str:
-    return hashlib.sha256(b).hexdigest()[:16]
-
-def detect_kind(b: bytes) -> str:
-    if b.startswith(b"PK\x03\x04"): return "zip"
-    if b.startswith(b"\x1f\x8b\x08"): return "gzip"
-    head = b.lstrip()[:1]
-    if head in (b"{", b"["):
-        try:
-            json.loads(b.decode("utf-8"))
-            return "json"
-        except Exception:
-            pass
-    return "bin"
-
-def save_bytes(path, data: bytes):
-    ensure_dir(os.path.dirname(path))
-    with open(path, "wb") as f: f.write(data)
-    return path
-
 def save_text_or_json(basepath, data: bytes):
     # JSON hübsch, sonst .txt
     try:
@@ -49,8 +30,9 @@ def save_text_or_json(basepath, data: bytes):
         return path, "bin"
 
 def try_decompress_gzip_from(data: bytes, offset: int):
+    import gzip
     try:
-        with gzip.GzipFile(fileobj=io.BytesIO(data[offset:])) as gz:
+        with gzip.GzipFile(fileobj=ViewReader(memoryview(data)[offset:])) as gz:
             return gz.read()
     except Exception:
         return None
@@ -59,16 +41,17 @@ def try_decompress_zlib_from(data: bytes, offset: int):
     # Versuche mit zlib-Header (wbits=15) und „raw deflate“ (wbits=-15)
     for wbits in (15, -15):
         try:
-            return zlib.decompress(data[offset:], wbits)
+            return zlib.decompress(memoryview(data)[offset:], wbits)
         except Exception:
             pass
     return None
 
 def extract_zip_members(raw: bytes, out_dir: str, tag: str):
     # Entpackt ZIP in Unterordner
+    import zipfile
     zdir = os.path.join(out_dir, f"zip_{tag}")
     ensure_dir(zdir)
-    with zipfile.ZipFile(io.BytesIO(raw)) as zf:
+    with zipfile.ZipFile(ViewReader(memoryview(raw))) as zf:
         zf.extractall(zdir)
         names = zf.namelist()
     return zdir, names
@@ -81,13 +64,16 @@ def main():
     args = ap.parse_args()
 
     ensure_dir(args.out)
-    with open(args.input, "rb") as f:
-        blob = f.read()
+    payload = open_payload(args.input)
+    blob = payload.view
 
     print(f"🔎 Datei: {args.input}  Größe: {len(blob)} bytes  sha256:{sha16(blob)}")
 
-    # ---- GZIP: Signatur 1F 8B 08 suchen
-    gzip_hits = [m.start() for m in re.finditer(b"\x1f\x8b\x08", blob)]
+    # ---- Signaturscan: GZIP (1F 8B 08) + ZLIB (78 01 / 78 9C / 78 DA) in einem Durchlauf
+    found = sigscan.scan(blob, ("gzip_deflate", "zlib"))
+
+    # ---- GZIP
+    gzip_hits = found["gzip_deflate"]
     print(f"[scan] GZIP-Signaturen gefunden: {len(gzip_hits)}")
     ok_gzip = 0
     for i, off in enumerate(gzip_hits[:args.max]):
@@ -107,13 +93,13 @@ def main():
             print(f"[GZIP→JSON] off={off} → {path}")
         else:
             path = base + ".bin"
-            save_bytes(path, dec)
+            write_bytes(path, dec)
             print(f"[GZIP→BIN ] off={off} → {path} ({len(dec)} bytes)")
 
     print(f"[✓] Erfolgreiche GZIP-Extraktionen: {ok_gzip}/{len(gzip_hits)}")
 
-    # ---- ZLIB: typische Header 78 01 / 78 9C / 78 DA
-    zlib_hits = [m.start() for m in re.finditer(b"\x78[\x01\x9c\xda]", blob)]
+    # ---- ZLIB
+    zlib_hits = found["zlib"]
     print(f"[scan] ZLIB-Signaturen gefunden: {len(zlib_hits)}")
     ok_zlib = 0
     for i, off in enumerate(zlib_hits[:args.max]):
@@ -132,11 +118,12 @@ def main():
             print(f"[ZLIB→JSON] off={off} → {path}")
         else:
             path = base + ".bin"
-            save_bytes(path, dec)
+            write_bytes(path, dec)
             print(f"[ZLIB→BIN ] off={off} → {path} ({len(dec)} bytes)")
 
     print(f"[✓] Erfolgreiche ZLIB-Extraktionen: {ok_zlib}/{len(zlib_hits)}")
     print(f"📂 Ausgabeordner: {args.out}")
+    payload.close()
 
 if __name__ == "__main__":
     main()
@@ -1,102 +1,145 @@
-import os, sys, json, base64, binascii, hashlib, argparse, io, gzip, zipfile
-
-# Optional: Zstandard unterstützen, wenn installiert
-try:
-    import zstandard as zstd  # pip install zstandard
-except Exception:
-    zstd = None
-
-MAGICS = {
-    b"PK\x03\x04": "zip",
-    b"\x1f\x8b": "gzip",
-    b"\x28\xb5\x2f\xfd": "zstd",
-    b"RIFF": "wav",
-    b"fLaC": "flac",
-    b"OggS": "ogg",
-}
-
-def detect_format(b: bytes) -> str:
-    for sig, name in MAGICS.items():
-        if b.startswith(sig):
-            return name
-    # JSON? (heuristisch)
-    head = b.lstrip()[:1]
-    if head in (b"{", b"["):
-        try:
-            json.loads(b.decode("utf-8"))
-            return "json"
-        except Exception:
-            pass
-    return "binary"
-
-def write_file(path: str, data: bytes):
+import os, sys, base64, binascii, hashlib, argparse, shutil
+
+from payload_io import ViewReader, open_payload
+from json_stream import TopLevelReader
+from qc_common import SNIFF_BYTES, zstd, detect_format, write_bytes
+
+B64_CHUNK = 1 << 20        # Base64-Zeichen pro Dekodierschritt
+WHITESPACE = b" \t\r\n"
+
+def payload_pieces(reader: TopLevelReader):
+    """Base64-Wert von 'payload' stückweise dekodieren (reader steht direkt vor dem Wert)."""
+    carry = b""
+    for piece in reader.iter_string():
+        piece = carry + piece.translate(None, WHITESPACE)
+        cut = len(piece) - len(piece) % 4
+        carry = piece[cut:]
+        for i in range(0, cut, B64_CHUNK):
+            yield base64.b64decode(piece[i:min(i + B64_CHUNK, cut)])
+    if carry:
+        raise binascii.Error("Base64-Länge ist kein Vielfaches von 4")
+
+def stream_payload(backup_path: str, raw_path: str):
+    """
+    Sucht 'payload' im JSON-Bytestrom und dekodiert das Base64 stückweise direkt nach raw_path.
+    Hash und Kopfbytes entstehen unterwegs; im Speicher liegt nie mehr als ein Lesepuffer.
+    Rückgabe: (size, sha256, head) oder None, wenn es kein 'payload' gibt.
+    """
+    sha = hashlib.sha256()
+    size, head = 0, b""
+    with open(backup_path, "rb") as f, open(raw_path, "wb") as out:
+        reader = TopLevelReader(f)
+        for key in reader.keys():
+            if key != "payload":
+                continue
+            for raw in payload_pieces(reader):
+                if len(head) < SNIFF_BYTES:
+                    head += raw[:SNIFF_BYTES - len(head)]
+                sha.update(raw)
+                out.write(raw)
+                size += len(raw)
+            return size, sha.hexdigest(), head
+    return None
+
+def read_payload(backup_path: str):
+    """Dekodierte Payload eines Backups als bytes (ohne Zwischendatei); None ohne 'payload'."""
+    with open(backup_path, "rb") as f:
+        reader = TopLevelReader(f)
+        for key in reader.keys():
+            if key == "payload":
+                return b"".join(payload_pieces(reader))
+    return None
+
+def copy_file(src: str, path: str):
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "wb") as f:
-        f.write(data)
+    shutil.copyfile(src, path)
     return path
 
+def stream_to_file(fileobj, path: str) -> int:
+    """Dekomprimierenden Stream nach path schreiben (ohne das Ergebnis im Speicher zu halten)."""
+    with open(path, "wb") as out:
+        shutil.copyfileobj(fileobj, out, 1 << 20)
+        return out.tell()
+
 def extract_zip(raw: bytes, out_dir: str):
+    import zipfile
     zdir = os.path.join(out_dir, "payload_contents")
     os.makedirs(zdir, exist_ok=True)
-    with zipfile.ZipFile(io.BytesIO(raw)) as zf:
+    with zipfile.ZipFile(ViewReader(memoryview(raw))) as zf:
         zf.extractall(zdir)
         names = zf.namelist()
     return zdir, names
 
-def try_gzip_decompress(raw: bytes) -> bytes | None:
+def try_gzip_decompress(raw, path: str) -> str | None:
+    import gzip
     try:
-        return gzip.decompress(raw)
+        with gzip.GzipFile(fileobj=ViewReader(memoryview(raw))) as gz:
+            stream_to_file(gz, path)
+        return path
     except Exception:
         return None
 
-def try_zstd_decompress(raw: bytes) -> bytes | None:
-    if not zstd:
+def try_zstd_decompress(raw, path: str) -> str | None:
+    z = zstd()
+    if not z:
         return None
     try:
-        dctx = zstd.ZstdDecompressor()
-        return dctx.decompress(raw)
+        with z.ZstdDecompressor().stream_reader(ViewReader(memoryview(raw))) as rd:
+            stream_to_file(rd, path)
+        return path
     except Exception:
         return None
 
-def summarize(path: str, raw: bytes, label: str):
-    sha = hashlib.sha256(raw).hexdigest()
+def summarize(path: str, raw, label: str, sha: str = None):
+    sha = sha or hashlib.sha256(raw).hexdigest()
     print(f"→ {label}: {path}  [{len(raw)} bytes]  sha256={sha[:16]}…")
 
-def main():
-    ap = argparse.ArgumentParser(description="QC backup.json → payload extrahieren & erkennen")
-    ap.add_argument("input", help="Pfad zu backup.json")
-    ap.add_argument("-o", "--out", default="01_ngp_analysis/extracted", help="Ausgabeordner")
-    args = ap.parse_args()
+def summarize_file(path: str, label: str):
+    with open_payload(path) as p:
+        summarize(path, p.view, label)
+        return detect_format(p.view)
 
-    with open(args.input, "r", encoding="utf-8") as f:
-        doc = json.load(f)
+class ExtractError(Exception):
+    pass
 
-    if "payload" not in doc:
-        print("Kein 'payload' im JSON gefunden.")
-        sys.exit(1)
+def extract(input_path: str, out: str, keep_open: bool = False) -> dict:
+    """
+    backup.json → out/payload.raw (+ Format-Handling). Liefert {raw, size, sha256, kind}.
+    keep_open=True: zusätzlich "payload" = die geöffnete Payload (mmap) für weitere Stufen im selben Prozess;
+    schließen muss dann der Aufrufer.
+    """
+    os.makedirs(out, exist_ok=True)
+    raw_path = os.path.join(out, "payload.raw")
 
-    # 1) Base64 → Bytes
+    # 1) Base64 → Bytes (streamend direkt nach payload.raw)
     try:
-        raw = base64.b64decode(doc["payload"])
-    except binascii.Error:
-        print("payload ist keine gültige Base64-Daten.")
-        sys.exit(1)
-
-    os.makedirs(args.out, exist_ok=True)
-    raw_path = os.path.join(args.out, "payload.raw")
-    write_file(raw_path, raw)
-    summarize(raw_path, raw, "RAW")
-
-    # 2) Typ erkennen
-    kind = detect_format(raw)
+        res = stream_payload(input_path, raw_path)
+    except binascii.Error as e:     # Unterklasse von ValueError → zuerst prüfen
+        os.remove(raw_path)
+        raise ExtractError(f"payload ist keine gültige Base64-Daten ({e}).")
+    except ValueError as e:         # Syntaxfehler aus json_stream / json.loads
+        os.remove(raw_path)
+        raise ExtractError(f"Backup ist kein gültiges JSON ({e}).")
+
+    if res is None:
+        os.remove(raw_path)
+        raise ExtractError("Kein 'payload' im JSON gefunden.")
+
+    size, sha, head = res
+    print(f"→ RAW: {raw_path}  [{size} bytes]  sha256={sha[:16]}…")
+
+    # 2) Typ erkennen (Magic aus den beim Streamen gesammelten Kopfbytes; JSON wird nur bei '{'/'[' geparst)
+    payload = open_payload(raw_path, sha)
+    raw = payload.view
+    kind = detect_format(raw, head)
     print(f"Erkannter Typ: {kind}")
 
     # 3) Handling pro Typ
     if kind == "zip":
-        zip_path = os.path.join(args.out, "payload.zip")
-        write_file(zip_path, raw)
-        summarize(zip_path, raw, "ZIP")
-        zdir, names = extract_zip(raw, args.out)
+        zip_path = os.path.join(out, "payload.zip")
+        copy_file(raw_path, zip_path)
+        summarize(zip_path, raw, "ZIP", sha)
+        zdir, names = extract_zip(raw, out)
         print(f"ZIP entpackt nach: {zdir}")
         for n in names[:20]:
             print(f"  - {n}")
@@ -104,61 +147,75 @@ def main():
             print(f"  … (+{len(names)-20} weitere)")
 
     elif kind == "gzip":
-        gz_path = os.path.join(args.out, "payload.gz")
-        write_file(gz_path, raw)
-        summarize(gz_path, raw, "GZIP")
-        dec = try_gzip_decompress(raw)
-        if dec:
-            dec_path = os.path.join(args.out, "payload_gzip_dec.bin")
-            write_file(dec_path, dec)
-            summarize(dec_path, dec, "GZIP→BIN")
-            sub_kind = detect_format(dec)
+        gz_path = os.path.join(out, "payload.gz")
+        copy_file(raw_path, gz_path)
+        summarize(gz_path, raw, "GZIP", sha)
+        dec_path = try_gzip_decompress(raw, os.path.join(out, "payload_gzip_dec.bin"))
+        if dec_path:
+            sub_kind = summarize_file(dec_path, "GZIP→BIN")
             print(f"Innerer Typ nach GZIP: {sub_kind}")
             # Falls inneres wiederum ZIP/JSON ist, kann man hier rekursiv weiter verarbeiten.
 
     elif kind == "zstd":
-        zstd_path = os.path.join(args.out, "payload.zst")
-        write_file(zstd_path, raw)
-        summarize(zstd_path, raw, "ZSTD")
-        if zstd:
-            dec = try_zstd_decompress(raw)
-            if dec:
-                dec_path = os.path.join(args.out, "payload_zstd_dec.bin")
-                write_file(dec_path, dec)
-                summarize(dec_path, dec, "ZSTD→BIN")
-                sub_kind = detect_format(dec)
+        zstd_path = os.path.join(out, "payload.zst")
+        copy_file(raw_path, zstd_path)
+        summarize(zstd_path, raw, "ZSTD", sha)
+        if zstd():
+            dec_path = try_zstd_decompress(raw, os.path.join(out, "payload_zstd_dec.bin"))
+            if dec_path:
+                sub_kind = summarize_file(dec_path, "ZSTD→BIN")
                 print(f"Innerer Typ nach ZSTD: {sub_kind}")
         else:
             print("Hinweis: Für ZSTD bitte 'pip install zstandard' installieren.")
 
     elif kind == "json":
-        json_path = os.path.join(args.out, "payload.json")
-        write_file(json_path, raw)
+        json_path = os.path.join(out, "payload.json")
+        copy_file(raw_path, json_path)
         print(f"JSON gespeichert: {json_path}")
 
     elif kind in ("wav", "flac", "ogg"):
         ext = {"wav": ".wav", "flac": ".flac", "ogg": ".ogg"}[kind]
-        path = os.path.join(args.out, f"payload{ext}")
-        write_file(path, raw)
-        summarize(path, raw, kind.upper())
+        path = os.path.join(out, f"payload{ext}")
+        copy_file(raw_path, path)
+        summarize(path, raw, kind.upper(), sha)
 
     else:
         # Unbekannt → trotzdem speichern (haben wir schon als payload.raw)
         print("Unbekannter Binärtyp. Rohdaten liegen als payload.raw vor.")
         # Bonus-Heuristik: Falls eingebettetes ZIP erkennbar → suchen
-        idx = raw.find(b"PK\x03\x04")
+        idx = payload.mm.find(b"PK\x03\x04")
         if idx != -1:
             print(f"Gefundenes eingebettetes ZIP bei Offset {idx}. Extrahiere…")
-            embedded = raw[idx:]
-            zip_path = os.path.join(args.out, "payload_embedded.zip")
-            write_file(zip_path, embedded)
+            embedded = payload.tail(idx)
+            zip_path = os.path.join(out, "payload_embedded.zip")
+            write_bytes(zip_path, embedded)
             try:
-                zdir, names = extract_zip(embedded, args.out)
+                zdir, names = extract_zip(embedded, out)
                 print(f"Eingebettetes ZIP entpackt nach: {zdir}")
                 for n in names[:20]:
                     print(f"  - {n}")
             except Exception as e:
                 print(f"ZIP-Extraktion fehlgeschlagen: {e}")
+            embedded.release()
+
+    res = {"raw": raw_path, "size": size, "sha256": sha, "kind": kind}
+    if keep_open:
+        res["payload"] = payload
+    else:
+        payload.close()
+    return res
+
+def main():
+    ap = argparse.ArgumentParser(description="QC backup.json → payload extrahieren & erkennen")
+    ap.add_argument("input", help="Pfad zu backup.json")
+    ap.add_argument("-o", "--out", default="01_ngp_analysis/extracted", help="Ausgabeordner")
+    args = ap.parse_args()
+
+    try:
+        extract(args.input, args.out)
+    except ExtractError as e:
+        print(e)
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -1,4 +1,15 @@
-import os, re, json, argparse, hashlib
+import os, zlib, argparse
+from collections import Counter
+
+import numpy as np
+
+import sigscan
+from deflate_check import check_deflate_block
+from payload_io import Payload, open_payload
+from block_manifest import write_manifest, rel, label
+from qc_common import sha16, ensure_dir, write_bytes
+from metrics import Metrics, add_profile_arg, profiled
+from sinks import OUT_CHUNK
 
 # Default-Pfade relativ zur Skript-Position
 HERE = os.path.dirname(__file__)
@@ -6,82 +17,179 @@ ANALYSIS_DIR = os.path.dirname(HERE)  # .../01_ngp_analysis
 INPUT_DEFAULT = os.path.join(ANALYSIS_DIR, "extracted", "payload.raw")
 OUT_DEFAULT   = os.path.join(ANALYSIS_DIR, "members_zlib_raw")
 
-def ensure_dir(p): os.makedirs(p, exist_ok=True)
-def sha16(b: bytes) -> str: return hashlib.sha256(b).hexdigest()[:16]
+DECODE_CHUNK = 1 << 16
+SCAN_CHUNK = 1 << 24
 
-def hexdump(data: bytes, length: int = 256) -> str:
-    chunk, lines = data[:length], []
-    for i in range(0, len(chunk), 16):
-        row = chunk[i:i+16]
-        hexpart = " ".join(f"{b:02x}" for b in row)
-        asciip  = "".join(chr(b) if 32 <= b < 127 else "." for b in row)
-        lines.append(f"{i:08x}  {hexpart:<48}  {asciip}")
-    return "\n".join(lines)
+def _header_table() -> np.ndarray:
+    """Alle 16-Bit-Werte CMF<<8|FLG, die ein gültiger ZLIB-Header sind (CM=8, CINFO≤7, FCHECK, kein FDICT)."""
+    w = np.arange(1 << 16, dtype=np.uint32)
+    cmf, flg = w >> 8, w & 0xFF
+    return ((cmf & 0x0F) == 8) & ((cmf >> 4) <= 7) & (w % 31 == 0) & ((flg & 0x20) == 0)
 
-def main():
-    ap = argparse.ArgumentParser(description="Roh-Extraktion aller ZLIB-Blöcke aus payload.raw (ohne zu dekomprimieren)")
-    ap.add_argument("-i", "--input", default=INPUT_DEFAULT, help="Pfad zu payload.raw")
-    ap.add_argument("-o", "--out",   default=OUT_DEFAULT,   help="Ausgabeordner")
-    ap.add_argument("--max", type=int, default=100000, help="Sicherheitslimit für Anzahl Blöcke")
-    args = ap.parse_args()
+ZLIB_HEADER = _header_table()
+
+def header_candidates(blob) -> np.ndarray:
+    """Offsets aller gültigen ZLIB-Header – ein Tabellen-Lookup pro Bytepaar, blockweise über die Payload."""
+    arr = np.frombuffer(blob, dtype=np.uint8)
+    out = []
+    for start in range(0, max(len(arr) - 1, 0), SCAN_CHUNK):
+        a = arr[start:start + SCAN_CHUNK + 1]
+        w = (a[:-1].astype(np.uint16) << 8) | a[1:]
+        out.append(np.flatnonzero(ZLIB_HEADER[w]) + start)
+    return np.concatenate(out) if out else np.zeros(0, np.int64)
+
+def decode_member(blob, off: int):
+    """
+    Dekodiert einen ZLIB-Stream ab off bis zum Stream-Ende (zlib prüft dabei die Adler-32).
+    → (end, dekomprimierte Größe, None) oder (None, Größe bis zum Abbruch, Grund)
+    """
+    d = zlib.decompressobj()
+    pos, size, n = off, 0, len(blob)
+    try:
+        while pos < n:
+            piece = blob[pos:pos + DECODE_CHUNK]
+            pos += len(piece)
+            while piece and not d.eof:
+                # Ausgabe pro Aufruf begrenzt → auch Zip-Bomben bleiben speicherflach
+                size += len(d.decompress(piece, OUT_CHUNK))
+                piece = d.unconsumed_tail
+            if d.eof:
+                return pos - len(d.unused_data), size, None
+    except zlib.error as e:
+        return None, size, "adler32" if "incorrect data check" in str(e) else "inflate"
+    return None, size, "truncated"
+
+def validated_members(blob, max_blocks: int, metrics: Metrics):
+    """
+    Echte ZLIB-Members: Header-Regeln vektorisiert über alle Offsets, dann erster DEFLATE-Blockheader,
+    dann vollständiges Dekodieren bis Stream-Ende inkl. Adler-32. Liefert ([(start, end, extra)], Ablehnungsgründe).
+    """
+    with metrics.stage("headers", len(blob)):
+        cands = header_candidates(blob)
+    metrics.count("candidates", len(cands))
+    reasons = Counter()
+    members, covered = [], 0
+    with metrics.stage("decode"):
+        for off in cands.tolist():
+            if off < covered:
+                reasons["inside_member"] += 1     # liegt im komprimierten Bereich eines echten Members
+                continue
+            reason = check_deflate_block(blob, off + 2)
+            if reason:
+                reasons[f"deflate_{reason}"] += 1
+                continue
+            end, size, reason = decode_member(blob, off)
+            metrics.count("decode_attempts")
+            if end is None:
+                reasons[reason] += 1
+                continue
+            metrics.count("bytes_decompressed", size)
+            members.append((off, end, {"decompressed_size": size,
+                                       "adler32": bytes(blob[end - 4:end]).hex()}))
+            covered = end
+            if len(members) >= max_blocks:
+                break
+    return members, reasons
 
-    with open(args.input, "rb") as f:
-        blob = f.read()
-    ensure_dir(args.out)
+def naive_spans(blob, max_blocks: int, metrics: Metrics):
+    """Alte Heuristik: 78 01/9C/DA bis zum nächsten solchen Paar (letzter Block bis EOF)."""
+    with metrics.stage("sigscan", len(blob)):
+        hits = sigscan.scan(blob, ("zlib",))["zlib"]
+    metrics.count("candidates", len(hits))
+    spans = []
+    for idx, off in enumerate(hits[:min(len(hits), max_blocks)]):
+        end = hits[idx + 1] if idx + 1 < len(hits) else len(blob)
+        spans.append((off, end, {}))
+    return spans
 
-    # typische ZLIB-Header: 78 01 / 78 9C / 78 DA
-    hits = [m.start() for m in re.finditer(rb"\x78[\x01\x9c\xda]", blob)]
-    if not hits:
-        print("Keine ZLIB-Signaturen gefunden.")
-        return
+def carve(source, out: str, max_blocks: int = 100000, index_only: bool = False, naive: bool = False) -> list:
+    """
+    ZLIB-Members nach `out` + Manifest; liefert die Blockliste.
+    Standard: nur validierte Members mit exakter Spanne (Header → Ende des Streams inkl. Adler-32).
+    naive=True: alte Heuristik, jeder 78 01/9C/DA-Treffer bis zum nächsten Treffer.
+    source: Pfad oder bereits geöffnete Payload (wird dann nicht geschlossen).
+    """
+    payload = source if isinstance(source, Payload) else open_payload(source)
+    blob = payload.view  # Blöcke werden als memoryview-Slices geschrieben, ohne Zwischenkopie
+    ensure_dir(out)
+    metrics = Metrics()
 
-    # Blöcke sind von hit[i] bis hit[i+1]-1 (letzter Block bis EOF)
-    blocks = []
-    for idx, off in enumerate(hits[:min(len(hits), args.max)]):
-        start = off
-        end   = hits[idx+1] if idx+1 < len(hits) else len(blob)
-        blocks.append((idx, start, end))
+    reasons = None
+    if naive:
+        spans = naive_spans(blob, max_blocks, metrics)
+    else:
+        spans, reasons = validated_members(blob, max_blocks, metrics)
+    if not spans:
+        print("Keine ZLIB-Members gefunden." if not naive else "Keine ZLIB-Signaturen gefunden.")
+    blocks = [(i, start, end, extra) for i, (start, end, extra) in enumerate(spans)]
 
     manifest = []
     total = 0
-    for i, start, end in blocks:
+    for i, start, end, extra in blocks:
         raw = blob[start:end]
         size = len(raw)
         total += size
         hdr  = f"{raw[:2].hex()}" if size >= 2 else ""
-        tag  = f"zlib_raw_off_{start}_idx_{i}"
-        bin_path = os.path.join(args.out, f"{tag}.bin")
-        with open(bin_path, "wb") as f:
-            f.write(raw)
-
-        # kleine Vorschau als hexdump
-        hd_path = os.path.join(args.out, f"{tag}_hexdump.txt")
-        with open(hd_path, "w", encoding="utf-8") as f:
-            f.write(hexdump(raw, 256))
-
+        with metrics.stage("hash", size):
+            digest = sha16(raw)
         rec = {
             "index": i,
             "offset": start,
             "end": end,
             "size": size,
-            "sha256_16": sha16(raw),
+            "sha256_16": digest,
             "header_bytes_hex": hdr,
-            "file": bin_path,
-            "hexdump": hd_path,
+            **extra,
         }
+
+        if not index_only:
+            tag  = f"zlib_raw_off_{start}_idx_{i}"
+            with metrics.stage("write", size):
+                bin_path = write_bytes(os.path.join(out, f"{tag}.bin"), raw)
+            rec["file"] = rel(bin_path, out)
+        raw.release()
         manifest.append(rec)
 
-    # Manifest schreiben + kurze Zusammenfassung
-    mani_path = os.path.join(args.out, "_manifest_zlib_raw.json")
-    with open(mani_path, "w", encoding="utf-8") as f:
-        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    # Manifest schreiben (Quelle = payload.raw, relativ zum Manifest-Ordner) + kurze Zusammenfassung
+    source_rec = {"path": rel(os.path.abspath(payload.path), os.path.abspath(out)),
+                  "size": len(blob), "sha256": payload.sha256()}
+    if payload is not source:
+        payload.close()
+    mani_path = os.path.join(out, "_manifest_zlib_raw.json")
+    metrics.count("blocks", len(manifest))
+    extra = {"carving": "naive" if naive else "validated"}
+    if reasons is not None:
+        extra["rejected"] = dict(reasons.most_common())
+    write_manifest(mani_path, source_rec, manifest, mode="index" if index_only else "files",
+                   **extra, metrics=metrics.as_dict())
 
     largest = sorted(manifest, key=lambda r: r["size"], reverse=True)[:10]
-    print(f"ZLIB-Rohblöcke: {len(manifest)}  | Gesamtbytes (summiert): {total}")
-    print(f"Manifest: {mani_path}")
+    kind = "ZLIB-Rohblöcke (naiv)" if naive else "Validierte ZLIB-Members"
+    print(f"{kind}: {len(manifest)} von {metrics.counters.get('candidates', 0)} Kandidaten"
+          f"  | Gesamtbytes (summiert): {total}")
+    if reasons:
+        print("Verworfen: " + ", ".join(f"{k}={v}" for k, v in reasons.most_common(6)))
+    print(f"Manifest: {mani_path}  (Hexdump eines Blocks: python qc.py hexdump -m <manifest> --block <idx>)")
+    print(f"⏱️  {metrics.summary()}")
     print("Größte 10 Blöcke:")
     for r in largest:
-        print(f"  idx {r['index']:4d} | off {r['offset']:8d} | size {r['size']:8d} | sha:{r['sha256_16']} | {os.path.basename(r['file'])}")
+        print(f"  idx {r['index']:4d} | off {r['offset']:8d} | size {r['size']:8d} | sha:{r['sha256_16']} | {label(r)}")
+    return manifest
+
+def main():
+    ap = argparse.ArgumentParser(description="Validierte ZLIB-Members aus payload.raw ausschneiden (exakte Spannen, Adler-32 geprüft)")
+    ap.add_argument("-i", "--input", default=INPUT_DEFAULT, help="Pfad zu payload.raw")
+    ap.add_argument("-o", "--out",   default=OUT_DEFAULT,   help="Ausgabeordner")
+    ap.add_argument("--max", type=int, default=100000, help="Sicherheitslimit für Anzahl Blöcke")
+    ap.add_argument("--naive", action="store_true",
+                    help="Alte Heuristik: jeder 78 01/9C/DA-Treffer bis zum nächsten Treffer (ohne Validierung)")
+    ap.add_argument("--index-only", action="store_true",
+                    help="Nur Index-Manifest (offset/end/sha gegen payload.raw) – keine .bin-Dateien")
+    add_profile_arg(ap)
+    args = ap.parse_args()
+
+    with profiled(args.profile, os.path.join(args.out, "_profile.prof")):
+        carve(args.input, args.out, args.max, args.index_only, args.naive)
 
 if __name__ == "__main__":
     main()
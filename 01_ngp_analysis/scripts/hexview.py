@@ -0,0 +1,77 @@
+import os, sys, json, argparse
+
+from payload_io import open_payload
+from block_manifest import BlockSource
+from qc_common import iter_hexdump
+
+# Hexdump auf Abruf statt Tausender _hexdump.txt-Dateien: Offset/Länge direkt gegen payload.raw,
+# einen Block aus dem Carving-Index (--block) oder einen Signatur-Treffer aus dem Scan (--hit).
+# Gelesen wird nur der angefragte Ausschnitt (mmap), Ausgabe zeilenweise.
+
+HERE = os.path.dirname(__file__)
+ANALYSIS_DIR = os.path.dirname(HERE)
+INPUT_DEFAULT = os.path.join(ANALYSIS_DIR, "extracted", "payload.raw")
+
+def parse_hit(spec: str):
+    """'zlib' → ('zlib', 0), 'zlib:3' → ('zlib', 3)"""
+    name, _, k = spec.partition(":")
+    return name, int(k or 0)
+
+def scan_target(manifest_path: str, spec: str, payload_path: str = None):
+    """Scan-Manifest + 'name:k' → (Payload-Pfad, absoluter Offset des k-ten Treffers)."""
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        doc = json.load(f)
+    name, k = parse_hit(spec)
+    hits = doc.get("hits", {}).get(name)
+    if hits is None:
+        raise ValueError(f"Signatur '{name}' nicht im Scan-Manifest (vorhanden: {', '.join(doc.get('hits', {}))})")
+    if not 0 <= k < len(hits):
+        raise ValueError(f"{name}: nur {len(hits)} Treffer")
+    return payload_path or doc["file"], hits[k]
+
+def dump_payload(path: str, offset: int, length: int, out=sys.stdout):
+    with open_payload(path) as payload:
+        for line in iter_hexdump(payload.view, offset, length):
+            out.write(line + "\n")
+
+def dump_block(manifest_path: str, index: int, offset: int, length: int,
+               payload_path: str = None, out=sys.stdout):
+    """Block aus einem Carving-Manifest; Adressen absolut in payload.raw."""
+    with BlockSource(manifest_path, payload_path, verify=False) as src:
+        rec = next((r for r in src.blocks if r.get("index") == index), None)
+        if rec is None:
+            raise ValueError(f"Block idx={index} nicht im Manifest ({len(src.blocks)} Blöcke)")
+        with src.open(rec) as blob:
+            for line in iter_hexdump(blob, offset, length, base=rec.get("offset", 0)):
+                out.write(line + "\n")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Hexdump eines Ausschnitts der payload.raw auf Abruf (ohne Dump-Dateien).")
+    ap.add_argument("-i", "--input", help="Pfad zu payload.raw (Default: 01_ngp_analysis/extracted/payload.raw "
+                                          "bzw. die Quelle aus dem Manifest)")
+    ap.add_argument("-m", "--manifest", help="_manifest_zlib_raw.json (mit --block) oder _manifest_scan.json (mit --hit)")
+    ap.add_argument("--block", type=int, help="Block-Index aus dem Carving-Manifest; --offset zählt dann ab Blockanfang")
+    ap.add_argument("--hit", help="Signatur-Treffer aus dem Scan-Manifest, z.B. 'zlib:3' (Default-Länge 128)")
+    ap.add_argument("--offset", type=lambda s: int(s, 0), default=0, help="Start-Offset, dezimal oder 0x… (Default: 0)")
+    ap.add_argument("--length", type=lambda s: int(s, 0), help="Anzahl Bytes (Default: 256, bei --hit 128)")
+    args = ap.parse_args(argv)
+
+    if (args.block is not None or args.hit) and not args.manifest:
+        ap.error("--block/--hit brauchen --manifest")
+    length = args.length if args.length is not None else (128 if args.hit else 256)
+    try:
+        if args.block is not None:
+            dump_block(args.manifest, args.block, args.offset, length, args.input)
+        elif args.hit:
+            path, off = scan_target(args.manifest, args.hit, args.input)
+            dump_payload(path, off + args.offset, length)
+        else:
+            dump_payload(args.input or INPUT_DEFAULT, args.offset, length)
+    except BrokenPipeError:
+        # z.B. `qc.py hexdump … | head`
+        sys.stderr.close()
+    except (ValueError, OSError) as e:
+        ap.exit(1, f"❌ {e}\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import os, json, time, argparse, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+from payload_io import open_payload
+from qc_common import iter_hexdump
+from entropy_map import chunk_histograms, window_entropy, SEGMENT_BYTES
+from scan_payload import ascii_strings, utf16le_strings
+
+# Lokaler Inspektionsdienst (nur 127.0.0.1) über die per mmap geöffnete payload.raw:
+#   /hexdump?offset=&length=              Hexdump eines Bereichs
+#   /entropy?offset=&length=&window=      Entropie je Fenster + gesamt
+#   /strings?offset=&length=&min=&enc=    ASCII-/UTF-16LE-Strings im Bereich
+#   /covers?offset=                       welche geschnittenen Blöcke/Inseln decken den Offset ab
+# Pro CHUNK-Stück wird das Byte-Histogramm einmal berechnet (Hintergrund-Thread beim Start, sonst bei
+# Bedarf) und bleibt im Speicher; Entropie auf CHUNK-Raster kommt dann nur noch aus Präfixsummen.
+
+HERE = os.path.dirname(__file__)
+ANALYSIS_DIR = os.path.dirname(HERE)
+INPUT_DEFAULT = os.path.join(ANALYSIS_DIR, "extracted", "payload.raw")
+MANIFEST_DEFAULT = os.path.join(ANALYSIS_DIR, "members_zlib_raw", "_manifest_zlib_raw.json")
+PORT_DEFAULT = 8765
+
+CHUNK = 1 << 16            # Raster der Histogramm-Zusammenfassungen (500 MB Payload → ~8 MB Histogramme)
+MAX_DUMP = 1 << 16         # Hexdump höchstens 64 KB pro Anfrage
+MAX_SCAN = 1 << 19         # Strings / Entropie mit Fenstern < CHUNK: höchstens 512 KB pro Anfrage
+MAX_WINDOWS = 1 << 14      # Fenster pro Entropie-Antwort
+
+def entropies(hist: np.ndarray) -> np.ndarray:
+    """Shannon-Entropie (Bit/Byte) je Zeile einer Histogramm-Matrix."""
+    n = hist.sum(axis=1, dtype=np.float64)
+    c = hist.astype(np.float64)
+    s = (c * np.log2(np.maximum(c, 1))).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(n > 0, np.log2(np.maximum(n, 1)) - s / np.maximum(n, 1), 0.0)
+
+class Inspector:
+    """Abfragen gegen eine Payload; alle Offsets absolut in payload.raw."""
+
+    def __init__(self, path: str, manifests=()):
+        self.payload = open_payload(path)
+        self.size = len(self.payload)
+        self.arr = np.frombuffer(self.payload.view, dtype=np.uint8) if self.size else np.zeros(0, np.uint8)
+        n_chunks = -(-self.size // CHUNK)
+        self._hist = np.zeros((n_chunks, 256), dtype=np.int32)
+        self._ent = np.zeros(n_chunks, dtype=np.float32)      # Entropie je Chunk (Fenster = CHUNK)
+        self._cum = None       # Präfixsummen der Histogramme, sobald alle Chunks berechnet sind
+        self._done = np.zeros(n_chunks, dtype=bool)
+        self._lock = threading.Lock()
+        self.indexes = []
+        spans = []
+        for m in manifests:
+            spans += self._load_index(m)
+        spans.sort(key=lambda s: (s["offset"], s["end"]))
+        self.spans = spans
+        self._starts = np.array([s["offset"] for s in spans], dtype=np.int64)
+        self._ends = np.array([s["end"] for s in spans], dtype=np.int64)
+
+    def close(self):
+        self.arr = None
+        self.payload.close()
+
+    # ---- Indizes (Carving-Manifeste, deflate_discover-Reports)
+    def _load_index(self, path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+        name = os.path.basename(path)
+        if isinstance(doc, dict) and "islands" in doc:
+            size = doc.get("source", {}).get("size")
+            spans = [{"kind": "deflate_island", "offset": c["offset"], "end": c["offset"] + c["consumed"],
+                      "status": c["status"], "produced": c["produced"]} for c in doc["islands"]]
+        else:
+            blocks = doc.get("blocks", []) if isinstance(doc, dict) else doc
+            size = doc.get("source", {}).get("size") if isinstance(doc, dict) else None
+            kind = "zlib_raw" if isinstance(doc, dict) and doc.get("carving") == "naive" else "zlib_member"
+            keep = ("index", "sha256_16", "decompressed_size", "file")
+            spans = [{"kind": kind, "offset": r["offset"], "end": r["end"], **{k: r[k] for k in keep if k in r}}
+                     for r in blocks if "offset" in r and "end" in r]
+        # alte Manifeste ohne Quellangabe: wenigstens müssen alle Spannen in die Payload passen
+        if (size is not None and size != self.size) or any(s["end"] > self.size for s in spans):
+            print(f"⚠️  {name}: gehört zu einer anderen Payload (Größe {size or '?'} ≠ {self.size}) – ignoriert")
+            return []
+        for s in spans:
+            s["index_file"] = name
+        self.indexes.append({"path": os.path.abspath(path), "spans": len(spans)})
+        return spans
+
+    # ---- Histogramm-Zusammenfassungen
+    def _ensure(self, c0: int, c1: int):
+        """Histogramme der Chunks [c0, c1) berechnen, soweit noch nicht im Cache."""
+        if self._done[c0:c1].all():
+            return
+        with self._lock:
+            missing = np.flatnonzero(~self._done[c0:c1]) + c0
+            if not len(missing):
+                return
+            # zusammenhängende Läufe am Stück, in Segmenten ≤ SEGMENT_BYTES
+            breaks = np.flatnonzero(np.diff(missing) != 1) + 1
+            per_seg = max(SEGMENT_BYTES // CHUNK, 1)
+            for run in np.split(missing, breaks):
+                for a in range(int(run[0]), int(run[-1]) + 1, per_seg):
+                    b = min(a + per_seg, int(run[-1]) + 1)
+                    seg = self.arr[a * CHUNK:b * CHUNK]
+                    full = len(seg) // CHUNK
+                    if full:
+                        self._hist[a:a + full] = chunk_histograms(seg, CHUNK)
+                    if full < b - a:    # letzter, kürzerer Chunk der Payload
+                        self._hist[a + full] = np.bincount(seg[full * CHUNK:], minlength=256)
+                    self._ent[a:b] = entropies(self._hist[a:b])
+                    self._done[a:b] = True
+
+    def warm(self):
+        """Alle Zusammenfassungen vorab berechnen (Hintergrund-Thread), danach die Präfixsummen."""
+        per_seg = max(SEGMENT_BYTES // CHUNK, 1)
+        for a in range(0, len(self._done), per_seg):
+            self._ensure(a, min(a + per_seg, len(self._done)))
+        cum = np.zeros((len(self._hist) + 1, 256), dtype=np.int64)
+        np.cumsum(self._hist, axis=0, out=cum[1:])
+        self._cum = cum
+
+    def cached_chunks(self) -> int:
+        return int(self._done.sum())
+
+    def _window_hists(self, bounds: np.ndarray) -> np.ndarray:
+        """
+        Byte-Histogramme der Fenster [bounds[i], bounds[i+1]) (Fenster ≥ CHUNK oder ein einzelnes Fenster):
+        volle Chunks per reduceat aus dem Cache, angebrochene Chunks an den Grenzen per bincount (< CHUNK Bytes).
+        """
+        chunks = bounds // CHUNK
+        c0, c1 = int(chunks[0]), int(chunks[-1])
+        if self._cum is not None:
+            out = self._cum[chunks[1:]] - self._cum[chunks[:-1]]
+        elif c1 > c0:
+            self._ensure(c0, c1)
+            out = np.add.reduceat(self._hist[c0:c1], chunks[:-1] - c0, axis=0, dtype=np.int64)
+        else:
+            out = np.zeros((len(bounds) - 1, 256), dtype=np.int64)
+        for i, (c, b) in enumerate(zip(chunks.tolist(), bounds.tolist())):
+            off = b - c * CHUNK
+            if off:
+                # [c*CHUNK, b) gehört zum Fenster links der Grenze, nicht zum rechten;
+                # bei gecachtem Chunk reicht der kürzere Teil (Chunk-Histogramm minus Rest)
+                if off > CHUNK // 2 and c < len(self._done) and self._done[c]:
+                    part = self._hist[c] - np.bincount(self.arr[b:(c + 1) * CHUNK], minlength=256)
+                else:
+                    part = np.bincount(self.arr[c * CHUNK:b], minlength=256)
+                if i < len(out):
+                    out[i] -= part
+                if i > 0:
+                    out[i - 1] += part
+        return out
+
+    # ---- Abfragen
+    def _span(self, offset: int, length):
+        if not 0 <= offset <= self.size:
+            raise ValueError(f"offset außerhalb der Payload (0..{self.size})")
+        end = self.size if length is None else min(offset + length, self.size)
+        if end < offset:
+            raise ValueError("length muss ≥ 0 sein")
+        return offset, end
+
+    def hexdump(self, offset: int = 0, length: int = 256) -> dict:
+        start, end = self._span(offset, min(length, MAX_DUMP))
+        return {"offset": start, "length": end - start,
+                "lines": list(iter_hexdump(self.payload.view, start, end - start))}
+
+    def entropy(self, offset: int = 0, length: int = None, window: int = CHUNK) -> dict:
+        start, end = self._span(offset, length)
+        if window <= 0:
+            raise ValueError("window muss > 0 sein")
+        n_windows = (end - start) // window
+        if n_windows > MAX_WINDOWS:
+            raise ValueError(f"{n_windows} Fenster – höchstens {MAX_WINDOWS} (größeres window wählen)")
+        whole = self._window_hists(np.array([start, end]))
+        res = {"offset": start, "length": end - start, "window": window,
+               "total": round(float(entropies(whole)[0]), 4)}
+        if start % CHUNK == 0 and window % CHUNK == 0:
+            # Raster-Fenster: direkt aus den gecachten Chunk-Zusammenfassungen
+            k, c0 = window // CHUNK, start // CHUNK
+            c1 = c0 + n_windows * k
+            self._ensure(c0, c1)
+            ent = self._ent[c0:c1] if k == 1 else entropies(self._hist[c0:c1].reshape(n_windows, k, 256).sum(axis=1))
+            res["source"] = "summary"
+        elif window >= CHUNK:
+            # beliebige Lage: gecachte Chunks + je Fenstergrenze ein Rand-bincount
+            bounds = start + window * np.arange(n_windows + 1, dtype=np.int64)
+            ent = entropies(self._window_hists(bounds))
+            res["source"] = "summary+edges"
+        else:
+            if end - start > MAX_SCAN:
+                raise ValueError(f"Fenster < {CHUNK} B nur für Bereiche bis {MAX_SCAN} Bytes")
+            ent = window_entropy(self.payload.view[start:end], window, window)
+            res["source"] = "direct"
+        res["entropy"] = np.round(ent.astype(np.float64), 4).tolist()
+        return res
+
+    def strings(self, offset: int = 0, length: int = MAX_SCAN, min_len: int = 6,
+                enc: str = "ascii", limit: int = 1000) -> dict:
+        start, end = self._span(offset, min(length, MAX_SCAN))
+        finder = {"ascii": ascii_strings, "utf16le": utf16le_strings}.get(enc)
+        if finder is None:
+            raise ValueError("enc muss 'ascii' oder 'utf16le' sein")
+        found = finder(self.payload.view[start:end], min_len)
+        return {"offset": start, "length": end - start, "enc": enc, "count": len(found),
+                "strings": [{"offset": start + off, "text": s.decode("latin-1")} for off, s in found[:limit]]}
+
+    def covers(self, offset: int) -> dict:
+        hit = np.flatnonzero((self._starts <= offset) & (offset < self._ends))
+        return {"offset": offset, "covered_by": [self.spans[i] for i in hit.tolist()]}
+
+    def info(self) -> dict:
+        return {"path": os.path.abspath(self.payload.path), "size": self.size, "chunk": CHUNK,
+                "cached_chunks": self.cached_chunks(), "total_chunks": len(self._done),
+                "indexes": self.indexes,
+                "endpoints": ["/info", "/hexdump?offset=&length=", "/entropy?offset=&length=&window=",
+                              "/strings?offset=&length=&min=&enc=ascii|utf16le&limit=", "/covers?offset="]}
+
+def _int(q, name, default=None):
+    v = q.get(name, [None])[0]
+    return default if v in (None, "") else int(v, 0)
+
+ROUTES = {
+    "/info":    lambda ins, q: ins.info(),
+    "/hexdump": lambda ins, q: ins.hexdump(_int(q, "offset", 0), _int(q, "length", 256)),
+    "/entropy": lambda ins, q: ins.entropy(_int(q, "offset", 0), _int(q, "length"), _int(q, "window", CHUNK)),
+    "/strings": lambda ins, q: ins.strings(_int(q, "offset", 0), _int(q, "length", MAX_SCAN), _int(q, "min", 6),
+                                           q.get("enc", ["ascii"])[0], _int(q, "limit", 1000)),
+    "/covers":  lambda ins, q: ins.covers(_int(q, "offset", 0)),
+}
+
+class Handler(BaseHTTPRequestHandler):
+    inspector: Inspector = None
+    quiet = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        route = ROUTES.get("/info" if url.path == "/" else url.path)
+        t0 = time.perf_counter()
+        if route is None:
+            return self._send(404, {"error": f"unbekannter Pfad {url.path}", "endpoints": list(ROUTES)})
+        try:
+            res = route(self.inspector, parse_qs(url.query))
+        except ValueError as e:
+            return self._send(400, {"error": str(e)})
+        res["ms"] = round((time.perf_counter() - t0) * 1000, 3)
+        self._send(200, res)
+
+    def _send(self, status: int, obj: dict):
+        body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        if not self.quiet:
+            super().log_message(fmt, *args)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Lokaler HTTP-Dienst (127.0.0.1) für Abfragen gegen payload.raw: "
+                                             "Hexdump, Entropie, Strings, Abdeckung durch geschnittene Blöcke.")
+    ap.add_argument("-i", "--input", default=INPUT_DEFAULT, help="Pfad zu payload.raw")
+    ap.add_argument("-m", "--manifest", action="append",
+                    help="Index: _manifest_zlib_raw.json oder deflate_discovery.json (mehrfach möglich; "
+                         "Default: 01_ngp_analysis/members_zlib_raw/_manifest_zlib_raw.json, falls vorhanden)")
+    ap.add_argument("--port", type=int, default=PORT_DEFAULT, help=f"Port auf 127.0.0.1 (Default: {PORT_DEFAULT})")
+    ap.add_argument("--no-warm", action="store_true", help="Histogramme nicht vorab im Hintergrund berechnen")
+    ap.add_argument("--verbose", action="store_true", help="Jede Anfrage protokollieren")
+    args = ap.parse_args(argv)
+
+    manifests = args.manifest or ([MANIFEST_DEFAULT] if os.path.exists(MANIFEST_DEFAULT) else [])
+    ins = Inspector(args.input, manifests)
+    Handler.inspector, Handler.quiet = ins, not args.verbose
+    # nur lokal erreichbar – kein Host-Parameter
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    if not args.no_warm:
+        threading.Thread(target=ins.warm, daemon=True).start()
+    print(f"🔌 {args.input} ({ins.size} B, {len(ins.spans)} Spannen aus {len(ins.indexes)} Indizes)")
+    print(f"   http://127.0.0.1:{server.server_address[1]}/info  (Strg+C beendet)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        ins.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+import re, json
+from typing import Dict, Iterable
+
+CHUNK = 1 << 20  # Lesepuffer in Bytes
+
+_CONTAINER_SPECIAL = re.compile(rb'[\[\]{}"]')
+_SCALAR_END = re.compile(rb'[,}\]\s]')
+_WS = b" \t\r\n"
+_ESCAPES = {0x22: b'"', 0x5C: b"\\", 0x2F: b"/", 0x62: b"\b", 0x66: b"\f", 0x6E: b"\n", 0x72: b"\r", 0x74: b"\t"}
+
+class TopLevelReader:
+    """
+    Streamender Leser für die oberste Ebene eines JSON-Objekts (Binärdatei).
+    Werte werden nur gebaut, wenn man sie mit value() anfordert – alles andere
+    (z.B. der Base64-'payload') wird mit skip() überlesen, ohne im Speicher zu landen.
+
+        r = TopLevelReader(f)
+        for key in r.keys():
+            if key == "name": name = r.value()   # sonst automatisch übersprungen
+    """
+
+    def __init__(self, f, chunk_size: int = CHUNK):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = b""
+        self.pos = 0
+        self._fills = 0         # zählt Nachladevorgänge (Puffer-Positionen danach ungültig)
+        self._rec = None        # Liste aufgezeichneter Stücke während value()
+        self._rec_start = 0
+        self._open = False      # Wert des zuletzt gelieferten Schlüssels noch nicht gelesen
+
+    # ---------- Puffer ----------
+    def _fill(self) -> bool:
+        data = self.f.read(self.chunk_size)
+        if not data:
+            return False
+        if self._rec is not None:
+            self._rec.append(self.buf[self._rec_start:self.pos])
+            self._rec_start = 0
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        self._fills += 1
+        return True
+
+    def _peek(self) -> int:
+        """Nächstes Nicht-Leerzeichen (ohne es zu verbrauchen)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("unerwartetes Dateiende")
+
+    def _need(self, n: int):
+        """Mindestens n Bytes ab pos im Puffer."""
+        while len(self.buf) - self.pos < n:
+            if not self._fill():
+                raise ValueError("unerwartetes Dateiende im String")
+
+    def _expect(self, ch: bytes):
+        if self._peek() != ch[0]:
+            raise ValueError(f"erwartet {ch!r} an Position {self.pos}")
+        self.pos += 1
+
+    # ---------- Überlesen ----------
+    def _backslashes_before(self, i: int) -> int:
+        n = 0
+        while i - n > 0 and self.buf[i - n - 1] == 0x5C:
+            n += 1
+        return n
+
+    def _skip_string(self):
+        """
+        Ab dem öffnenden Anführungszeichen bis hinter das schließende. Sucht nur nach '"'
+        (memchr-schnell); ein Anführungszeichen ist escaped, wenn davor eine ungerade
+        Anzahl Backslashes steht.
+        """
+        self.pos += 1
+        while True:
+            i = self.buf.find(b'"', self.pos)
+            if i == -1:
+                # Backslashes am Pufferende behalten → Escape über die Puffergrenze bleibt erkennbar
+                self.pos = len(self.buf) - self._backslashes_before(len(self.buf))
+                if not self._fill():
+                    raise ValueError("unerwartetes Dateiende im String")
+                continue
+            self.pos = i + 1
+            if self._backslashes_before(i) % 2 == 0:
+                return
+
+    def _skip_container(self):
+        depth = 0
+        while True:
+            m = _CONTAINER_SPECIAL.search(self.buf, self.pos)
+            if m is None:
+                self.pos = len(self.buf)
+                if not self._fill():
+                    raise ValueError("unerwartetes Dateiende in Objekt/Array")
+                continue
+            i = m.start()
+            c = self.buf[i]
+            if c == 0x22:
+                self.pos = i
+                self._skip_string()
+                continue
+            self.pos = i + 1
+            depth += 1 if c in b"[{" else -1
+            if depth == 0:
+                return
+
+    def _skip_scalar(self):
+        while True:
+            m = _SCALAR_END.search(self.buf, self.pos)
+            if m is not None:
+                self.pos = m.start()
+                return
+            self.pos = len(self.buf)
+            if not self._fill():
+                return
+
+    def _skip_value(self):
+        c = self._peek()
+        if c == 0x22:
+            self._skip_string()
+        elif c in b"[{":
+            self._skip_container()
+        else:
+            self._skip_scalar()
+
+    # ---------- Öffentliche API ----------
+    def skip(self):
+        """Aktuellen Wert überlesen."""
+        self._open = False
+        self._skip_value()
+
+    def value(self):
+        """Aktuellen Wert vollständig parsen (für kleine Felder gedacht)."""
+        self._open = False
+        self._peek()
+        self._rec, self._rec_start = [], self.pos
+        try:
+            self._skip_value()
+            self._rec.append(self.buf[self._rec_start:self.pos])
+            raw = b"".join(self._rec)
+        finally:
+            self._rec = None
+        return json.loads(raw)
+
+    def iter_string(self):
+        """
+        Aktuellen String-Wert stückweise liefern (UTF-8-Bytes, Escapes aufgelöst).
+        Es liegt nie mehr als ein Lesepuffer im Speicher – für den Base64-'payload'.
+        """
+        self._open = False
+        if self._peek() != 0x22:
+            raise ValueError(f"String erwartet an Position {self.pos}")
+        self.pos += 1
+        q, fills = -1, None
+        while True:
+            # Anführungszeichen nur neu suchen, wenn der Puffer nachgeladen wurde oder pos es überholt hat
+            # (escaptes \") – sonst wird bei vielen Escapes der Rest des Puffers jedes Mal neu durchsucht
+            if fills != self._fills or -1 < q < self.pos:
+                q, fills = self.buf.find(b'"', self.pos), self._fills
+            bs = self.buf.find(b"\\", self.pos, len(self.buf) if q == -1 else q)
+            if bs != -1:
+                if bs > self.pos:
+                    yield self.buf[self.pos:bs]
+                self.pos = bs
+                self._need(2)
+                c = self.buf[self.pos + 1]
+                if c == 0x75:   # \uXXXX (ggf. Surrogatpaar)
+                    self._need(6)
+                    n = 6
+                    if 0xD800 <= int(self.buf[self.pos + 2:self.pos + 6], 16) < 0xDC00:
+                        try:
+                            self._need(12)
+                            if self.buf[self.pos + 6:self.pos + 8] == b"\\u" and \
+                                    0xDC00 <= int(self.buf[self.pos + 8:self.pos + 12], 16) < 0xE000:
+                                n = 12
+                        except ValueError:
+                            pass
+                    yield json.loads(b'"' + self.buf[self.pos:self.pos + n] + b'"').encode("utf-8", "surrogatepass")
+                    self.pos += n
+                elif c in _ESCAPES:
+                    yield _ESCAPES[c]
+                    self.pos += 2
+                else:
+                    raise ValueError(f"ungültiges Escape an Position {self.pos}")
+                continue
+            if q == -1:
+                if self.pos < len(self.buf):
+                    yield self.buf[self.pos:]
+                self.pos = len(self.buf)
+                if not self._fill():
+                    raise ValueError("unerwartetes Dateiende im String")
+                continue
+            if q > self.pos:
+                yield self.buf[self.pos:q]
+            self.pos = q + 1
+            return
+
+    def keys(self):
+        """Schlüssel der obersten Ebene; nicht abgeholte Werte werden übersprungen."""
+        if self._peek() == 0xEF and self.buf.startswith(b"\xef\xbb\xbf", self.pos):
+            self.pos += 3       # UTF-8-BOM
+        self._expect(b"{")
+        if self._peek() == 0x7D:
+            self.pos += 1
+            return
+        while True:
+            if self._peek() != 0x22:
+                raise ValueError(f"Schlüssel erwartet an Position {self.pos}")
+            key = self.value()
+            self._expect(b":")
+            self._open = True
+            yield key
+            if self._open:
+                self.skip()
+            c = self._peek()
+            self.pos += 1
+            if c == 0x7D:
+                return
+            if c != 0x2C:
+                raise ValueError(f"',' oder '}}' erwartet an Position {self.pos - 1}")
+
+def read_fields(path: str, fields: Iterable[str], chunk_size: int = CHUNK) -> Dict[str, object]:
+    """
+    Liest nur die gewünschten Top-Level-Felder einer JSON-Datei. Alle anderen Werte
+    werden überlesen; sobald alle Felder gefunden sind, wird abgebrochen.
+    """
+    wanted = set(fields)
+    found = {}
+    with open(path, "rb") as f:
+        reader = TopLevelReader(f, chunk_size)
+        for key in reader.keys():
+            if key in wanted and key not in found:
+                found[key] = reader.value()
+                if len(found) == len(wanted):
+                    break
+    return found
@@ -0,0 +1,127 @@
+import os, sys, time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# Laufzeit-Messung für die Analyse-Skripte: Wall-/CPU-Zeit je Stufe, Byte- und Versuchszähler,
+# Peak-RSS. Das Ergebnis (as_dict) landet im jeweiligen Manifest unter "metrics".
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+    except ImportError:
+        pass
+    try:
+        import psutil  # Windows: kein resource-Modul
+        return round(psutil.Process().memory_info().peak_wset / (1 << 20), 1)
+    except Exception:
+        return None
+
+def children_cpu() -> Optional[float]:
+    """CPU-Zeit beendeter Kindprozesse (z.B. Pool-Worker); None ohne resource-Modul."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return ru.ru_utime + ru.ru_stime
+
+class Metrics:
+    """
+    m = Metrics()
+    with m.stage("strings", nbytes=len(blob)): ...
+    m.count("attempts")
+    m.as_dict() → {"wall_s", "cpu_s", "peak_rss_mb", "stages": {...}, "counters": {...}, "rates": {...}}
+    (+ "cpu_children_s", wenn beendete Worker-Prozesse CPU verbraucht haben)
+    """
+
+    def __init__(self):
+        self._wall0 = time.perf_counter()
+        self._cpu0 = time.process_time()
+        self._children0 = children_cpu()
+        self.stages: Dict[str, dict] = {}
+        self.counters: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str, nbytes: int = 0):
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            st = self.stages.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "bytes": 0, "calls": 0})
+            st["wall_s"] += time.perf_counter() - wall
+            st["cpu_s"] += time.process_time() - cpu
+            st["bytes"] += nbytes
+            st["calls"] += 1
+
+    def count(self, name: str, n: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def wall(self) -> float:
+        return time.perf_counter() - self._wall0
+
+    def rates(self, wall: float) -> dict:
+        """Durchsatz: Versuche/s für *attempts-Zähler, MB/s für bytes_*-Zähler."""
+        out = {}
+        for k, v in self.counters.items():
+            if not wall:
+                break
+            if k.endswith("attempts"):
+                out[f"{k}_per_s"] = round(v / wall, 1)
+            elif k.startswith("bytes_"):
+                out[f"{k}_mb_s"] = round(v / (1 << 20) / wall, 2)
+        return out
+
+    def as_dict(self) -> dict:
+        wall = self.wall()
+        stages = {}
+        for name, st in self.stages.items():
+            stages[name] = {"wall_s": round(st["wall_s"], 4), "cpu_s": round(st["cpu_s"], 4), "calls": st["calls"]}
+            if st["bytes"]:
+                stages[name]["bytes"] = st["bytes"]
+                stages[name]["mb_s"] = round(st["bytes"] / (1 << 20) / st["wall_s"], 2) if st["wall_s"] else None
+        doc = {
+            "wall_s": round(wall, 4),
+            "cpu_s": round(time.process_time() - self._cpu0, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": stages,
+            "counters": dict(self.counters),
+            "rates": self.rates(wall),
+        }
+        now = children_cpu()
+        if now is not None and self._children0 is not None and now > self._children0:
+            doc["cpu_children_s"] = round(now - self._children0, 4)
+        return doc
+
+    def summary(self) -> str:
+        d = self.as_dict()
+        rates = ", ".join(f"{k}={v}" for k, v in d["rates"].items() if k.startswith("attempts"))
+        rss = f"{d['peak_rss_mb']} MB" if d["peak_rss_mb"] is not None else "?"
+        return f"{d['wall_s']:.2f} s wall, {d['cpu_s']:.2f} s CPU, Peak-RSS {rss}" + (f", {rates}" if rates else "")
+
+# ---------- Profiler ----------
+def add_profile_arg(ap):
+    ap.add_argument("--profile", nargs="?", const="", metavar="DATEI",
+                    help="cProfile-Ausgabe schreiben (.prof + Top-30 als .txt; Default: <out>/_profile.prof). "
+                         "Pool-Worker werden nicht mitprofiliert.")
+
+@contextmanager
+def profiled(path: Optional[str], default: str):
+    """cProfile um den Block, wenn path nicht None ist ('' → default). Sonst ohne Overhead."""
+    if path is None:
+        yield
+        return
+    import cProfile, pstats
+    path = path or default
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        prof.dump_stats(path)
+        with open(os.path.splitext(path)[0] + ".txt", "w", encoding="utf-8") as f:
+            pstats.Stats(prof, stream=f).sort_stats("cumulative").print_stats(30)
+        print(f"⏱️  Profil: {path} (snakeviz/pstats) + {os.path.splitext(path)[0]}.txt")
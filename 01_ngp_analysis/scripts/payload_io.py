@@ -0,0 +1,89 @@
+import io, os, mmap, hashlib
+
+class ViewReader(io.RawIOBase):
+    """
+    Seekbarer, read-only Datei-Wrapper um einen memoryview-Ausschnitt.
+    Ersetzt io.BytesIO(blob[off:]) für gzip/zipfile – ohne den Rest der Datei zu kopieren.
+    """
+
+    def __init__(self, view: memoryview):
+        self._view = view
+        self._pos = 0
+
+    def readable(self): return True
+    def seekable(self): return True
+    def tell(self): return self._pos
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            pos += self._pos
+        elif whence == io.SEEK_END:
+            pos += len(self._view)
+        if pos < 0:
+            raise ValueError("negative seek position")
+        self._pos = pos
+        return pos
+
+    def readinto(self, b):
+        chunk = self._view[self._pos:self._pos + len(b)]
+        n = len(chunk)
+        b[:n] = chunk
+        self._pos += n
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+class Payload:
+    """
+    Read-only Zugriff auf eine Payload-Datei über mmap + memoryview.
+    `view[a:b]` und `tail(off)` sind Zero-Copy; `mm` unterstützt find()/Regex direkt.
+    """
+
+    def __init__(self, path: str, sha256: str = None):
+        self.path = path
+        self._sha256 = sha256   # bekannt z.B. aus der Extraktion → nicht erneut hashen
+        self._f = open(path, "rb")
+        size = os.fstat(self._f.fileno()).st_size
+        # mmap kann keine leeren Dateien abbilden → leerer Puffer
+        self.mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.view = memoryview(self.mm)
+
+    def __len__(self):
+        return len(self.view)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def tail(self, offset: int) -> memoryview:
+        return self.view[offset:]
+
+    def slice(self, start: int, end: int = None) -> memoryview:
+        return self.view[start:end]
+
+    def reader(self, offset: int = 0, end: int = None) -> ViewReader:
+        """Dateiobjekt ab `offset` (z.B. für zipfile.ZipFile / gzip.GzipFile)."""
+        return ViewReader(self.view[offset:end])
+
+    def sha256(self) -> str:
+        if self._sha256 is None:
+            self._sha256 = hashlib.sha256(self.view).hexdigest()
+        return self._sha256
+
+    def close(self):
+        self.view.release()
+        if isinstance(self.mm, mmap.mmap):
+            try:
+                self.mm.close()
+            except BufferError:
+                # es hängen noch Slices am mmap → Freigabe übernimmt der GC
+                pass
+        self._f.close()
+
+def open_payload(path: str, sha256: str = None) -> Payload:
+    return Payload(path, sha256)
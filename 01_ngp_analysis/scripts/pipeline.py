@@ -0,0 +1,98 @@
+import os, json, time, shutil, hashlib
+from typing import Callable, Dict, List
+
+# Inkrementeller Lauf der Analyse-Stufen. Jede Stufe hat einen Schlüssel aus
+# sha256(Stufenname + Parameter + Inhalts-Hashes ihrer Eingaben). Stimmt er mit dem letzten Lauf
+# überein und liegen die Ausgaben noch vor, wird die Stufe übersprungen. Da die Eingabe-Hashes
+# die Ausgaben der Vorgänger sind, laufen nach einer Änderung genau die betroffenen Stufen neu.
+
+STATE_NAME = "_pipeline_state.json"
+STATE_VERSION = 1
+
+def file_sha256(path: str, chunk: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def stage_key(name: str, deps: Dict[str, str], params: dict) -> str:
+    blob = json.dumps({"stage": name, "deps": deps, "params": params}, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def remove(path: str):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+class Pipeline:
+    """Zustand in <out>/_pipeline_state.json; force = Stufen, die auf jeden Fall neu laufen ("all" = alle)."""
+
+    def __init__(self, out: str, force=()):
+        self.out = out
+        self.force = set(force)
+        self.path = os.path.join(out, STATE_NAME)
+        self.state = {"version": STATE_VERSION, "inputs": {}, "stages": {}}
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("version") == STATE_VERSION:
+                self.state = state
+        self.ran: List[str] = []
+        self.skipped: List[str] = []
+        self.timings: Dict[str, float] = {}
+
+    def save(self):
+        os.makedirs(self.out, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+    def input_hash(self, path: str) -> str:
+        """sha256 einer Eingabedatei; bei gleicher Größe/mtime wie im letzten Lauf aus dem Zustand."""
+        st = os.stat(path)
+        ap = os.path.abspath(path)
+        known = self.state["inputs"].get(ap)
+        if known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns:
+            return known["sha256"]
+        sha = file_sha256(path)
+        self.state["inputs"][ap] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha}
+        return sha
+
+    def fresh(self, name: str, key: str, outputs: List[str]) -> bool:
+        prev = self.state["stages"].get(name)
+        return (name not in self.force and "all" not in self.force and prev is not None
+                and prev["key"] == key and all(os.path.exists(p) for p in outputs))
+
+    def step(self, name: str, deps: Dict[str, str], params: dict, outputs: List[str],
+             fn: Callable[[], dict], clean: bool = True) -> dict:
+        """
+        Stufe ausführen oder überspringen; liefert das (gespeicherte) Ergebnis-Dict der Stufe.
+        clean=True löscht die Ausgaben vor einem Neulauf (keine Reste alter Parameter).
+        """
+        key = stage_key(name, deps, params)
+        if self.fresh(name, key, outputs):
+            print(f"⏭️  {name}: unverändert – übersprungen")
+            self.skipped.append(name)
+            return self.state["stages"][name]["result"]
+
+        print(f"\n▶️  {name} …")
+        if clean:
+            for p in outputs:
+                remove(p)
+        t = time.perf_counter()
+        result = fn()
+        self.timings[name] = time.perf_counter() - t
+        self.state["stages"][name] = {
+            "key": key, "deps": deps, "params": params,
+            "result": result, "seconds": round(self.timings[name], 3),
+        }
+        self.save()
+        self.ran.append(name)
+        return result
+
+    def summary(self) -> str:
+        ran = ", ".join(f"{n} {self.timings[n]:.2f} s" for n in self.ran) or "–"
+        return f"neu: {ran} | übersprungen: {', '.join(self.skipped) or '–'}"
@@ -0,0 +1,186 @@
+import os, sys, json, hashlib, argparse, importlib
+
+# Ein Einstieg für alle Analyse-Skripte: `python qc.py <befehl> [optionen]`.
+# Module werden erst beim Aufruf des jeweiligen Befehls importiert (numpy, zipfile, gzip, zstandard …)
+# → `qc.py --help` und kleine Befehle starten ohne die schweren Abhängigkeiten.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ANALYSIS_DIR = os.path.dirname(HERE)
+RUN_DEFAULT = os.path.join(ANALYSIS_DIR, "run")
+STORE_DEFAULT = os.path.join(ANALYSIS_DIR, "objects")   # wie cas.STORE_DEFAULT (ohne den Import beim Start)
+
+COMMANDS = {
+    "view":           ("view_backup",                      "Kurzübersicht einer backup.json"),
+    "explore":        ("backup_explorer",                  "Backups auflisten (Metadaten, Katalog)"),
+    "diff":           ("backup_diff",                      "Payloads zweier Backups vergleichen (CDC)"),
+    "extract":        ("extract_payload",                  "backup.json → payload.raw + Formaterkennung"),
+    "analyze-backup": ("analyze_backup",                   "Alle Base64-Felder einer backup.json extrahieren"),
+    "scan":           ("scan_payload",                     "payload.raw nach Strings/Signaturen durchsuchen"),
+    "members":        ("extract_compressed_members",       "GZIP/ZLIB-Members dekomprimieren"),
+    "carve":          ("extract_zlib_raw_blocks",          "Validierte ZLIB-Members ausschneiden / indexieren"),
+    "brute":          ("brute_decompress_zlib_blocks",     "Rohblöcke mit wbits-Varianten dekomprimieren"),
+    "brute-deep":     ("brute_decompress_zlib_blocks_deep", "Wie brute, zusätzlich mit Offsets (parallel)"),
+    "discover":       ("deflate_discover",                 "Raw-DEFLATE-Streams an jedem Offset suchen (parallel)"),
+    "stats":          ("analyze_block_stats",              "Entropie/Histogramm der Rohblöcke"),
+    "hexdump":        ("hexview",                          "Hexdump eines Offsets/Blocks/Treffers auf Abruf"),
+    "serve":          ("inspect_server",                   "Lokaler HTTP-Dienst: Hexdump/Entropie/Strings/Abdeckung auf Abruf"),
+    "entropy":        ("entropy_map",                      "Entropie-Karte über payload.raw"),
+    "cipher-index":   ("cipher_blocks",                    "Chiffrat-Blockindex über viele Backups (ECB/IV)"),
+    "randomness":     ("randomness",                       "NIST-Zufallstests für Payload und alle Blöcke"),
+    "batch":          ("batch_ingest",                     "Ganze Backup-Ordner parallel verarbeiten"),
+    "watch":          ("watch_ingest",                     "Backup-Ordner beobachten, neue Backups laufend einlesen"),
+    "bench":          ("benchmark",                        "Benchmarks auf synthetischem Korpus"),
+}
+
+def dispatch(cmd: str, argv):
+    """Befehl an main() des Skripts weiterreichen (argparse dort sieht nur die restlichen Argumente)."""
+    module = importlib.import_module(COMMANDS[cmd][0])
+    sys.argv = [f"qc {cmd}", *argv]
+    return module.main()
+
+def brute_argv(args, manifest: str, out: str) -> list:
+    argv = ["--manifest", manifest, "-o", out, "--top", str(args.top), "--store", args.store,
+            "--cache", os.path.join(args.out, "_attempts.sqlite")]
+    if args.wbits:
+        argv += ["--wbits", args.wbits]
+    if args.max_offset is not None:
+        argv += ["--max-offset", str(args.max_offset)]
+    if args.deep:
+        argv += ["--jobs", str(args.jobs)]
+    return argv
+
+def run(args):
+    """
+    Komplette Analyse einer backup.json: extract → scan → carve → brute → stats.
+    Inkrementell: Stufen, deren Eingaben (Inhalts-Hash) und Parameter unverändert sind, werden
+    übersprungen. payload.raw wird höchstens einmal geöffnet und als mmap/memoryview an alle
+    Stufen im Prozess gereicht.
+    """
+    from pipeline import Pipeline
+    from payload_io import open_payload
+
+    pipe = Pipeline(args.out, args.force)
+    ex_dir = os.path.join(args.out, "extracted")
+    scan_dir = os.path.join(args.out, "scan")
+    zr_dir = os.path.join(args.out, "members_zlib_raw")
+    brute_dir = os.path.join(args.out, "members_attempts_deep" if args.deep else "members_attempts")
+    report = os.path.join(args.out, "block_entropy_report.json")
+    opened = []   # höchstens eine geöffnete Payload pro Lauf
+    ext = {}
+
+    def payload():
+        if not opened:
+            opened.append(open_payload(ext["raw"], ext["sha256"]))
+        return opened[0]
+
+    def do_extract():
+        from extract_payload import extract
+        res = extract(args.input, ex_dir, keep_open=True)
+        opened.append(res.pop("payload"))
+        return res
+
+    def do_scan():
+        from scan_payload import scan
+        manifest = scan(payload(), scan_dir, args.minlen, args.maxhits)
+        return {"hits": {name: len(hits) for name, hits in manifest["hits"].items()}}
+
+    def do_carve():
+        from extract_zlib_raw_blocks import carve
+        blocks = carve(payload(), zr_dir, args.max, not args.files, args.naive_carve)
+        # Schlüssel für brute/stats: nur die Blockliste (das Manifest enthält auch Laufzeit-Messwerte)
+        digest = hashlib.sha256(json.dumps(blocks, sort_keys=True).encode("utf-8")).hexdigest()
+        return {"blocks": len(blocks), "manifest": os.path.join(zr_dir, "_manifest_zlib_raw.json"),
+                "blocks_sha256": digest if blocks else None}
+
+    def do_brute():
+        module = "brute_decompress_zlib_blocks_deep" if args.deep else "brute_decompress_zlib_blocks"
+        importlib.import_module(module).main(brute_argv(args, zr["manifest"], brute_dir))
+        with open(os.path.join(brute_dir, "_hits.json"), "r", encoding="utf-8") as f:
+            run_hits = json.load(f)
+        return {"hits": sum(b["hits"] for b in run_hits["blocks"]),
+                "attempts_per_s": run_hits["metrics"]["rates"].get("attempts_per_s")}
+
+    def do_stats():
+        from analyze_block_stats import block_stats, main as stats_main
+        blocks = stats_main(["--manifest", zr["manifest"], "-o", report]) if zr["blocks"] else []
+        whole = block_stats("payload.raw", payload().view)
+        return {"entropy": whole["entropy"], "top10": whole["top10"],
+                "blocks": [{k: r[k] for k in ("file", "size", "entropy")} for r in blocks]}
+
+    try:
+        ext.update(pipe.step("extract", {"backup": pipe.input_hash(args.input)}, {},
+                             [ex_dir, os.path.join(ex_dir, "payload.raw")], do_extract))
+        payload_dep = {"payload": ext["sha256"]}
+        scan = pipe.step("scan", payload_dep, {"minlen": args.minlen, "maxhits": args.maxhits},
+                         [scan_dir], do_scan)
+        zr = pipe.step("carve", payload_dep, {"max": args.max, "files": args.files, "naive": args.naive_carve},
+                       [zr_dir], do_carve)
+        blocks_dep = {**payload_dep, "blocks": zr["blocks_sha256"]}
+        brute = None
+        if zr["blocks"]:
+            brute = pipe.step("brute", blocks_dep,
+                              {"deep": args.deep, "top": args.top, "wbits": args.wbits, "max_offset": args.max_offset},
+                              [brute_dir], do_brute)
+        else:
+            print("⏭️  brute: keine ZLIB-Blöcke")
+        stats = pipe.step("stats", blocks_dep, {}, [report] if zr["blocks"] else [], do_stats)
+    finally:
+        for p in opened:
+            p.close()
+
+    summary = {
+        "input": args.input,
+        **ext,
+        "hits": scan["hits"],
+        "zlib_blocks": zr["blocks"],
+        "brute_hits": brute["hits"] if brute else 0,
+        "entropy": stats["entropy"],
+        "top10": stats["top10"],
+        "ran": pipe.ran,
+        "skipped": pipe.skipped,
+        "seconds": {k: round(v, 3) for k, v in pipe.timings.items()},
+    }
+    out = os.path.join(args.out, "_run_summary.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Analyse fertig ({pipe.summary()}) → {out}")
+
+def main():
+    ap = argparse.ArgumentParser(prog="qc", description="Quad-Cortex-Backup-Analyse: alle Werkzeuge unter einem Befehl.")
+    sub = ap.add_subparsers(dest="cmd", metavar="<befehl>")
+    for name, (_, help_text) in COMMANDS.items():
+        sub.add_parser(name, help=help_text, add_help=False)
+
+    rp = sub.add_parser("run", help="Komplette Analyse einer backup.json, inkrementell (extract → scan → carve → brute → stats)")
+    rp.add_argument("input", help="Pfad zu backup.json")
+    rp.add_argument("-o", "--out", default=RUN_DEFAULT, help="Ausgabeordner (Default: 01_ngp_analysis/run)")
+    rp.add_argument("--minlen", type=int, default=6, help="min. Stringlänge (Scan)")
+    rp.add_argument("--maxhits", type=int, default=1000, help="max. Treffer pro Kategorie (Scan)")
+    rp.add_argument("--max", type=int, default=100000, help="Sicherheitslimit für Anzahl ZLIB-Blöcke")
+    rp.add_argument("--files", action="store_true",
+                    help="ZLIB-Blöcke zusätzlich als .bin-Dateien schreiben (Default: nur Index-Manifest)")
+    rp.add_argument("--naive-carve", action="store_true",
+                    help="Alte Carving-Heuristik (78 01/9C/DA bis zum nächsten Treffer) statt validierter Members")
+    rp.add_argument("--deep", action="store_true", help="Brute-Stufe mit brute_decompress_zlib_blocks_deep")
+    rp.add_argument("--top", type=int, default=3, help="Größte N Blöcke brute-forcen (Default: 3)")
+    rp.add_argument("--wbits", help="wbits-Kandidaten für die Brute-Stufe (Default: wie im Skript)")
+    rp.add_argument("--max-offset", type=int, help="Offset-Scan der Brute-Stufe (Default: wie im Skript)")
+    rp.add_argument("--jobs", type=int, default=1, help="Worker-Prozesse für --deep (ändert keine Ergebnisse)")
+    rp.add_argument("--store", default=STORE_DEFAULT, help="Objekt-Store für Brute-Treffer (Default: 01_ngp_analysis/objects)")
+    rp.add_argument("--force", nargs="+", default=[], metavar="STUFE",
+                    choices=["all", "extract", "scan", "carve", "brute", "stats"],
+                    help="Stufen trotz unveränderter Eingaben neu ausführen ('all' = alle)")
+
+    args, rest = ap.parse_known_args()
+    if args.cmd is None:
+        ap.print_help()
+        sys.exit(1)
+    if args.cmd == "run":
+        if rest:
+            ap.error(f"unbekannte Argumente: {' '.join(rest)}")
+        return run(args)
+    # alles nach dem Befehl unverändert weiterreichen (auch -h/--help)
+    return dispatch(args.cmd, sys.argv[sys.argv.index(args.cmd) + 1:])
+
+if __name__ == "__main__":
+    main()
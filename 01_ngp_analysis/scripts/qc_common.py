@@ -0,0 +1,103 @@
+import os, glob, json, hashlib
+
+# Gemeinsame Helfer aller Analyse-Skripte. Schwere/optionale Module (gzip, zipfile,
+# zstandard) werden erst in den Funktionen importiert, die sie brauchen.
+
+MAGICS = {
+    b"PK\x03\x04": "zip",
+    b"\x1f\x8b": "gzip",
+    b"\x28\xb5\x2f\xfd": "zstd",
+    b"RIFF": "wav",
+    b"fLaC": "flac",
+    b"OggS": "ogg",
+}
+SNIFF_BYTES = 16
+
+_zstd = False  # False = noch nicht versucht, None = nicht installiert
+
+def zstd():
+    """zstandard-Modul (lazy) oder None, wenn nicht installiert (pip install zstandard)."""
+    global _zstd
+    if _zstd is False:
+        try:
+            import zstandard
+            _zstd = zstandard
+        except Exception:
+            _zstd = None
+    return _zstd
+
+def collect(inputs):
+    """Ordner (alle Backups darin) und/oder Glob-Muster → sortierte Liste von Backup-Dateien."""
+    files = set()
+    for item in inputs:
+        matches = glob.glob(os.path.join(item, "*.json")) if os.path.isdir(item) else glob.glob(item)
+        files.update(os.path.abspath(p) for p in matches
+                     if p.endswith(".json") and not p.endswith("_meta.json") and not os.path.basename(p).startswith("_"))
+    return sorted(files)
+
+def ensure_dir(p):
+    os.makedirs(p, exist_ok=True)
+
+def sha16(b) -> str:
+    return hashlib.sha256(b).hexdigest()[:16]
+
+def write_bytes(path: str, data):
+    ensure_dir(os.path.dirname(path) or ".")
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+def write_text(path: str, text: str):
+    ensure_dir(os.path.dirname(path) or ".")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+def _is_json(b) -> bool:
+    try:
+        json.loads(bytes(b).decode("utf-8"))
+        return True
+    except Exception:
+        return False
+
+def detect_format(b, head: bytes = None) -> str:
+    """
+    Container-Format über Magic-Bytes (zip/gzip/zstd/wav/flac/ogg), sonst json/binary.
+    head: bereits beim Streamen gesammelte Kopfbytes (dann wird b nur noch für den JSON-Check gelesen).
+    """
+    if head is None:
+        head = bytes(b[:SNIFF_BYTES])
+    for sig, name in MAGICS.items():
+        if head.startswith(sig):
+            return name
+    # JSON? (heuristisch, wird nur bei '{'/'[' geparst)
+    if head.lstrip()[:1] in (b"{", b"[") and _is_json(b):
+        return "json"
+    return "binary"
+
+def detect_kind(b) -> str:
+    """Art eines dekomprimierten Treffers: zip/gzip/json/text_like/bin (Dateiendungen der Brute-Forcer)."""
+    head = bytes(b[:SNIFF_BYTES])
+    if head.startswith(b"PK\x03\x04"): return "zip"
+    if head.startswith(b"\x1f\x8b\x08"): return "gzip"
+    if head.lstrip()[:1] in (b"{", b"["):
+        return "json" if _is_json(b) else "text_like"
+    return "bin"
+
+# Hexdump: bytes.hex(" ") + translate je 64-KB-Stück, Zeilen nur noch per Slicing (keine f-Strings pro Byte)
+_HEX_ASCII = bytes(b if 32 <= b < 127 else ord(".") for b in range(256))
+HEXDUMP_CHUNK = 1 << 16
+
+def iter_hexdump(data, offset: int = 0, length: int = 256, base: int = 0):
+    """Zeilen des Hexdumps von data[offset:offset+length]; Adresse = base + Position in data."""
+    end = min(offset + length, len(data)) if length is not None else len(data)
+    for pos in range(offset, end, HEXDUMP_CHUNK):
+        chunk = bytes(data[pos:min(pos + HEXDUMP_CHUNK, end)])
+        hexs = chunk.hex(" ")
+        text = chunk.translate(_HEX_ASCII).decode("ascii")
+        for i in range(0, len(chunk), 16):
+            yield f"{base + pos + i:08x}  {hexs[3 * i:3 * i + 47]:<48}  {text[i:i + 16]}"
+
+def hexdump(data, offset: int = 0, length: int = 256) -> str:
+    """Hexdump von data[offset:offset+length]; Adressen relativ zum Anfang von data."""
+    return "\n".join(iter_hexdump(data, offset, length))
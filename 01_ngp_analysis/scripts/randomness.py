@@ -0,0 +1,277 @@
+import os, json, math, argparse
+from contextlib import ExitStack
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from payload_io import open_payload
+from block_manifest import BlockSource, label
+
+# Statistische Zufallstests (Teilmenge von NIST SP 800-22) für Payloads und Manifest-Blöcke.
+# Alle Zählungen laufen byteweise über Lookup-Tabellen (Bits MSB-first), die p-Werte für alle
+# Regionen werden am Ende in einem vektorisierten igamc/erfc-Durchlauf berechnet.
+
+HERE = os.path.dirname(__file__)
+ANALYSIS_DIR = os.path.dirname(HERE)
+MANIFEST = os.path.join(ANALYSIS_DIR, "members_zlib_raw", "_manifest_zlib_raw.json")
+REPORT = os.path.join(ANALYSIS_DIR, "randomness_report.json")
+
+ALPHA = 0.01
+MIN_BYTES = 128          # 1024 Bits – darunter sind die Tests nicht aussagekräftig
+CHI2_MIN_BYTES = 1280    # Byte-Chi² erst ab ≥ 5 erwarteten Treffern pro Wert
+SERIAL_M = 5
+APEN_M = SERIAL_M - 1    # ApEn(m) braucht m- und (m+1)-Muster → dieselben Zählungen wie Serial
+
+TESTS = ("monobit", "block_frequency", "runs", "longest_run", "serial_1", "serial_2",
+         "approximate_entropy", "chi_square")
+
+# ---------- Lookup-Tabellen pro Byte ----------
+def _bits(i: int) -> str:
+    return format(i, "08b")
+
+POPCOUNT = np.array([_bits(i).count("1") for i in range(256)], dtype=np.uint8)
+# Bitwechsel innerhalb eines Bytes (7 Nachbarpaare)
+TRANSITIONS = np.array([bin((i ^ (i >> 1)) & 0x7F).count("1") for i in range(256)], dtype=np.uint8)
+LEAD_ONES = np.array([len(_bits(i)) - len(_bits(i).lstrip("1")) for i in range(256)], dtype=np.int32)
+TRAIL_ONES = np.array([len(_bits(i)) - len(_bits(i).rstrip("1")) for i in range(256)], dtype=np.int32)
+INNER_ONES = np.array([max(len(r) for r in _bits(i).split("0")) for i in range(256)], dtype=np.int32)
+
+# Longest-Run-Test: (Blocklänge M, kleinste/größte Klasse, Wahrscheinlichkeiten) je nach n
+LONGEST_RUN = (
+    (6272,   8,     1,  4, (0.2148, 0.3672, 0.2305, 0.1875)),
+    (750000, 128,   4,  9, (0.1174, 0.2430, 0.2493, 0.1752, 0.1027, 0.1124)),
+    (None,   10000, 10, 16, (0.0882, 0.2092, 0.2483, 0.1933, 0.1208, 0.0675, 0.0727)),
+)
+
+# ---------- Spezielle Funktionen (vektorisiert, ohne SciPy) ----------
+_lgamma = np.vectorize(math.lgamma, otypes=[float])
+_erfc = np.vectorize(math.erfc, otypes=[float])
+EPS, FPMIN, ITER = 1e-14, 1e-300, 2000
+
+def _gser(a, x):
+    """Reihenentwicklung der regularisierten unteren Gammafunktion P(a, x) (x < a+1)."""
+    ap, term = a.copy(), 1.0 / a
+    total = term.copy()
+    for _ in range(ITER):
+        ap += 1
+        term *= x / ap
+        total += term
+        if np.all(np.abs(term) < np.abs(total) * EPS):
+            break
+    return total * np.exp(-x + a * np.log(x) - _lgamma(a))
+
+def _gcf(a, x):
+    """Kettenbruch (modifizierter Lentz) für Q(a, x) (x ≥ a+1)."""
+    b = x + 1 - a
+    c = np.full_like(a, 1 / FPMIN)
+    d = 1 / b
+    h = d.copy()
+    for i in range(1, ITER):
+        an = -i * (i - a)
+        b = b + 2
+        d = an * d + b
+        d[np.abs(d) < FPMIN] = FPMIN
+        c = b + an / c
+        c[np.abs(c) < FPMIN] = FPMIN
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if np.all(np.abs(delta - 1) < EPS):
+            break
+    return np.exp(-x + a * np.log(x) - _lgamma(a)) * h
+
+def igamc(a, x) -> np.ndarray:
+    """Regularisierte obere unvollständige Gammafunktion Q(a, x), elementweise."""
+    a, x = np.broadcast_arrays(np.asarray(a, dtype=float), np.asarray(x, dtype=float))
+    q = np.ones(a.shape)
+    pos = x > 0
+    big = pos & (a > 200)              # Wilson-Hilferty: χ² mit 2a Freiheitsgraden ≈ normal
+    ser = pos & ~big & (x < a + 1)
+    cf = pos & ~big & ~ser
+    if big.any():
+        ab, xb = a[big], x[big]
+        z = (np.cbrt(xb / ab) - (1 - 1 / (9 * ab))) / np.sqrt(1 / (9 * ab))
+        q[big] = 0.5 * _erfc(z / math.sqrt(2))
+    if ser.any():
+        q[ser] = 1 - _gser(a[ser], x[ser])
+    if cf.any():
+        q[cf] = _gcf(a[cf], x[cf])
+    return np.clip(q, 0.0, 1.0)
+
+# ---------- Teststatistiken pro Region ----------
+def longest_runs(blocks: np.ndarray) -> np.ndarray:
+    """Längster Einser-Lauf je Zeile von blocks (N × Bytes), Spalte für Spalte über alle Zeilen zugleich."""
+    first = blocks[:, 0]
+    best = INNER_ONES[first]
+    carry = TRAIL_ONES[first]          # Einser-Lauf, der am Ende des bisherigen Blocks endet
+    for j in range(1, blocks.shape[1]):
+        x = blocks[:, j]
+        best = np.maximum(best, np.maximum(INNER_ONES[x], carry + LEAD_ONES[x]))
+        carry = np.where(x == 0xFF, carry + 8, TRAIL_ONES[x])
+    return best
+
+def pattern_counts(x: np.ndarray, m: int) -> np.ndarray:
+    """Zyklische Häufigkeiten aller überlappenden m-Bit-Muster (m ≤ 8) über den Bitstrom von x."""
+    ext = np.concatenate([x, x[:1]]).astype(np.uint16)
+    words = (ext[:-1] << 8) | ext[1:]
+    mask = (1 << m) - 1
+    counts = np.zeros(1 << m, dtype=np.int64)
+    for j in range(8):
+        counts += np.bincount((words >> (16 - j - m)) & mask, minlength=1 << m)
+    return counts
+
+def marginal(counts: np.ndarray) -> np.ndarray:
+    """Zählungen der (m-1)-Bit-Präfixe aus den m-Bit-Zählungen (zyklisch exakt)."""
+    return counts[0::2] + counts[1::2]
+
+def region_stats(data) -> dict:
+    """
+    Rohstatistiken einer Region: Bit-/Byte-Zählungen und die Argumente für igamc/erfc.
+    Rückgabe: {"n_bits", "ones", "entropy", "erfc": {test: z}, "igamc": {test: (a, x)}, "fixed": {test: p}}
+    """
+    x = np.frombuffer(data, dtype=np.uint8)
+    nbytes = len(x)
+    n = 8 * nbytes
+    res = {"n_bits": n, "erfc": {}, "igamc": {}, "fixed": {}}
+    byte_counts = np.bincount(x, minlength=256)
+    p = byte_counts[byte_counts > 0] / max(nbytes, 1)
+    res["entropy"] = round(float(-(p * np.log2(p)).sum()), 4) if nbytes else 0.0
+    ones = int((byte_counts * POPCOUNT).sum())
+    res["ones"] = ones
+    if nbytes < MIN_BYTES:
+        return res
+
+    # Monobit
+    res["erfc"]["monobit"] = abs(2 * ones - n) / math.sqrt(n) / math.sqrt(2)
+
+    # Blockhäufigkeit: M so, dass höchstens ~100 Blöcke entstehen (NIST-Empfehlung N < 100)
+    mb = max(16, -(-nbytes // 100))
+    nblk = nbytes // mb
+    sums = POPCOUNT[x[:nblk * mb]].reshape(nblk, mb).sum(axis=1, dtype=np.int64)
+    pi = sums / (8 * mb)
+    res["igamc"]["block_frequency"] = (nblk / 2, 4 * 8 * mb * float(((pi - 0.5) ** 2).sum()) / 2)
+
+    # Runs (Vorbedingung: Monobit-Anteil nahe 1/2)
+    prop = ones / n
+    if abs(prop - 0.5) >= 2 / math.sqrt(n):
+        res["fixed"]["runs"] = 0.0
+    else:
+        v = 1 + int(TRANSITIONS[x].sum(dtype=np.int64)) + int(np.count_nonzero((x[:-1] & 1) != (x[1:] >> 7)))
+        res["erfc"]["runs"] = abs(v - 2 * n * prop * (1 - prop)) / (2 * math.sqrt(2 * n) * prop * (1 - prop))
+
+    # Längster Einser-Lauf je Block
+    for limit, m_bits, lo, hi, probs in LONGEST_RUN:
+        if limit is None or n < limit:
+            break
+    mb = m_bits // 8
+    nblk = nbytes // mb
+    runs = longest_runs(x[:nblk * mb].reshape(nblk, mb))
+    v = np.bincount(np.clip(runs, lo, hi) - lo, minlength=len(probs))
+    exp = nblk * np.array(probs)
+    res["igamc"]["longest_run"] = ((len(probs) - 1) / 2, float(((v - exp) ** 2 / exp).sum()) / 2)
+
+    # Serial (m) und Approximate Entropy (m-1) aus denselben zyklischen Musterzählungen
+    m = SERIAL_M
+    cm = pattern_counts(x, m)
+    cm1 = marginal(cm)
+    cm2 = marginal(cm1)
+    psi = [(2 ** k / n) * float((c.astype(np.float64) ** 2).sum()) - n for k, c in ((m, cm), (m - 1, cm1), (m - 2, cm2))]
+    res["igamc"]["serial_1"] = (2 ** (m - 2), (psi[0] - psi[1]) / 2)
+    res["igamc"]["serial_2"] = (2 ** (m - 3), (psi[0] - 2 * psi[1] + psi[2]) / 2)
+
+    def phi(c):
+        f = c[c > 0] / n
+        return float((f * np.log(f)).sum())
+    apen = phi(cm1) - phi(cm)
+    res["igamc"]["approximate_entropy"] = (2 ** (APEN_M - 1), n * (math.log(2) - apen))
+
+    # Chi² über die Byte-Verteilung (255 Freiheitsgrade)
+    if nbytes >= CHI2_MIN_BYTES:
+        e = nbytes / 256
+        res["igamc"]["chi_square"] = (127.5, float(((byte_counts - e) ** 2 / e).sum()) / 2)
+    return res
+
+# ---------- Batterie ----------
+def battery(regions: Sequence, names: Sequence[str], alpha: float = ALPHA) -> List[dict]:
+    """
+    Alle Tests für alle Regionen (memoryviews/bytes) in einem Aufruf.
+    Pro Region: {"region", "size", "entropy", "p": {test: p|None}, "min_p", "failed", "verdict"}.
+    """
+    stats = [region_stats(r) for r in regions]
+
+    # p-Werte gesammelt und vektorisiert berechnen
+    ig = [(i, t, a, x) for i, s in enumerate(stats) for t, (a, x) in s["igamc"].items()]
+    er = [(i, t, z) for i, s in enumerate(stats) for t, z in s["erfc"].items()]
+    pvals: List[Dict[str, float]] = [dict(s["fixed"]) for s in stats]
+    if ig:
+        q = igamc([a for _, _, a, _ in ig], [x for _, _, _, x in ig])
+        for (i, t, _, _), p in zip(ig, q):
+            pvals[i][t] = float(p)
+    if er:
+        q = _erfc(np.array([z for _, _, z in er]))
+        for (i, t, _), p in zip(er, q):
+            pvals[i][t] = float(p)
+
+    out = []
+    for name, s, p in zip(names, stats, pvals):
+        ps = {t: (round(p[t], 6) if t in p else None) for t in TESTS}
+        valid = [v for v in ps.values() if v is not None]
+        failed = [t for t, v in ps.items() if v is not None and v < alpha]
+        if not valid:
+            verdict = "zu klein"
+        else:
+            verdict = "nicht zufällig" if failed else "zufällig"
+        out.append({"region": name, "size": s["n_bits"] // 8, "entropy": s["entropy"],
+                    "ones_ratio": round(s["ones"] / s["n_bits"], 5) if s["n_bits"] else None,
+                    "p": ps, "min_p": min(valid) if valid else None, "failed": failed, "verdict": verdict})
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Zufallstests (NIST SP 800-22 Teilmenge + Chi²) für Payloads und alle Manifest-Blöcke.")
+    ap.add_argument("--manifest", action="append",
+                    help="Block-Manifest(e); mehrfach angebbar (Default: 01_ngp_analysis/members_zlib_raw/_manifest_zlib_raw.json)")
+    ap.add_argument("--payload", action="append", default=[],
+                    help="Zusätzliche ganze Payloads ohne Manifest (mehrfach angebbar)")
+    ap.add_argument("--no-blocks", action="store_true", help="Nur ganze Payloads testen, keine Einzelblöcke")
+    ap.add_argument("--alpha", type=float, default=ALPHA, help="Signifikanzniveau (Default: 0.01)")
+    ap.add_argument("-o", "--out", default=REPORT, help="Report (Default: 01_ngp_analysis/randomness_report.json)")
+    args = ap.parse_args()
+
+    manifests = args.manifest or ([] if args.payload else [MANIFEST])
+    regions, names = [], []
+    with ExitStack() as stack:
+        for path in manifests:
+            src = stack.enter_context(BlockSource(path))
+            if src.payload is not None:
+                regions.append(src.payload.view)
+                names.append(src.payload.path)
+            if not args.no_blocks:
+                for rec in src.blocks:
+                    regions.append(stack.enter_context(src.open(rec)))
+                    names.append(label(rec))
+        for path in args.payload:
+            regions.append(stack.enter_context(open_payload(path)).view)
+            names.append(path)
+
+        results = battery(regions, names, args.alpha)
+        regions.clear()
+
+    verdicts = {}
+    for r in results:
+        verdicts[r["verdict"]] = verdicts.get(r["verdict"], 0) + 1
+    for r in results[:20]:
+        fails = f" ✗ {', '.join(r['failed'])}" if r["failed"] else ""
+        min_p = f"{r['min_p']:.4f}" if r["min_p"] is not None else "–"
+        name = r["region"] if len(r["region"]) <= 48 else "…" + r["region"][-47:]
+        print(f"  {name:<48} | {r['size']:>9} B | H={r['entropy']:.4f} | min p={min_p} | {r['verdict']}{fails}")
+    if len(results) > 20:
+        print(f"  … (+{len(results) - 20} weitere Regionen)")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"alpha": args.alpha, "tests": TESTS, "summary": verdicts, "regions": results},
+                  f, ensure_ascii=False, indent=2)
+    print(f"\n📊 {len(results)} Regionen: " + ", ".join(f"{k}={v}" for k, v in verdicts.items()))
+    print(f"✅ Report gespeichert: {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,12 @@
-import os, re, io, json, gzip, zipfile, argparse, hashlib, base64, binascii
+import os, re, json, argparse
 from typing import List, Tuple
 
-# Optional: Zstandard (empfohlen)
-try:
-    import zstandard as zstd  # pip install zstandard
-except Exception:
-    zstd = None
+import sigscan
+from payload_io import Payload, open_payload, ViewReader
+from qc_common import MAGICS, zstd, detect_format, write_bytes, write_text
+from metrics import Metrics, add_profile_arg, profiled
 
 PRINTABLE = bytes(range(0x20, 0x7f)) + b"\t"
-MAGICS = {
-    b"PK\x03\x04": "zip",
-    b"\x1f\x8b":   "gzip",
-    b"\x28\xb5\x2f\xfd": "zstd",
-    b"RIFF": "wav",
-    b"fLaC": "flac",
-    b"OggS": "ogg",
-}
 
 def project_paths():
     # script: .../01_ngp_analysis/scripts/scan_payload.py
@@ -33,168 +24,144 @@ def find_all(data: bytes, needle: bytes) -> List[int]:
         pos += 1
     return hits
 
-def ascii_strings(data: bytes, min_len=5) -> List[Tuple[int, bytes]]:
-    s, out, start = [], [], None
-    for i, b in enumerate(data):
-        if b in PRINTABLE:
-            if start is None: start = i
-            s.append(b)
-        else:
-            if start is not None and len(s) >= min_len:
-                out.append((start, bytes(s)))
-            s, start = [], None
-    if start is not None and len(s) >= min_len:
-        out.append((start, bytes(s)))
-    return out
-
-def utf16le_strings(data: bytes, min_len=5) -> List[Tuple[int, bytes]]:
-    out = []
-    i = 0
-    while i + 2*min_len <= len(data):
-        j = i
-        ok = 0
-        buf = []
-        while j + 1 < len(data):
-            ch = data[j]
-            z  = data[j+1]
-            if z == 0 and (ch in PRINTABLE):
-                buf.append(ch)
-                ok += 1
-                j += 2
-            else:
+# Klassen-Tabelle für bytes.translate: PRINTABLE → "p", 0x00 → "z", Rest → "x".
+# Auf dem übersetzten Puffer sind die String-Muster reine Literale → schneller Regex-Prefix-Scan.
+_CLASS_TABLE = bytes(ord("p") if b in PRINTABLE else ord("z") if b == 0 else ord("x") for b in range(256))
+STRINGS_CHUNK = 16 * 1024 * 1024  # 16 MB pro Durchlauf
+
+def iter_strings(data, unit_pattern: bytes, min_len: int, chunk_size: int = STRINGS_CHUNK):
+    """
+    Liefert (offset, rohbytes) aller Läufe von >= min_len Einheiten `unit_pattern`
+    (b"p" = ASCII-Zeichen, b"pz" = UTF-16LE-Zeichen). Arbeitet blockweise; Chunks
+    überlappen um min_len Einheiten, und Treffer, die bis an die Chunk-Grenze reichen,
+    werden im nächsten Chunk ab ihrem Start neu gesucht → nichts geht an Grenzen verloren.
+    """
+    unit = len(unit_pattern)
+    pattern = re.compile(re.escape(unit_pattern * min_len) + b"(?:" + re.escape(unit_pattern) + b")*")
+    n = len(data)
+    overlap = unit * min_len
+    chunk_size = max(chunk_size, 2 * overlap)
+    pos, size = 0, chunk_size
+    while pos < n:
+        end = min(pos + size, n)
+        window = bytes(data[pos:end])
+        nxt = end - overlap if end < n else n
+        carried = False
+        for m in pattern.finditer(window.translate(_CLASS_TABLE)):
+            if end < n and m.end() > len(window) - unit:
+                # könnte im nächsten Chunk weitergehen → ab Match-Start erneut suchen
+                nxt = pos + m.start()
+                carried = True
                 break
-        if ok >= min_len:
-            out.append((i, bytes(buf)))
-            i = j
-        else:
-            i += 1
-    return out
-
-def try_gzip(raw: bytes):
+            yield pos + m.start(), window[m.start():m.end()]
+            nxt = max(nxt, pos + m.end())
+        if carried and nxt == pos:
+            size *= 2        # String länger als ein Chunk → Fenster vergrößern
+            continue
+        pos, size = nxt, chunk_size
+
+def ascii_strings(data: bytes, min_len=5, chunk_size: int = STRINGS_CHUNK) -> List[Tuple[int, bytes]]:
+    return list(iter_strings(data, b"p", min_len, chunk_size))
+
+def utf16le_strings(data: bytes, min_len=5, chunk_size: int = STRINGS_CHUNK) -> List[Tuple[int, bytes]]:
+    # nur die Zeichen-Bytes zurückgeben (jedes zweite Byte)
+    return [(off, s[::2]) for off, s in iter_strings(data, b"pz", min_len, chunk_size)]
+
+def try_gzip(raw):
+    # GzipFile über einen memoryview-Reader → kein Kopieren des Datei-Rests
+    import gzip
     try:
-        return gzip.decompress(raw)
+        with gzip.GzipFile(fileobj=ViewReader(memoryview(raw))) as gz:
+            return gz.read()
     except Exception:
         return None
 
-def try_zstd(raw: bytes):
-    if not zstd:
+def try_zstd(raw):
+    z = zstd()
+    if not z:
         return None
     try:
-        d = zstd.ZstdDecompressor()
-        return d.decompress(raw)
+        return z.ZstdDecompressor().decompress(raw)
     except Exception:
         return None
 
-def write(path: str, data: bytes):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "wb") as f:
-        f.write(data)
-
-def write_text(path: str, text: str):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(text)
-
-def hexdump(data: bytes, offset: int, length: int = 256) -> str:
-    chunk = data[offset:offset+length]
-    lines = []
-    for i in range(0, len(chunk), 16):
-        row = chunk[i:i+16]
-        hexpart = " ".join(f"{b:02x}" for b in row)
-        asciip = "".join(chr(b) if 32 <= b < 127 else "." for b in row)
-        lines.append(f"{offset+i:08x}  {hexpart:<48}  {asciip}")
-    return "\n".join(lines)
-
-def detect_kind(b: bytes) -> str:
-    for sig, name in MAGICS.items():
-        if b.startswith(sig):
-            return name
-    head = b.lstrip()[:1]
-    if head in (b"{", b"["):
-        try:
-            json.loads(b.decode("utf-8"))
-            return "json"
-        except Exception:
-            pass
-    return "binary"
-
-def main():
-    here, analysis_dir, extracted_dir = project_paths()
-
-    ap = argparse.ArgumentParser(description="Scan QC payload.raw for embedded artifacts.")
-    ap.add_argument("-i", "--input", default=os.path.join(extracted_dir, "payload.raw"),
-                    help="Pfad zur payload.raw (Default: 01_ngp_analysis/extracted/payload.raw)")
-    ap.add_argument("-o", "--out", default=os.path.join(analysis_dir, "scan"),
-                    help="Ausgabeordner (Default: 01_ngp_analysis/scan)")
-    ap.add_argument("--minlen", type=int, default=6, help="min. Stringlänge")
-    ap.add_argument("--maxhits", type=int, default=1000, help="max. Treffer pro Kategorie")
-    args = ap.parse_args()
-
-    with open(args.input, "rb") as f:
-        blob = f.read()
-    os.makedirs(args.out, exist_ok=True)
+def scan(source, out: str, minlen: int = 6, maxhits: int = 1000) -> dict:
+    """
+    Kompletter Scan einer payload.raw nach `out`; liefert das Manifest (auch für batch_ingest).
+    source: Pfad oder bereits geöffnete Payload (wird dann nicht geschlossen, z.B. aus `qc run`).
+    """
+    payload = source if isinstance(source, Payload) else open_payload(source)
+    input_path = payload.path
+    blob = payload.view  # Zero-Copy: Slices sind memoryviews auf das mmap
+    metrics = Metrics()
+    os.makedirs(out, exist_ok=True)
 
     # 1) Strings (ASCII & UTF-16LE)
-    asc = ascii_strings(blob, min_len=args.minlen)
-    u16 = utf16le_strings(blob, min_len=args.minlen)
-
-    write_text(os.path.join(args.out, "strings_ascii.txt"),
-               "\n".join(f"{off:08x}: {s.decode('latin-1', 'replace')}" for off, s in asc[:args.maxhits]))
-    write_text(os.path.join(args.out, "strings_utf16le.txt"),
-               "\n".join(f"{off:08x}: {s.decode('latin-1', 'replace')}" for off, s in u16[:args.maxhits]))
-    print(f"[+] ASCII-Strings: {len(asc)}  → {os.path.join(args.out, 'strings_ascii.txt')}")
-    print(f"[+] UTF16LE-Strings: {len(u16)} → {os.path.join(args.out, 'strings_utf16le.txt')}")
-
-    # 2) Magic scans
-    report = {"file": args.input, "size": len(blob), "hits": {}}
-    for sig, name in MAGICS.items():
-        hits = find_all(blob, sig)
+    with metrics.stage("strings_ascii", len(blob)):
+        asc = ascii_strings(blob, min_len=minlen)
+    with metrics.stage("strings_utf16le", len(blob)):
+        u16 = utf16le_strings(blob, min_len=minlen)
+
+    write_text(os.path.join(out, "strings_ascii.txt"),
+               "\n".join(f"{off:08x}: {s.decode('latin-1', 'replace')}" for off, s in asc[:maxhits]))
+    write_text(os.path.join(out, "strings_utf16le.txt"),
+               "\n".join(f"{off:08x}: {s.decode('latin-1', 'replace')}" for off, s in u16[:maxhits]))
+    print(f"[+] ASCII-Strings: {len(asc)}  → {os.path.join(out, 'strings_ascii.txt')}")
+    print(f"[+] UTF16LE-Strings: {len(u16)} → {os.path.join(out, 'strings_utf16le.txt')}")
+
+    # 2) Magic scans (alle Signaturen in einem Durchlauf)
+    report = {"file": input_path, "size": len(blob), "hits": {}}
+    with metrics.stage("sigscan", len(blob)):
+        found = sigscan.scan(blob, MAGICS.values())
+    for name in MAGICS.values():
+        hits = found[name].tolist()
         report["hits"][name] = hits
         print(f"[scan] {name}: {len(hits)} Treffer")
-        # für jeden Treffer: Hex-Vorschau schreiben
-        for k, off in enumerate(hits[:min(len(hits), 20)]):
-            hd = hexdump(blob, off, 128)
-            write_text(os.path.join(args.out, f"hexdump_{name}_{k:03d}_off_{off}.txt"), hd)
 
     # 3) Eingebettete ZIPs extrahieren
+    import zipfile
     for off in report["hits"].get("zip", []):
         try:
-            zdir = os.path.join(args.out, f"embedded_zip_off_{off}")
+            zdir = os.path.join(out, f"embedded_zip_off_{off}")
             os.makedirs(zdir, exist_ok=True)
-            with zipfile.ZipFile(io.BytesIO(blob[off:])) as zf:
+            with metrics.stage("zip"), zipfile.ZipFile(payload.reader(off)) as zf:
                 zf.extractall(zdir)
             print(f"[+] ZIP extrahiert @ {off} → {zdir}")
         except Exception as e:
-            write_text(os.path.join(args.out, f"zip_error_off_{off}.txt"), f"{e}")
+            write_text(os.path.join(out, f"zip_error_off_{off}.txt"), f"{e}")
 
     # 4) GZIP / ZSTD Frames dekomprimieren (ab jedem Treffer)
     for off in report["hits"].get("gzip", []):
-        dec = try_gzip(blob[off:])
+        with metrics.stage("gzip"):
+            dec = try_gzip(blob[off:])
         if dec:
-            path = os.path.join(args.out, f"gzip_off_{off}.bin")
-            write(path, dec)
-            kind = detect_kind(dec)
+            metrics.count("gzip_bytes_out", len(dec))
+            path = os.path.join(out, f"gzip_off_{off}.bin")
+            write_bytes(path, dec)
+            kind = detect_format(dec)
             print(f"[+] GZIP @ {off} → {path} (kind={kind}, {len(dec)} bytes)")
     for off in report["hits"].get("zstd", []):
-        if zstd:
+        if zstd():
             try:
-                d = zstd.ZstdDecompressor().decompress(blob[off:])
-                path = os.path.join(args.out, f"zstd_off_{off}.bin")
-                write(path, d)
-                kind = detect_kind(d)
+                with metrics.stage("zstd"):
+                    d = zstd().ZstdDecompressor().decompress(blob[off:])
+                path = os.path.join(out, f"zstd_off_{off}.bin")
+                write_bytes(path, d)
+                kind = detect_format(d)
                 print(f"[+] ZSTD @ {off} → {path} (kind={kind}, {len(d)} bytes)")
             except Exception as e:
-                write_text(os.path.join(args.out, f"zstd_error_off_{off}.txt"), str(e))
+                write_text(os.path.join(out, f"zstd_error_off_{off}.txt"), str(e))
         else:
             print("[i] ZSTD-Treffer gefunden, aber Modul nicht installiert (pip install zstandard).")
 
     # 5) JSON-Schnipsel heuristisch (Fenster um '{')
-    brace_hits = [m.start() for m in re.finditer(rb"\{", blob)]
+    with metrics.stage("json_braces", len(blob)):
+        brace_hits = [m.start() for m in re.finditer(rb"\{", blob)]
 
-    preview_path = os.path.join(args.out, "json_previews.txt")
+    preview_path = os.path.join(out, "json_previews.txt")
     previews = []
     for idx, off in enumerate(brace_hits[:200]):  # Deckel drauf
-        window = blob[max(0, off - 64): off + 512]
+        window = bytes(blob[max(0, off - 64): off + 512])
         try:
             txt = window.decode("utf-8", "ignore")
         except Exception:
@@ -205,20 +172,45 @@ def main():
 
     # 6) Manifest speichern
     manifest = {
-        "file": args.input,
+        "file": input_path,
         "size": len(blob),
-        "sha256": hashlib.sha256(blob).hexdigest(),
+        "sha256": payload.sha256(),
         "hits": report["hits"],
         "outputs": {
-            "strings_ascii": os.path.join(args.out, "strings_ascii.txt"),
-            "strings_utf16le": os.path.join(args.out, "strings_utf16le.txt"),
+            "strings_ascii": os.path.join(out, "strings_ascii.txt"),
+            "strings_utf16le": os.path.join(out, "strings_utf16le.txt"),
             "json_previews": preview_path,
-        }
+        },
+        "metrics": metrics.as_dict(),
     }
-    with open(os.path.join(args.out, "_manifest_scan.json"), "w", encoding="utf-8") as f:
+    with open(os.path.join(out, "_manifest_scan.json"), "w", encoding="utf-8") as f:
         json.dump(manifest, f, ensure_ascii=False, indent=2)
-    print(f"[✓] Manifest → {os.path.join(args.out, '_manifest_scan.json')}")
+    print(f"[✓] Manifest → {os.path.join(out, '_manifest_scan.json')}")
+    first = next((name for name, hits in report["hits"].items() if hits), None)
+    if first:
+        # Hex-Vorschau der Treffer auf Abruf statt als Dateien
+        print(f"[i] Hexdump eines Treffers: python qc.py hexdump -m {os.path.join(out, '_manifest_scan.json')} --hit {first}:0")
+    print(f"⏱️  {metrics.summary()}")
+    if payload is not source:
+        payload.close()
     print("Done.")
+    return manifest
+
+def main():
+    here, analysis_dir, extracted_dir = project_paths()
+
+    ap = argparse.ArgumentParser(description="Scan QC payload.raw for embedded artifacts.")
+    ap.add_argument("-i", "--input", default=os.path.join(extracted_dir, "payload.raw"),
+                    help="Pfad zur payload.raw (Default: 01_ngp_analysis/extracted/payload.raw)")
+    ap.add_argument("-o", "--out", default=os.path.join(analysis_dir, "scan"),
+                    help="Ausgabeordner (Default: 01_ngp_analysis/scan)")
+    ap.add_argument("--minlen", type=int, default=6, help="min. Stringlänge")
+    ap.add_argument("--maxhits", type=int, default=1000, help="max. Treffer pro Kategorie")
+    add_profile_arg(ap)
+    args = ap.parse_args()
+
+    with profiled(args.profile, os.path.join(args.out, "_profile.prof")):
+        scan(args.input, args.out, args.minlen, args.maxhits)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,68 @@
+import re
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+# Signatur-Tabelle: Name → Byte-Muster (mehrere Muster pro Name möglich)
+SIGNATURES = {
+    "zip":  [b"PK\x03\x04"],
+    "gzip": [b"\x1f\x8b"],
+    "zstd": [b"\x28\xb5\x2f\xfd"],
+    "wav":  [b"RIFF"],
+    "flac": [b"fLaC"],
+    "ogg":  [b"OggS"],
+    # Carver-Signaturen (extract_compressed_members / extract_zlib_raw_blocks --naive)
+    "gzip_deflate": [b"\x1f\x8b\x08"],
+    "zlib": [b"\x78\x01", b"\x78\x9c", b"\x78\xda"],
+}
+
+class SignatureScanner:
+    """
+    Findet alle Signaturen in einem einzigen Durchlauf über die Daten.
+    Ein kombinierter Regex (Alternation aller Muster) liefert die Kandidaten; an jeder
+    Fundstelle wird geprüft, welche Muster dort (und überlappend dahinter) beginnen.
+    """
+
+    def __init__(self, signatures: Optional[Dict[str, List[bytes]]] = None):
+        self.signatures = dict(signatures or SIGNATURES)
+        # Muster → Namen (ein Muster kann theoretisch mehreren Namen gehören)
+        self._by_pattern: Dict[bytes, List[str]] = {}
+        for name, patterns in self.signatures.items():
+            for p in patterns:
+                self._by_pattern.setdefault(p, []).append(name)
+        alts = sorted(self._by_pattern, key=len, reverse=True)
+        self._regex = re.compile(b"|".join(re.escape(p) for p in alts))
+        # Muster nach erstem Byte gruppieren → pro Treffer nur wenige Vergleiche
+        self._by_first: Dict[int, List[bytes]] = {}
+        for p in alts:
+            self._by_first.setdefault(p[0], []).append(p)
+
+    def _match_at(self, mv: memoryview, pos: int, hits: Dict[str, array]):
+        for p in self._by_first.get(mv[pos], ()):
+            if mv[pos:pos + len(p)] == p:
+                for name in self._by_pattern[p]:
+                    hits[name].append(pos)
+
+    def scan(self, data) -> Dict[str, array]:
+        """
+        Liefert {name: array('q', [offsets…])} für alle Signaturen der Tabelle.
+        `data` darf bytes, bytearray, mmap oder memoryview sein.
+        """
+        hits = {name: array("q") for name in self.signatures}
+        mv = memoryview(data)
+        for m in self._regex.finditer(data):
+            # Regex springt hinter den Treffer → überlappende Starts innerhalb von m selbst prüfen
+            for pos in range(m.start(), m.end()):
+                self._match_at(mv, pos, hits)
+        mv.release()
+        return hits
+
+_SCANNERS: Dict[frozenset, SignatureScanner] = {}
+
+def scan(data, names: Optional[Iterable[str]] = None) -> Dict[str, array]:
+    """Single-Pass-Scan mit der Standard-Tabelle (optional nur ausgewählte Namen)."""
+    key = frozenset(names) if names is not None else frozenset(SIGNATURES)
+    scanner = _SCANNERS.get(key)
+    if scanner is None:
+        scanner = SignatureScanner({n: SIGNATURES[n] for n in SIGNATURES if n in key})
+        _SCANNERS[key] = scanner
+    return scanner.scan(data)
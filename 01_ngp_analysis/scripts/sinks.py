@@ -0,0 +1,183 @@
+import os, json, zlib, hashlib, tempfile
+from typing import Optional, Tuple
+
+from qc_common import SNIFF_BYTES, detect_kind
+
+# Ausgabe-Senken für Dekomprimierungsversuche. sha256 und Kopfbytes (Format-Erkennung) entstehen
+# beim Schreiben; ab spill_bytes wandert die Ausgabe in eine Temp-Datei im Store-Ordner, die am Ende
+# nur noch umbenannt wird. Limits für Ausgabegröße und Expansionsrate brechen Zip-Bomben früh ab –
+# der Speicher bleibt flach, egal wie viele Kandidaten Ausgabe liefern.
+
+MAX_OUTPUT_BYTES = 50_000_000   # 50 MB Schutzlimit pro Versuch
+MAX_RATIO = 250                 # Ausgabe/Eingabe (DEFLATE schafft höchstens ~1032:1)
+RATIO_GRACE = 1 << 20           # Rate erst ab 1 MB Ausgabe prüfen (kleine, stark redundante Daten sind normal)
+SPILL_BYTES = 1 << 20           # bis hier im Speicher, darüber Temp-Datei
+OUT_CHUNK = 1 << 20             # höchstens so viel Ausgabe pro zlib-Aufruf
+
+class Limits:
+    """max_output / max_ratio = 0 → ohne Limit."""
+
+    def __init__(self, max_output: int = MAX_OUTPUT_BYTES, max_ratio: float = MAX_RATIO, grace: int = RATIO_GRACE):
+        self.max_output = max_output
+        self.max_ratio = max_ratio
+        self.grace = grace
+
+    def exceeded(self, produced: int, consumed: int) -> Optional[str]:
+        if self.max_output and produced >= self.max_output:
+            return "max_output"
+        if self.max_ratio and produced > self.grace and produced > self.max_ratio * max(consumed, 1):
+            return "ratio"
+        return None
+
+    def key(self) -> str:
+        """Kurzform für den Versuchs-Cache: abgebrochene Treffer gelten nur unter denselben Limits."""
+        return f"{self.max_output}/{self.max_ratio:g}/{self.grace}"
+
+def add_limit_args(ap):
+    ap.add_argument("--max-output-mb", type=float, default=MAX_OUTPUT_BYTES / 1e6,
+                    help="Ausgabe pro Versuch höchstens N MB, dann Abbruch (Default: 50, 0 = aus)")
+    ap.add_argument("--max-ratio", type=float, default=MAX_RATIO,
+                    help="Abbruch ab Expansionsrate Ausgabe/Eingabe > N, geprüft ab 1 MB Ausgabe (Default: 250, 0 = aus)")
+    ap.add_argument("--spill-mb", type=float, default=SPILL_BYTES / (1 << 20),
+                    help="Ausgaben über N MB gehen sofort in eine Temp-Datei im Store (Default: 1)")
+
+def limits_from_args(args) -> Tuple[Limits, int]:
+    return Limits(int(args.max_output_mb * 1e6), args.max_ratio), int(args.spill_mb * (1 << 20))
+
+class Sink:
+    """
+    s = Sink(spill_dir); s.write(stück) …; s.finish() → s.size, s.sha256, s.head, s.kind()
+    Nach finish() ist die Senke picklebar (Pool-Worker → Hauptprozess).
+    """
+
+    def __init__(self, spill_dir: Optional[str] = None, spill_bytes: int = SPILL_BYTES):
+        self.spill_dir = spill_dir
+        self.spill_bytes = spill_bytes
+        self.size = 0
+        self.head = b""
+        self.path = None          # Temp-Datei, sobald ausgelagert
+        self.sha256 = None        # hex, nach finish()
+        self._buf = bytearray()
+        self._file = None
+        self._hash = hashlib.sha256()
+
+    @property
+    def spilled(self) -> bool:
+        return self.path is not None
+
+    def write(self, piece):
+        if not piece:
+            return
+        self._hash.update(piece)
+        if len(self.head) < SNIFF_BYTES:
+            self.head += bytes(piece[:SNIFF_BYTES - len(self.head)])
+        self.size += len(piece)
+        if self._file is None and self.spill_dir and len(self._buf) + len(piece) > self.spill_bytes:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            fd, self.path = tempfile.mkstemp(dir=self.spill_dir, prefix="spill_")
+            self._file = os.fdopen(fd, "wb")
+            self._file.write(self._buf)
+            self._buf = bytearray()
+        if self._file is not None:
+            self._file.write(piece)
+        else:
+            self._buf += piece
+
+    def finish(self) -> "Sink":
+        if self._hash is not None:
+            self.sha256 = self._hash.hexdigest()
+            self._hash = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        return self
+
+    def data(self) -> bytes:
+        """Inhalt im Speicher (nur für nicht ausgelagerte Senken)."""
+        if self.spilled:
+            raise ValueError("Ausgabe liegt in einer Temp-Datei")
+        return bytes(self._buf)
+
+    def kind(self) -> str:
+        # ausgelagert: nur die Kopfbytes – JSON wird dann nicht validiert (→ text_like)
+        return detect_kind(self.head if self.spilled else self._buf)
+
+    def discard(self):
+        self.finish()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+        self.path = None
+        self._buf = bytearray()
+        self.size = 0
+
+def inflate(data, offset: int, wbits: int, sink: Sink, limits: Limits,
+            chunk: Optional[int] = None, keep_partial: bool = False) -> Tuple[int, str]:
+    """
+    data[offset:] stückweise mit zlib (wbits) in sink dekomprimieren; chunk = Eingabebytes pro Schritt
+    (None = alles auf einmal, zlib liefert trotzdem höchstens OUT_CHUNK pro Aufruf).
+    → (consumed, status) mit status eof | end (Eingabe zu Ende) | error | max_output | ratio.
+    Bei error wird die Senke ohne keep_partial verworfen (wie ein gescheiterter One-Shot-Versuch).
+    """
+    d = zlib.decompressobj(wbits)
+    pos, n = offset, len(data)
+    step = chunk or max(n - offset, 1)
+    try:
+        while pos < n:
+            piece = data[pos:pos + step]
+            fed = len(piece)
+            while True:
+                room = limits.max_output - sink.size if limits.max_output else OUT_CHUNK
+                sink.write(d.decompress(piece, min(OUT_CHUNK, room)))
+                piece = d.unconsumed_tail
+                consumed = pos + fed - len(piece) - offset
+                reason = limits.exceeded(sink.size, consumed)
+                if reason:
+                    sink.finish()
+                    return consumed, reason
+                if not piece or d.eof:
+                    break
+            pos += fed
+            if d.eof:
+                sink.finish()
+                return pos - len(d.unused_data) - offset, "eof"
+        sink.write(d.flush())
+    except zlib.error:
+        if not keep_partial:
+            sink.discard()
+        sink.finish()
+        return pos - offset, "error"
+    sink.finish()
+    return pos - offset, "end"
+
+def place(store, sink: Sink, dest: str) -> Tuple[str, str]:
+    """Senke im Objekt-Store ablegen: ausgelagerte Ausgaben werden nur umbenannt, nicht gelesen."""
+    if sink.spilled:
+        sha = store.put_file(sink.path, sink.sha256)
+        sink.path = None
+        return sha, store.link_to(sha, dest)
+    return store.place(sink.data(), dest)
+
+def save_result(store, base: str, sink: Sink):
+    """Treffer im Objekt-Store ablegen; unter base.<ext> liegt ein Hardlink (bzw. nur der Verweis)."""
+    kind = sink.kind()
+    if kind == "zip":
+        sha, path = place(store, sink, base + ".zip")
+        store.unpack_zip(sha)   # einmal pro Inhalt entpacken: <objekt>_zip
+        return path, kind
+
+    if kind in ("json", "text_like"):
+        if sink.spilled:
+            # große Textausgabe: unverändert ablegen statt im Speicher hübsch zu formatieren
+            return place(store, sink, base + ".txt")[1], "text"
+        # JSON hübsch, sonst Text
+        data = sink.data()
+        try:
+            obj = json.loads(data.decode("utf-8"))
+            text = json.dumps(obj, ensure_ascii=False, indent=2)
+            return store.place(text.encode("utf-8"), base + ".json")[1], "json"
+        except Exception:
+            text = data.decode("utf-8", "replace")
+            return store.place(text.encode("utf-8"), base + ".txt")[1], "text"
+
+    # default BIN
+    return place(store, sink, base + ".bin")[1], "bin"
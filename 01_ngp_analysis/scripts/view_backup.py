@@ -1,16 +1,24 @@
-import json
+import os, argparse
 
-INPUT_FILE = r"C:\Users\bensc\Desktop\IT\Projekte\quad_cortex_preset_project\01_ngp_analysis\samples\backup.json"
+from json_stream import TopLevelReader
 
+INPUT_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "samples", "backup.json")
 
-with open(INPUT_FILE, "r", encoding="utf-8") as f:
-    data = json.load(f)
+def main():
+    ap = argparse.ArgumentParser(description="Kurzübersicht einer QC-Backup-Datei (Payload wird nur gezählt, nicht geladen)")
+    ap.add_argument("input", nargs="?", default=INPUT_FILE, help="Pfad zur backup.json (Default: 01_ngp_analysis/samples/backup.json)")
+    args = ap.parse_args()
 
-print("🔍 QC-Backup Übersicht\n")
+    print("🔍 QC-Backup Übersicht\n")
 
-for key, value in data.items():
-    if key in ("payload", "payload_hash"):
-        print(f"{key}: <BINARY, {len(value)} chars>")
-    else:
-        print(f"{key}: {value}")
+    with open(args.input, "rb") as f:
+        reader = TopLevelReader(f)
+        for key in reader.keys():
+            if key in ("payload", "payload_hash"):
+                chars = sum(len(piece) for piece in reader.iter_string())
+                print(f"{key}: <BINARY, {chars} chars>")
+            else:
+                print(f"{key}: {reader.value()}")
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import os, json, time, asyncio, argparse, contextlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from extract_payload import extract
+from backup_explorer import SCAN_DIR, META_DIR, CATALOG_NAME, list_json, find_meta, extract_meta
+from backup_catalog import BackupCatalog, NullCatalog
+
+# Watch-Modus: neue oder geänderte *.json-Backups eines Ordners laufend einlesen (Extraktion + Metadaten).
+# Polling per scandir (ohne Zusatzpakete); eine Datei gilt erst als fertig geschrieben, wenn Größe und
+# mtime --settle Sekunden lang gleich bleiben. Höchstens --jobs Backups gleichzeitig in Worker-Prozessen;
+# Katalog (SQLite) und _watch_manifest.json werden nach jedem Backup aktualisiert.
+
+HERE = os.path.dirname(__file__)
+ANALYSIS_DIR = os.path.dirname(HERE)
+OUT_DEFAULT = os.path.join(ANALYSIS_DIR, "watch")
+MANIFEST_NAME = "_watch_manifest.json"
+INTERVAL = 1.0      # Sekunden zwischen zwei Ordner-Scans
+SETTLE = 2.0        # Sekunden ohne Änderung, bevor eine Datei eingelesen wird
+
+def ingest(job):
+    """Worker: Metadaten und (optional) Extraktion eines Backups. Ausgaben der Extraktion → <dir>/_log.txt."""
+    path, out_dir, meta_path, with_extract = job
+    res = {"status": "ok"}
+    t0 = time.perf_counter()
+    res["meta"] = list(extract_meta(path, meta_path))
+    if with_extract:
+        os.makedirs(out_dir, exist_ok=True)
+        with open(os.path.join(out_dir, "_log.txt"), "w", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+            try:
+                ext = extract(path, out_dir)
+                res.update(sha256=ext["sha256"], kind=ext["kind"], payload_size=ext["size"])
+            except Exception as e:
+                res.update(status="error", error=f"{type(e).__name__}: {e}")
+                print(f"❌ {res['error']}")
+    res["seconds"] = round(time.perf_counter() - t0, 3)
+    return res
+
+class Watcher:
+    """Zustand des Watch-Laufs; alles außer ingest() läuft im Event-Loop (ein Thread)."""
+
+    def __init__(self, directory: str, out: str, catalog, jobs: int = 2, settle: float = SETTLE):
+        self.dir = os.path.abspath(directory)
+        self.out = out
+        self.catalog = catalog
+        self.jobs = jobs
+        self.settle = settle
+        self.manifest_path = os.path.join(out, MANIFEST_NAME)
+        self.entries = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f).get("backups", {})
+        self.changes = {}       # path → ((size, mtime_ns), Zeitpunkt der letzten Änderung)
+        self.pending = set()
+        self.queue = asyncio.Queue()
+        self.stats = Counter()
+
+    def poll(self):
+        """Ordner scannen → (fertige Jobs, Anzahl noch schreibender Dateien); verschwundene Backups austragen."""
+        files = list_json(self.dir)
+        meta_files = [(META_DIR, list_json(META_DIR)), (self.dir, files)]
+        now = time.time()
+        jobs, waiting, current = [], 0, set()
+        for name, st in sorted(files.items()):
+            if name.endswith("_meta.json"):
+                continue
+            path = os.path.join(self.dir, name)
+            current.add(path)
+            sig = (st.st_size, st.st_mtime_ns)
+            prev = self.changes.get(path)
+            if prev is None:
+                # erstmals gesehen: alte Dateien sind sofort bereit, frische warten die Ruhezeit ab
+                self.changes[path] = (sig, min(now, st.st_mtime_ns / 1e9))
+            elif prev[0] != sig:
+                self.changes[path] = (sig, now)
+            if path in self.pending:
+                continue
+            if now - self.changes[path][1] < self.settle:
+                waiting += 1
+                continue
+            meta_path, meta_sig = find_meta(name.replace(".json", ""), meta_files)
+            done = self.entries.get(path)
+            if done and (done["size"], done["mtime_ns"]) == sig:
+                if done.get("meta_sig") == meta_sig:
+                    continue
+                with_extract = False        # nur die _meta.json ist neu/geändert
+            else:
+                with_extract = True
+            out_dir = os.path.join(self.out, name[:-len(".json")])
+            jobs.append(((path, out_dir, meta_path, with_extract), sig, meta_sig))
+
+        gone = [p for p in self.entries if os.path.dirname(p) == self.dir and p not in current]
+        for p in gone:
+            del self.entries[p]
+            self.changes.pop(p, None)
+            print(f"  🗑️  {os.path.basename(p)} entfernt")
+        if gone:
+            self.catalog.prune(gone)
+            self.save()
+        return jobs, waiting
+
+    def record(self, job, sig, meta_sig, res):
+        path, out_dir, _, with_extract = job
+        prev = self.entries.get(path, {})
+        created, author, name, meta_id = res["meta"]
+        entry = {"size": sig[0], "mtime_ns": sig[1], "meta_sig": meta_sig,
+                 "created": created, "author": author, "name": name, "meta_id": meta_id,
+                 "dir": os.path.relpath(out_dir, self.out).replace(os.sep, "/")}
+        if with_extract:
+            entry.update({k: res[k] for k in ("status", "error", "sha256", "kind", "payload_size") if k in res})
+        else:
+            entry.update({k: prev[k] for k in ("status", "error", "sha256", "kind", "payload_size") if k in prev})
+        entry["ingested"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.entries[path] = entry
+        self.catalog.put(path, sig[0], sig[1], meta_sig, (created, author, name, meta_id))
+        self.catalog.flush()
+        self.save()
+
+        what = "Extraktion+Meta" if with_extract else "nur Meta"
+        self.stats["errors" if res["status"] != "ok" else "extracted" if with_extract else "meta_only"] += 1
+        if res["status"] == "ok":
+            kind = f" | {entry.get('kind')} | {entry.get('payload_size')} B" if with_extract else ""
+            print(f"  ✅ {os.path.basename(path)}{kind} | created={created} | author={author} | "
+                  f"{what} | {res['seconds']} s")
+        else:
+            print(f"  ❌ {os.path.basename(path)} | {res['error']}")
+
+    def save(self):
+        """Manifest atomar ersetzen (Leser sehen nie eine halb geschriebene Datei)."""
+        doc = {"dir": self.dir, "updated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+               "backups": dict(sorted(self.entries.items()))}
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(doc, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    async def worker(self, pool):
+        loop = asyncio.get_running_loop()
+        while True:
+            job, sig, meta_sig = await self.queue.get()
+            try:
+                res = await loop.run_in_executor(pool, ingest, job)
+                self.record(job, sig, meta_sig, res)
+            except Exception as e:
+                # z.B. abgestürzter Worker-Prozess: nicht eingetragen → beim nächsten Scan erneut
+                print(f"  ❌ {os.path.basename(job[0])} | {type(e).__name__}: {e}")
+            finally:
+                self.pending.discard(job[0])
+                self.queue.task_done()
+
+    async def run(self, interval: float = INTERVAL, once: bool = False):
+        """Scannen, bis Strg+C; once=True: nur bis alles Vorhandene eingelesen ist."""
+        os.makedirs(self.out, exist_ok=True)
+        with ProcessPoolExecutor(self.jobs) as pool:
+            workers = [asyncio.create_task(self.worker(pool)) for _ in range(self.jobs)]
+            try:
+                while True:
+                    jobs, waiting = self.poll()
+                    for item in jobs:
+                        self.pending.add(item[0][0])
+                        self.queue.put_nowait(item)
+                    if once and not waiting and not self.pending:
+                        break
+                    await asyncio.sleep(interval)
+            finally:
+                for w in workers:
+                    w.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Backup-Ordner beobachten: neue/geänderte Backups laufend extrahieren "
+                                             "und in den Metadaten-Katalog eintragen.")
+    ap.add_argument("--dir", default=SCAN_DIR, help="Backup-Verzeichnis (Default: scan/)")
+    ap.add_argument("-o", "--out", default=OUT_DEFAULT, help="Ausgabeordner je Backup + _watch_manifest.json "
+                                                              "(Default: 01_ngp_analysis/watch)")
+    ap.add_argument("--catalog", help=f"Metadaten-Katalog (Default: <dir>/{CATALOG_NAME}, wie backup_explorer)")
+    ap.add_argument("--no-catalog", action="store_true", help="Katalog weder lesen noch schreiben")
+    ap.add_argument("--jobs", type=int, default=2, help="Worker-Prozesse (Default: 2)")
+    ap.add_argument("--interval", type=float, default=INTERVAL, help="Sekunden zwischen zwei Scans (Default: 1)")
+    ap.add_argument("--settle", type=float, default=SETTLE,
+                    help="Sekunden ohne Größen-/mtime-Änderung, bevor eine Datei gelesen wird (Default: 2)")
+    ap.add_argument("--once", action="store_true", help="Vorhandene Backups einlesen und beenden")
+    args = ap.parse_args(argv)
+
+    catalog = NullCatalog() if args.no_catalog else BackupCatalog(args.catalog or os.path.join(args.dir, CATALOG_NAME))
+    watcher = Watcher(args.dir, args.out, catalog, max(args.jobs, 1), args.settle)
+    print(f"👀 {watcher.dir} | alle {args.interval:g} s, Ruhezeit {args.settle:g} s | Worker: {watcher.jobs} "
+          f"| {len(watcher.entries)} bereits eingelesen → {args.out}")
+    try:
+        asyncio.run(watcher.run(args.interval, args.once))
+    except KeyboardInterrupt:
+        print("\n⏹️  beendet")
+    finally:
+        catalog.close()
+    st = watcher.stats
+    print(f"♻️  {st['extracted']} extrahiert, {st['meta_only']} nur Metadaten, {st['errors']} Fehler "
+          f"→ {watcher.manifest_path}")
+
+if __name__ == "__main__":
+    main()